@@ -0,0 +1,143 @@
+"""
+Agregación diaria de titulares: cuántos titulares y enlaces distintos tiene
+cada categoría de cada periódico por día.
+
+Escribe resumen/periodico=/year=/month=/day=/categorias.csv con pyarrow. NO es
+el trabajo que corre en EMR (app/script.py, que no está en este repositorio),
+así que proyecto3 no lo usa: el camino en proceso queda deshabilitado (ver
+proyecto3.umbral_en_proceso) hasta portar la lógica de ese script aquí con una
+prueba de paridad.
+"""
+import csv
+import io
+import re
+
+# Las columnas del CSV de final/ (y del Parquet escrito antes de las columnas
+# comunes) cambian de nombre entre periódicos (titulo/titular, enlace/link) pero
+# no de posición: categoría, titular, enlace
+COLUMNAS = ('categoria', 'titulo', 'enlace')
+COLUMNAS_SALIDA = ('categoria', 'titulares', 'enlaces_unicos')
+
+# El archivo diario (titulares.<ext>) o uno por snapshot en hour=HH/ (PARTICION_SALIDA=hora)
+PATRON_ENTRADA = re.compile(
+    r'^final/periodico=([^/]+)/year=(\d{4})/month=(\d{2})/day=(\d{2})/'
+    r'(titulares|hour=\d{2}/[^/]+)\.(csv|parquet)$'
+)
+
+
+def clave_salida(periodico, anio, mes, dia):
+    return f'resumen/periodico={periodico}/year={anio}/month={mes}/day={dia}/categorias.csv'
+
+
+def particiones_de(claves):
+    """
+    Agrupa los archivos de final/ por partición.
+
+    Si un archivo está en CSV y en Parquet (FORMATO_SALIDA=ambos) se lee solo
+    el Parquet: tienen las mismas filas.
+
+    Args:
+        claves (iterable[str]): Claves bajo final/.
+    Returns:
+        dict: {(periódico, año, mes, día): [claves]}.
+    """
+    archivos = {}
+    for key in claves:
+        match = PATRON_ENTRADA.match(key)
+        if not match:
+            continue
+        periodico, anio, mes, dia, nombre, formato = match.groups()
+        elegidos = archivos.setdefault((periodico, anio, mes, dia), {})
+        if nombre not in elegidos or formato == 'parquet':
+            elegidos[nombre] = key
+    return {particion: sorted(elegidos.values()) for particion, elegidos in archivos.items()}
+
+
+def filas_a_csv(filas):
+    """
+    Serializa las filas agregadas, ordenadas por categoría.
+
+    Args:
+        filas (iterable[tuple]): (categoria, titulares, enlaces_unicos).
+    Returns:
+        bytes: CSV en UTF-8 con cabecera y saltos '\\n'.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow(COLUMNAS_SALIDA)
+    for fila in sorted(filas, key=lambda f: f[0] or ''):
+        escritor.writerow(fila)
+    return buffer.getvalue().encode('utf-8')
+
+
+def leer_tabla(datos, formato):
+    """
+    Lee un archivo de final/ como tabla de pyarrow con COLUMNAS, sea CSV o Parquet.
+
+    Todo se lee como texto y en el CSV solo el campo vacío es nulo, igual que
+    spark.read.csv sin inferSchema.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    if formato == 'parquet':
+        tabla = pq.read_table(io.BytesIO(datos))
+        columnas = [tabla.column(i).cast(pa.string()) for i in range(len(COLUMNAS))]
+        return pa.table(columnas, names=list(COLUMNAS))
+    return pv.read_csv(
+        io.BytesIO(datos),
+        read_options=pv.ReadOptions(column_names=list(COLUMNAS), skip_rows=1),
+        convert_options=pv.ConvertOptions(
+            column_types={columna: pa.string() for columna in COLUMNAS},
+            null_values=[''],
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def agregar_tabla(tabla):
+    """
+    Agrega una tabla de titulares por categoría, de forma vectorizada.
+
+    Las filas repetidas (el mismo titular en varios snapshots del día) cuentan
+    una vez, así que el resultado no cambia al compactar la partición.
+
+    Returns:
+        list[tuple]: (categoria, titulares, enlaces_unicos).
+    """
+    tabla = tabla.group_by(list(COLUMNAS)).aggregate([])
+    resultado = tabla.group_by('categoria').aggregate([
+        ([], 'count_all'),
+        ('enlace', 'count_distinct'),
+    ])
+    categorias = resultado.column('categoria').to_pylist()
+    titulares = resultado.column('count_all').to_pylist()
+    enlaces = resultado.column('enlace_count_distinct').to_pylist()
+    return list(zip(categorias, titulares, enlaces))
+
+
+def agregar_en_proceso(s3, bucket, claves):
+    """
+    Ejecuta la agregación dentro de la Lambda y escribe un resumen por partición.
+
+    Args:
+        s3: Cliente de almacenamiento (ver almacen.crear_cliente).
+        bucket (str): Bucket de datos.
+        claves (iterable[str]): Archivos de final/ a agregar.
+    Returns:
+        list[str]: Claves escritas en resumen/.
+    """
+    import pyarrow as pa
+
+    salidas = []
+    for particion, keys in sorted(particiones_de(claves).items()):
+        tablas = [
+            leer_tabla(s3.get_object(Bucket=bucket, Key=key)['Body'].read(), key.rsplit('.', 1)[1])
+            for key in keys
+        ]
+        filas = agregar_tabla(pa.concat_tables(tablas))
+        key_salida = clave_salida(*particion)
+        s3.put_object(Bucket=bucket, Key=key_salida, Body=filas_a_csv(filas), ContentType='text/csv')
+        salidas.append(key_salida)
+    return salidas
@@ -0,0 +1,163 @@
+import gzip
+import io
+import json
+import os
+
+from metricas import contar, contar_llamadas
+
+# Backend de almacenamiento de los handlers (variable ALMACEN):
+#   's3'    cliente de boto3 (por defecto, el de AWS Lambda)
+#   'local' AlmacenLocal sobre ALMACEN_DIRECTORIO, para correr el flujo completo sin AWS
+# Ambos exponen el mismo subconjunto de la API de S3: put_object, get_object,
+# delete_object y list_objects_v2, así que los handlers no distinguen uno de otro.
+ALMACENES = ('s3', 'local')
+
+
+def almacen_configurado():
+    almacen = os.environ.get('ALMACEN', 's3')
+    if almacen not in ALMACENES:
+        raise ValueError(f"ALMACEN no soportado: {almacen}. Opciones: {', '.join(ALMACENES)}")
+    return almacen
+
+
+def crear_cliente():
+    """
+    Crea el cliente de almacenamiento según ALMACEN.
+
+    Returns:
+        Cliente de boto3 para S3 o AlmacenLocal.
+    """
+    if almacen_configurado() == 'local':
+        return AlmacenLocal(os.environ.get('ALMACEN_DIRECTORIO', 'almacen_local'))
+    import boto3
+    return contar_llamadas(boto3.client('s3'), 's3')
+
+
+def listar_objetos(s3, bucket, prefijo, desde=''):
+    """
+    Lista los objetos (Key, Size) bajo el prefijo siguiendo la paginación de list_objects_v2.
+
+    Con desde solo se listan las claves posteriores a ella (StartAfter).
+    """
+    parametros = {'Bucket': bucket, 'Prefix': prefijo}
+    if desde:
+        parametros['StartAfter'] = desde
+    while True:
+        listado = s3.list_objects_v2(**parametros)
+        yield from listado.get('Contents', [])
+        if not listado.get('IsTruncated'):
+            return
+        parametros['ContinuationToken'] = listado['NextContinuationToken']
+
+
+def listar_claves(s3, bucket, prefijo):
+    """Lista todas las claves bajo el prefijo siguiendo la paginación de list_objects_v2."""
+    for obj in listar_objetos(s3, bucket, prefijo):
+        yield obj['Key']
+
+
+def abrir(s3, bucket, key):
+    """
+    Abre un objeto para leerlo como flujo.
+
+    Si el objeto se guardó con Content-Encoding: gzip se descomprime en
+    streaming mientras se lee; si no, se devuelve el cuerpo tal cual.
+
+    Args:
+        s3: Cliente de almacenamiento.
+        bucket (str): Bucket.
+        key (str): Clave del objeto.
+    Returns:
+        file: Objeto con read() que entrega el contenido sin comprimir.
+    """
+    respuesta = s3.get_object(Bucket=bucket, Key=key)
+    cuerpo = respuesta['Body']
+    if respuesta.get('ContentEncoding') == 'gzip':
+        return gzip.GzipFile(fileobj=cuerpo, mode='rb')
+    return cuerpo
+
+
+class ErrorAlmacenLocal(Exception):
+    """Error con la misma forma que botocore.exceptions.ClientError (atributo response)."""
+
+    def __init__(self, codigo, mensaje):
+        super().__init__(mensaje)
+        self.response = {'Error': {'Code': codigo, 'Message': mensaje}}
+
+
+class AlmacenLocal:
+    """
+    Implementación local del cliente S3 para pruebas y ejecuciones sin AWS.
+
+    Guarda cada objeto como archivo en <directorio>/<bucket>/<key> y expone el
+    subconjunto de la API que usan los handlers: put_object (con IfNoneMatch),
+    get_object, delete_object y list_objects_v2. ContentType y ContentEncoding se guardan
+    aparte en <directorio>/.metadatos para no aparecer en los listados. Cada llamada
+    cuenta en llamadas_s3 como las del cliente de boto3 (ver metricas.py).
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def _ruta(self, bucket, key):
+        return os.path.join(self.directorio, bucket, *key.split('/'))
+
+    def _ruta_metadatos(self, bucket, key):
+        return os.path.join(self.directorio, '.metadatos', bucket, *key.split('/')) + '.json'
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, ContentEncoding=None, IfNoneMatch=None):
+        contar('llamadas_s3')
+        ruta = self._ruta(Bucket, Key)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        # 'xb' falla si el archivo existe: la misma semántica que IfNoneMatch='*'
+        modo = 'xb' if IfNoneMatch == '*' else 'wb'
+        try:
+            with open(ruta, modo) as f:
+                f.write(Body)
+        except FileExistsError:
+            raise ErrorAlmacenLocal('PreconditionFailed', f'Ya existe: {Key}')
+
+        metadatos = {k: v for k, v in (('ContentType', ContentType), ('ContentEncoding', ContentEncoding)) if v}
+        ruta_metadatos = self._ruta_metadatos(Bucket, Key)
+        if metadatos:
+            os.makedirs(os.path.dirname(ruta_metadatos), exist_ok=True)
+            with open(ruta_metadatos, 'w') as f:
+                json.dump(metadatos, f)
+        elif os.path.isfile(ruta_metadatos):
+            os.remove(ruta_metadatos)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        contar('llamadas_s3')
+        ruta = self._ruta(Bucket, Key)
+        if not os.path.isfile(ruta):
+            raise ErrorAlmacenLocal('NoSuchKey', f'No existe: {Key}')
+        with open(ruta, 'rb') as f:
+            respuesta = {'Body': io.BytesIO(f.read())}
+        ruta_metadatos = self._ruta_metadatos(Bucket, Key)
+        if os.path.isfile(ruta_metadatos):
+            with open(ruta_metadatos) as f:
+                respuesta.update(json.load(f))
+        return respuesta
+
+    def delete_object(self, Bucket, Key):
+        contar('llamadas_s3')
+        # Como S3: borrar una clave que no existe no es un error
+        for ruta in (self._ruta(Bucket, Key), self._ruta_metadatos(Bucket, Key)):
+            if os.path.isfile(ruta):
+                os.remove(ruta)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', StartAfter=''):
+        contar('llamadas_s3')
+        raiz = os.path.join(self.directorio, Bucket)
+        contenido = []
+        for actual, _, archivos in os.walk(raiz):
+            for archivo in archivos:
+                key = os.path.relpath(os.path.join(actual, archivo), raiz).replace(os.sep, '/')
+                if key.startswith(Prefix) and key > StartAfter:
+                    contenido.append({'Key': key, 'Size': os.path.getsize(os.path.join(actual, archivo))})
+        contenido.sort(key=lambda obj: obj['Key'])
+        return {'Contents': contenido} if contenido else {}
@@ -0,0 +1,382 @@
+"""
+Benchmarks de los extractores de proyecto1.
+
+Uso:
+    python benchmark.py publimetro [escala]
+    python benchmark.py parsers [escala]
+    python benchmark.py suite [--escalas 1,10,100] [--guardar-base]
+
+'publimetro' compara el extractor de Publimetro actual con la versión anterior
+(búsqueda ascendente de 'c-overline' y deduplicación por lista). 'parsers' mide
+ambos extractores con cada backend de PARSERS_HTML instalado y recomienda el más
+rápido que produce exactamente los mismos titulares que 'html.parser'. El tamaño
+es `escala` veces la portada base (10 por defecto).
+
+Todos usan las portadas del corpus (ver corpus.py, semilla 0), así que cada
+medición corre sobre los mismos bytes. 'suite' mide cada extractor y
+proyecto1.app completo (con AlmacenLocal en un directorio temporal) en cada
+escala: latencia mediana por llamada, páginas por segundo y pico de memoria. En
+la misma corrida mide también publimetro_anterior como referencia y expresa cada
+latencia relativa a ella, así que la comparación con benchmark_base.json no
+depende de la velocidad de la máquina. La base no se versiona: se genera con
+--guardar-base sobre la rama de referencia en la misma máquina que luego
+compara, y la suite termina con código 1 si la latencia relativa o la memoria
+de algún caso empeora más que --tolerancia.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+import corpus
+from proyecto1 import PARSERS_HTML, extraer_noticias_publimetro, parse_el_tiempo
+
+
+def publimetro_anterior(html_content):
+    """Versión previa del extractor de Publimetro, conservada como referencia de rendimiento."""
+    BASE_URL = "https://www.publimetro.co"
+    soup = BeautifulSoup(html_content, 'html.parser')
+    noticias = []
+
+    def limpiar_texto(texto):
+        return re.sub(r'\s+', ' ', texto.strip()) if texto else ""
+
+    def completar_link(href):
+        if href.startswith("http"):
+            return href
+        return BASE_URL + href
+
+    def extraer_categoria(elemento):
+        categoria_elem = elemento.find('span', class_='c-overline')
+        if categoria_elem:
+            return limpiar_texto(categoria_elem.get_text())
+        parent = elemento.find_parent()
+        while parent:
+            categoria_elem = parent.find('span', class_='c-overline')
+            if categoria_elem:
+                return limpiar_texto(categoria_elem.get_text())
+            parent = parent.find_parent()
+        for link in elemento.find_all('a', href=True):
+            for seccion in ('deportes', 'entretenimiento', 'noticias', 'barranquilla'):
+                if f'/{seccion}/' in link['href']:
+                    return seccion.title()
+        return 'Sin categoría'
+
+    def agregar(elemento, link_elem, titulo=None):
+        noticias.append({
+            'categoria': extraer_categoria(elemento),
+            'titular': titulo if titulo is not None else limpiar_texto(link_elem.get_text()),
+            'link': completar_link(link_elem.get('href'))
+        })
+
+    for noticia in soup.find_all('article', class_='b-top-table-list-xl'):
+        titulo_elem = noticia.find('h2', class_='c-heading')
+        link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
+        if link_elem:
+            agregar(noticia, link_elem)
+
+    seccion_entretenimiento = soup.find('div', class_='b-card-list')
+    if seccion_entretenimiento:
+        noticia_main = seccion_entretenimiento.find('article', class_='b-card-list__main-item')
+        if noticia_main:
+            titulo_elem = noticia_main.find('h3', class_='c-heading')
+            link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
+            if link_elem:
+                agregar(noticia_main, link_elem)
+        for noticia in seccion_entretenimiento.find_all(
+            'article', class_='b-card-list__secondary-item'
+        ):
+            titulo_elem = noticia.find('h3', class_='c-heading')
+            link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
+            if link_elem:
+                agregar(noticia, link_elem)
+
+    for noticia in soup.find_all('article', class_='b-top-table-list-small'):
+        titulo_elem = noticia.find('h2', class_='c-heading')
+        link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
+        if link_elem:
+            agregar(noticia, link_elem)
+
+    for seccion in soup.find_all('div', class_='b-results-list'):
+        for enlace in seccion.find_all('a', class_='c-link', href=True):
+            if enlace.get('aria-hidden') == 'true' or enlace.get('tabindex') == '-1':
+                continue
+            titulo = limpiar_texto(enlace.get_text())
+            if titulo:
+                agregar(enlace.find_parent(), enlace, titulo)
+
+    for enlace in soup.find_all('a', class_='c-link', href=True):
+        if (enlace.get('aria-hidden') == 'true' or
+            enlace.get('tabindex') == '-1' or
+            not enlace['href'].startswith('/')):
+            continue
+        if enlace.find_parent(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+            titulo = limpiar_texto(enlace.get_text())
+            if titulo and titulo not in [n['titular'] for n in noticias]:
+                agregar(enlace.find_parent(), enlace, titulo)
+
+    noticias_unicas = []
+    titulos_vistos = set()
+    for noticia in noticias:
+        if noticia['titular'] not in titulos_vistos:
+            noticias_unicas.append(noticia)
+            titulos_vistos.add(noticia['titular'])
+    return noticias_unicas
+
+
+def medir(funcion, html, repeticiones=3):
+    """Devuelve el mejor tiempo (s) de `repeticiones` ejecuciones y el resultado."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(html)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def parsers_disponibles():
+    disponibles = []
+    for parser in PARSERS_HTML:
+        try:
+            BeautifulSoup('<p></p>', parser)
+            disponibles.append(parser)
+        except FeatureNotFound:
+            pass
+    return disponibles
+
+
+def benchmark_parsers(escala=10):
+    """
+    Mide ambos extractores con cada backend instalado y recomienda el más rápido
+    cuyos titulares coinciden con los de 'html.parser'.
+    """
+    paginas = {
+        'eltiempo': (parse_el_tiempo, corpus.portada_el_tiempo(escala)),
+        'publimetro': (extraer_noticias_publimetro, corpus.portada_publimetro(escala)),
+    }
+    referencia = {}
+    totales = {}
+    identicos = {}
+
+    print(f"Backends de parseo, portadas del corpus x{escala}")
+    for parser in parsers_disponibles():
+        totales[parser] = 0.0
+        identicos[parser] = True
+        for nombre, (extractor, html) in paginas.items():
+            duracion, noticias = medir(lambda h: extractor(h, parser), html)
+            referencia.setdefault(nombre, noticias)
+            coincide = noticias == referencia[nombre]
+            totales[parser] += duracion
+            identicos[parser] = identicos[parser] and coincide
+            print(f"  {parser:12s} {nombre:11s} {duracion * 1000:8.1f} ms  "
+                  f"{len(noticias):4d} noticias  {'idénticas' if coincide else 'DISTINTAS'}")
+
+    validos = [p for p in totales if identicos[p]]
+    elegido = min(validos, key=totales.get)
+    print(f"Recomendado: PARSER_HTML={elegido} ({totales[elegido] * 1000:.1f} ms en total)")
+    return elegido
+
+
+def benchmark_publimetro(escala=10):
+    html = corpus.portada_publimetro(escala)
+    t_anterior, anterior = medir(publimetro_anterior, html)
+    t_actual, actual = medir(extraer_noticias_publimetro, html)
+
+    if anterior != actual:
+        raise AssertionError("Las dos versiones del extractor de Publimetro no coinciden.")
+
+    print(f"Portada del corpus de Publimetro x{escala}: {len(html) / 1024:.0f} KiB, "
+          f"{len(actual)} noticias")
+    print(f"  anterior: {t_anterior * 1000:8.1f} ms")
+    print(f"  actual:   {t_actual * 1000:8.1f} ms")
+    print(f"  aceleración: {t_anterior / t_actual:.1f}x")
+
+
+BENCHMARKS = {
+    'publimetro': benchmark_publimetro,
+    'parsers': benchmark_parsers,
+}
+
+ESCALAS_SUITE = (1, 10, 100)
+ARCHIVO_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_base.json')
+# Empeoramiento relativo permitido antes de reportar una regresión
+TOLERANCIA = 0.25
+# Medidas que no dependen de la velocidad de la máquina; son las únicas que se guardan en la base
+MEDIDAS_BASE = ('relativa', 'memoria_kib')
+GENERADORES = corpus.PORTADAS
+
+
+def perfil(funcion, argumento, repeticiones=5):
+    """
+    Latencia mediana de `repeticiones` llamadas y pico de memoria de una llamada más.
+
+    La memoria se mide aparte porque tracemalloc hace más lenta la ejecución.
+
+    Returns:
+        tuple: (segundos, bytes).
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    try:
+        funcion(argumento)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(tiempos), pico
+
+
+def medir_suite(escalas=ESCALAS_SUITE, repeticiones=5):
+    """
+    Mide los extractores y proyecto1.app en cada escala.
+
+    'relativa' es la latencia dividida por la de publimetro_anterior sobre la
+    portada de Publimetro de la misma escala, medida en la misma corrida
+    (caso 'referencia/extractor/x<escala>').
+
+    Returns:
+        dict: {'<periódico>/<etapa>/x<escala>':
+               {'latencia_ms', 'relativa', 'paginas_s', 'memoria_kib'}}.
+    """
+    import proyecto1
+    from almacen import AlmacenLocal
+
+    extractores = {'eltiempo': parse_el_tiempo, 'publimetro': extraer_noticias_publimetro}
+    resultados = {}
+    anterior = proyecto1.s3
+    # Los handlers imprimen su progreso; aquí solo interesa la tabla final
+    with tempfile.TemporaryDirectory() as directorio, contextlib.redirect_stdout(io.StringIO()):
+        proyecto1.s3 = AlmacenLocal(directorio)
+        try:
+            for escala in escalas:
+                pagina = corpus.portada_publimetro(escala)
+                referencia, pico = perfil(publimetro_anterior, pagina, repeticiones)
+                resultados[f'referencia/extractor/x{escala}'] = resumen(
+                    referencia, referencia, pico
+                )
+                for periodico, generador in GENERADORES.items():
+                    html = generador(escala)
+                    key = f'raw/contenido-{periodico}-2025-05-28-10-30.html'
+                    proyecto1.s3.put_object(Bucket='benchmark', Key=key, Body=html.encode('utf-8'))
+                    evento = {'Records': [
+                        {'s3': {'bucket': {'name': 'benchmark'}, 'object': {'key': key}}}
+                    ]}
+                    for etapa, funcion, argumento in (
+                        ('extractor', extractores[periodico], html),
+                        ('app', lambda e: proyecto1.app(e, None), evento),
+                    ):
+                        segundos, pico = perfil(funcion, argumento, repeticiones)
+                        resultados[f'{periodico}/{etapa}/x{escala}'] = resumen(
+                            segundos, referencia, pico
+                        )
+        finally:
+            proyecto1.s3 = anterior
+    return resultados
+
+
+def resumen(segundos, referencia, pico):
+    return {
+        'latencia_ms': round(segundos * 1000, 3),
+        'relativa': round(segundos / referencia, 3),
+        'paginas_s': round(1 / segundos, 2),
+        'memoria_kib': round(pico / 1024, 1),
+    }
+
+
+def comparar_con_base(resultados, base, tolerancia=TOLERANCIA):
+    """
+    Medidas que empeoraron más que la tolerancia respecto a la base.
+
+    Se comparan la latencia relativa y la memoria; la latencia absoluta depende
+    de la máquina y no se compara. Los casos que no están en la base se ignoran.
+
+    Returns:
+        list[str]: Una línea por regresión.
+    """
+    regresiones = []
+    for caso, medidas in sorted(resultados.items()):
+        for medida in MEDIDAS_BASE:
+            referencia = base.get(caso, {}).get(medida)
+            if referencia and medidas[medida] > referencia * (1 + tolerancia):
+                aumento = medidas[medida] / referencia - 1
+                regresiones.append(
+                    f'{caso} {medida}: {medidas[medida]} vs {referencia} (+{aumento:.0%})'
+                )
+    return regresiones
+
+
+def benchmark_suite(escalas=ESCALAS_SUITE, repeticiones=5, base=ARCHIVO_BASE, guardar_base=False,
+                    tolerancia=TOLERANCIA):
+    """
+    Corre la suite, imprime la tabla y la compara con la base (o la guarda).
+
+    Returns:
+        list[str]: Regresiones encontradas (vacía si se guardó la base).
+    """
+    resultados = medir_suite(escalas, repeticiones)
+    print(f"{'caso':28s} {'latencia':>12s} {'relativa':>9s} {'páginas/s':>10s} {'memoria':>12s}")
+    for caso, medidas in resultados.items():
+        print(f"{caso:28s} {medidas['latencia_ms']:9.1f} ms {medidas['relativa']:8.2f}x "
+              f"{medidas['paginas_s']:10.1f} {medidas['memoria_kib']:8.0f} KiB")
+
+    if guardar_base:
+        with open(base, 'w') as f:
+            guardados = {
+                caso: {m: medidas[m] for m in MEDIDAS_BASE} for caso, medidas in resultados.items()
+            }
+            json.dump(guardados, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Base guardada en {base}')
+        return []
+    if not os.path.isfile(base):
+        print(f'No hay base en {base}; se crea con --guardar-base.')
+        return []
+    with open(base) as f:
+        regresiones = comparar_con_base(resultados, json.load(f), tolerancia)
+    for regresion in regresiones:
+        print(f'REGRESIÓN {regresion}')
+    print(f'{len(regresiones)} regresiones (tolerancia {tolerancia:.0%}).')
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmarks de los extractores y de proyecto1.app.'
+    )
+    parser.add_argument('nombre', nargs='?', default='publimetro', choices=[*BENCHMARKS, 'suite'])
+    parser.add_argument('escala', nargs='?', type=int, default=10,
+                        help='Escala de publimetro y parsers')
+    parser.add_argument('--escalas', default=','.join(map(str, ESCALAS_SUITE)),
+                        help='Escalas de la suite')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--base', default=ARCHIVO_BASE)
+    parser.add_argument('--guardar-base', action='store_true',
+                        help='Guarda las medidas como nueva base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    args = parser.parse_args(argv)
+
+    if args.nombre != 'suite':
+        BENCHMARKS[args.nombre](args.escala)
+        return 0
+    escalas = tuple(int(escala) for escala in args.escalas.split(','))
+    regresiones = benchmark_suite(
+        escalas, args.repeticiones, args.base, args.guardar_base, args.tolerancia
+    )
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Registro directo de particiones en el catálogo de Glue y propiedades de proyección.
+
+Con REGISTRO_PARTICIONES=directo, proyecto1 registra la partición
+final/periodico=/year=/month=/day= en cuanto escribe los titulares, con el
+esquema que ya conoce, en lugar de esperar a una corrida completa del crawler.
+
+Uso:
+    python catalogo.py proyeccion [bucket]   # parámetros para la tabla (JSON)
+    python catalogo.py ddl [bucket]          # CREATE EXTERNAL TABLE con proyección
+"""
+import json
+import os
+import re
+import sys
+
+from metricas import contar_llamadas
+from periodicos import PERIODICOS
+
+BUCKET = 'parcialfinal2025'
+
+# 'crawler' (por defecto): el catálogo lo mantiene el crawler 'noticias' vía proyecto2
+# 'directo': proyecto1 registra cada partición nueva al escribirla
+MODOS_REGISTRO = ('crawler', 'directo')
+
+BASE_DATOS = os.environ.get('GLUE_BASE_DATOS', 'noticias')
+TABLAS = {
+    'csv': os.environ.get('GLUE_TABLA', 'final'),
+    'parquet': os.environ.get('GLUE_TABLA_PARQUET', 'final_parquet'),
+}
+
+# Formatos de entrada/salida y SerDe de Hive para cada formato de final/
+FORMATOS_HIVE = {
+    'csv': {
+        'InputFormat': 'org.apache.hadoop.mapred.TextInputFormat',
+        'OutputFormat': 'org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat',
+        'SerdeInfo': {
+            'SerializationLibrary': 'org.apache.hadoop.hive.serde2.OpenCSVSerde',
+            'Parameters': {'separatorChar': ',', 'quoteChar': '"'},
+        },
+    },
+    'parquet': {
+        'InputFormat': 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat',
+        'OutputFormat': 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat',
+        'SerdeInfo': {
+            'SerializationLibrary': 'org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe',
+            'Parameters': {},
+        },
+    },
+}
+
+# Columnas de las tablas de final/. El CSV se lee por posición y conserva la
+# cabecera de cada periódico (titulo/titular, enlace/link); el SerDe de Parquet
+# lee por nombre, así que el Parquet se escribe siempre con estas (ver
+# proyecto1.esquema_parquet) y una sola tabla sirve para todos los periódicos.
+COLUMNAS = ('categoria', 'titulo', 'enlace')
+
+PATRON_PARTICION = re.compile(r'^final/periodico=([^/]+)/year=(\d{4})/month=(\d{2})/day=(\d{2})/')
+
+# Particiones ya registradas por este contenedor: en invocaciones calientes no se repite la llamada
+_registradas = set()
+glue = None
+
+
+def cliente_glue():
+    global glue
+    if glue is None:
+        import boto3
+        glue = contar_llamadas(boto3.client('glue'), 'glue')
+    return glue
+
+
+def modo_configurado():
+    modo = os.environ.get('REGISTRO_PARTICIONES', 'crawler')
+    if modo not in MODOS_REGISTRO:
+        raise ValueError(f"REGISTRO_PARTICIONES no soportado: {modo}. Opciones: {', '.join(MODOS_REGISTRO)}")
+    return modo
+
+
+def valores_particion(key):
+    """
+    Valores de partición (periodico, year, month, day) de una clave de final/.
+
+    Args:
+        key (str): Clave escrita por proyecto1.
+    Returns:
+        list[str]: Valores en el orden de las columnas de partición.
+    """
+    match = PATRON_PARTICION.match(key)
+    if not match:
+        raise ValueError(f"La clave no está en una partición de final/: {key}")
+    return list(match.groups())
+
+
+def entrada_particion(bucket, key, campos):
+    """
+    PartitionInput de Glue para la partición de la clave, con su esquema y formato.
+
+    Args:
+        bucket (str): Bucket de datos.
+        key (str): Clave del archivo de titulares (.csv o .parquet).
+        campos (tuple): Columnas del periódico (ver periodicos.PERIODICOS); el
+            Parquet usa siempre COLUMNAS.
+    Returns:
+        dict: Entrada para batch_create_partition.
+    """
+    formato = 'parquet' if key.endswith('.parquet') else 'csv'
+    valores = valores_particion(key)
+    descriptor = dict(FORMATOS_HIVE[formato])
+    columnas = COLUMNAS if formato == 'parquet' else campos
+    descriptor['Columns'] = [{'Name': campo, 'Type': 'string'} for campo in columnas]
+    # Con PARTICION_SALIDA=hora el archivo está en hour=HH/ dentro de la partición
+    descriptor['Location'] = f"s3://{bucket}/{PATRON_PARTICION.match(key).group(0)}"
+    return {'Values': valores, 'StorageDescriptor': descriptor}
+
+
+def registrar_particiones(bucket, keys, campos):
+    """
+    Registra en Glue las particiones de las claves escritas; las que ya existen se ignoran.
+
+    Args:
+        bucket (str): Bucket de datos.
+        keys (list[str]): Claves escritas en final/.
+        campos (tuple): Columnas del periódico.
+    Returns:
+        list[tuple]: (tabla, valores) de las particiones creadas.
+    """
+    creadas = []
+    for key in keys:
+        formato = 'parquet' if key.endswith('.parquet') else 'csv'
+        tabla = TABLAS[formato]
+        entrada = entrada_particion(bucket, key, campos)
+        identificador = (tabla, tuple(entrada['Values']))
+        if identificador in _registradas:
+            continue
+
+        respuesta = cliente_glue().batch_create_partition(
+            DatabaseName=BASE_DATOS,
+            TableName=tabla,
+            PartitionInputList=[entrada]
+        )
+        errores = [e for e in respuesta.get('Errors', [])
+                   if e.get('ErrorDetail', {}).get('ErrorCode') != 'AlreadyExistsException']
+        if errores:
+            raise RuntimeError(f"No se pudo registrar la partición {entrada['Values']} en {tabla}: {errores}")
+        if not respuesta.get('Errors'):
+            creadas.append(identificador)
+        _registradas.add(identificador)
+    return creadas
+
+
+def propiedades_proyeccion(bucket=BUCKET, anio_inicial=2025, anio_final=2035):
+    """
+    Parámetros de tabla para la proyección de particiones de Athena.
+
+    Con ellos el motor calcula las particiones a partir de la consulta y no
+    consulta el catálogo, así que el costo no crece con la historia guardada.
+
+    Args:
+        bucket (str): Bucket de datos.
+        anio_inicial (int): Primer año con datos.
+        anio_final (int): Último año proyectado.
+    Returns:
+        dict: Parámetros para la tabla (TBLPROPERTIES / Parameters de Glue).
+    """
+    return {
+        'projection.enabled': 'true',
+        'projection.periodico.type': 'enum',
+        'projection.periodico.values': ','.join(spec['nombre'] for spec in PERIODICOS),
+        'projection.year.type': 'integer',
+        'projection.year.range': f'{anio_inicial},{anio_final}',
+        'projection.month.type': 'integer',
+        'projection.month.range': '1,12',
+        'projection.month.digits': '2',
+        'projection.day.type': 'integer',
+        'projection.day.range': '1,31',
+        'projection.day.digits': '2',
+        'storage.location.template': (
+            f's3://{bucket}/final/periodico=${{periodico}}/year=${{year}}/month=${{month}}/day=${{day}}/'
+        ),
+    }
+
+
+def ddl_tabla(bucket=BUCKET, formato='csv', campos=COLUMNAS):
+    """CREATE EXTERNAL TABLE de final/ con las propiedades de proyección."""
+    hive = FORMATOS_HIVE[formato]
+    columnas = ',\n  '.join(f'`{campo}` string' for campo in campos)
+    propiedades = dict(propiedades_proyeccion(bucket))
+    if formato == 'csv':
+        propiedades['skip.header.line.count'] = '1'
+    serde = hive['SerdeInfo']
+    parametros_serde = ''
+    if serde['Parameters']:
+        parametros_serde = 'WITH SERDEPROPERTIES (\n  ' + ',\n  '.join(
+            f"'{k}'='{v}'" for k, v in serde['Parameters'].items()
+        ) + '\n)\n'
+    tblproperties = ',\n  '.join(f"'{k}'='{v}'" for k, v in propiedades.items())
+    return (
+        f"CREATE EXTERNAL TABLE IF NOT EXISTS `{BASE_DATOS}`.`{TABLAS[formato]}` (\n  {columnas}\n)\n"
+        f"PARTITIONED BY (`periodico` string, `year` string, `month` string, `day` string)\n"
+        f"ROW FORMAT SERDE '{serde['SerializationLibrary']}'\n"
+        f"{parametros_serde}"
+        f"STORED AS INPUTFORMAT '{hive['InputFormat']}'\n"
+        f"OUTPUTFORMAT '{hive['OutputFormat']}'\n"
+        f"LOCATION 's3://{bucket}/final/'\n"
+        f"TBLPROPERTIES (\n  {tblproperties}\n)"
+    )
+
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'proyeccion'
+    bucket = sys.argv[2] if len(sys.argv) > 2 else BUCKET
+    if comando == 'ddl':
+        print(ddl_tabla(bucket))
+    else:
+        print(json.dumps(propiedades_proyeccion(bucket), indent=2))
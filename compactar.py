@@ -0,0 +1,183 @@
+"""
+Compactación de final/ cuando PARTICION_SALIDA=hora.
+
+Cada snapshot deja su propio archivo en day=DD/hour=HH/<corrida>.<ext>. Al
+cerrar el día, la compactación junta esos archivos (y el titulares.<ext> de una
+compactación anterior, si lo hay) en day=DD/titulares.<ext>, sin filas
+repetidas y ordenado, y borra los de hour=. Las consultas leen así un archivo
+por partición en lugar de uno por snapshot.
+
+Las particiones que la agregación incremental todavía no procesó (entradas del
+manifiesto posteriores a la marca de agua, ver manifiesto.py) se saltan y se
+compactan en una corrida siguiente, ya procesadas.
+
+Uso:
+    python compactar.py                          # los últimos COMPACTACION_DIAS días cerrados
+    python compactar.py --fecha 2025-05-28 --periodico eltiempo --local /tmp/s3
+
+En AWS corre como compactar.app con la programación de zappa_settings.json (dev2).
+"""
+import argparse
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from almacen import AlmacenLocal, crear_cliente, listar_claves
+from manifiesto import sin_procesar
+from metricas import contar, instrumentar
+from perfilado import perfilar
+from periodicos import PERIODICOS
+
+BUCKET = 'parcialfinal2025'
+
+# Días cerrados (anteriores a hoy, UTC) que revisa cada corrida programada; un
+# snapshot atrasado de esos días se junta en la siguiente corrida
+DIAS_COMPACTACION = int(os.environ.get('COMPACTACION_DIAS', '3'))
+
+TIPOS_CONTENIDO = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+# El almacenamiento (S3 o local) se elige con ALMACEN, ver almacen.py
+s3 = None
+
+
+def cliente_s3():
+    global s3
+    if s3 is None:
+        s3 = crear_cliente()
+    return s3
+
+
+def dias_cerrados(hoy, dias=DIAS_COMPACTACION):
+    """Los `dias` días anteriores a hoy, del más reciente al más antiguo."""
+    return [hoy - timedelta(days=n) for n in range(1, dias + 1)]
+
+
+def prefijo_particion(periodico, dia):
+    return f'final/periodico={periodico}/year={dia.year}/month={dia.month:02d}/day={dia.day:02d}/'
+
+
+def leer_filas(datos, formato, campos):
+    """
+    Filas de un archivo de titulares como tuplas en el orden de campos.
+
+    El Parquet se lee por posición: los archivos escritos antes de las columnas
+    comunes (catalogo.COLUMNAS) tienen los nombres del periódico.
+
+    Args:
+        datos (bytes): Contenido del archivo.
+        formato (str): 'csv' o 'parquet'.
+        campos (tuple): Columnas del periódico.
+    Returns:
+        list[tuple]: Una tupla por titular.
+    """
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        tabla = pq.read_table(io.BytesIO(datos))
+        return list(zip(*(tabla.column(i).to_pylist() for i in range(len(campos)))))
+    filas = csv.DictReader(io.StringIO(datos.decode('utf-8')))
+    return [tuple(fila[campo] for campo in campos) for fila in filas]
+
+
+def compactar_particion(s3, bucket, prefijo, campos):
+    """
+    Junta los archivos por snapshot de una partición en uno por formato.
+
+    El archivo compactado se escribe antes de borrar los de hour=, así que si
+    algo falla a mitad de camino se repiten filas (que la siguiente
+    compactación elimina) pero no se pierde ninguna.
+
+    Args:
+        s3: Cliente de almacenamiento (ver almacen.crear_cliente).
+        bucket (str): Bucket de datos.
+        prefijo (str): Partición, ver prefijo_particion.
+        campos (tuple): Columnas del periódico (ver periodicos.PERIODICOS).
+    Returns:
+        list[str]: Archivos compactados escritos.
+    """
+    from proyecto1 import titulares_a_csv, titulares_a_parquet
+
+    claves = set(listar_claves(s3, bucket, prefijo))
+    escritos = []
+    for formato, tipo in TIPOS_CONTENIDO.items():
+        horarios = sorted(key for key in claves if '/hour=' in key and key.endswith(f'.{formato}'))
+        if not horarios:
+            continue
+        destino = f'{prefijo}titulares.{formato}'
+        fuentes = ([destino] if destino in claves else []) + horarios
+
+        filas = set()
+        for key in fuentes:
+            filas.update(leer_filas(s3.get_object(Bucket=bucket, Key=key)['Body'].read(), formato, campos))
+        data = [dict(zip(campos, fila)) for fila in sorted(filas, key=lambda f: tuple(v or '' for v in f))]
+
+        cuerpo = titulares_a_csv(data) if formato == 'csv' else titulares_a_parquet(data, campos)
+        s3.put_object(Bucket=bucket, Key=destino, Body=cuerpo, ContentType=tipo)
+        for key in horarios:
+            s3.delete_object(Bucket=bucket, Key=key)
+        print(f'{destino}: {len(horarios)} archivos por snapshot, {len(data)} titulares.')
+        escritos.append(destino)
+    return escritos
+
+
+def compactar(s3, bucket, dias, periodicos=None):
+    """
+    Compacta las particiones de los días y periódicos dados.
+
+    Salta las que tienen entradas del manifiesto sin procesar (ver
+    manifiesto.sin_procesar); esas se compactan cuando la marca de agua las pase.
+
+    Args:
+        s3: Cliente de almacenamiento.
+        bucket (str): Bucket de datos.
+        dias (list[date]): Días a compactar.
+        periodicos (iterable[str]): Periódicos; todos los registrados si es None.
+    Returns:
+        list[str]: Archivos compactados escritos.
+    """
+    escritos = []
+    pendientes = sin_procesar(s3, bucket) or set()
+    for spec in PERIODICOS:
+        if periodicos and spec['nombre'] not in periodicos:
+            continue
+        for dia in dias:
+            if (spec['nombre'], dia.isoformat()) in pendientes:
+                print(f"{prefijo_particion(spec['nombre'], dia)}: sin procesar por la agregación, se compacta después.")
+                continue
+            escritos += compactar_particion(s3, bucket, prefijo_particion(spec['nombre'], dia), spec['campos'])
+    return escritos
+
+
+@perfilar
+@instrumentar
+def app(event, context):
+    event = event or {}
+    dias = [date.fromisoformat(fecha) for fecha in event.get('fechas') or []]
+    dias = dias or dias_cerrados(datetime.now(timezone.utc).date())
+    escritos = compactar(cliente_s3(), BUCKET, dias, event.get('periodicos'))
+    contar('particiones_compactadas', len(escritos))
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'compactados': escritos})
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compacta los archivos por snapshot de final/ en uno por día.')
+    parser.add_argument('--fecha', action='append', type=date.fromisoformat,
+                        help='Día a compactar (AAAA-MM-DD, se puede repetir); por defecto los últimos días cerrados')
+    parser.add_argument('--periodico', action='append', choices=[spec['nombre'] for spec in PERIODICOS],
+                        help='Periódico a incluir (se puede repetir); por defecto todos')
+    parser.add_argument('--bucket', default=BUCKET)
+    parser.add_argument('--local', metavar='DIRECTORIO', help='Usa AlmacenLocal en lugar de S3')
+    args = parser.parse_args(argv)
+
+    s3 = AlmacenLocal(args.local) if args.local else cliente_s3()
+    dias = args.fecha or dias_cerrados(datetime.now(timezone.utc).date())
+    escritos = compactar(s3, args.bucket, dias, args.periodico)
+    print(f'Particiones compactadas: {len(escritos)}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Corpus sintético de portadas de El Tiempo y Publimetro para pruebas de carga y escalado.
+
+Las páginas imitan la estructura que recorren los extractores (ver
+periodicos.PERIODICOS): en Publimetro article.b-top-table-list-xl con su
+span.c-overline, la lista b-card-list, article.b-top-table-list-small y los
+bloques b-results-list con su imagen oculta; en El Tiempo tarjetas con
+h2/h3, listas 'news', titulares en contenedores '*headline*' y bloques
+JSON-LD NewsArticle. Alrededor va el ruido de una portada real: menú,
+pie, recursos estáticos, scripts y estilos en línea, imágenes con srcset y
+espacios publicitarios.
+
+Todo sale de random.Random con una semilla de texto, así que la misma semilla
+produce exactamente los mismos bytes en cualquier máquina y versión de Python.
+Cada periódico tiene una lista infinita de artículos (el artículo n es siempre
+el mismo) y cada snapshot muestra una ventana de ella que avanza con el tiempo:
+dos snapshots seguidos comparten la fracción `permanencia` de sus artículos,
+como una portada que rota.
+
+Uso:
+    python corpus.py --directorio /tmp/s3 --dias 3 --snapshots 4 --escala 10
+    python reprocesar.py --local /tmp/s3
+"""
+import argparse
+import gzip
+import json
+import random
+from datetime import date, timedelta
+
+BUCKET = 'parcialfinal2025'
+
+# Artículos por portada en escala 1 (una portada real ronda este tamaño)
+ARTICULOS_POR_ESCALA = 40
+PERMANENCIA = 0.75
+
+SECCIONES_EL_TIEMPO = {
+    'deportes': ['futbol-colombiano', 'futbol-internacional', 'ciclismo', 'tenis'],
+    'politica': ['congreso', 'gobierno', 'partidos-politicos'],
+    'economia': ['empresas', 'finanzas-personales', 'sector-financiero'],
+    'colombia': ['medellin', 'cali', 'barranquilla', 'otras-ciudades'],
+    'bogota': ['movilidad', 'seguridad'],
+    'mundo': ['latinoamerica', 'eeuu-y-canada', 'europa'],
+    'cultura': ['musica-y-libros', 'cine-y-tv', 'gente'],
+    'tecnosfera': ['novedades-tecnologia', 'apps'],
+    'salud': ['nutricion', 'medicina'],
+}
+SECCIONES_PUBLIMETRO = ['Noticias', 'Deportes', 'Entretenimiento', 'Barranquilla', 'Tendencias', 'Estilo de vida']
+
+SUJETOS = ['El Gobierno', 'La Alcaldía', 'El Congreso', 'La selección Colombia', 'Un estudio', 'La Fiscalía',
+           'El Banco de la República', 'Los hinchas', 'La Registraduría', 'El Ministerio de Salud',
+           'Un grupo de científicos', 'La Policía', 'El técnico', 'La cantante', 'El Metro']
+VERBOS = ['anuncia', 'confirma', 'rechaza', 'revela', 'aprueba', 'investiga', 'presenta', 'advierte sobre',
+          'celebra', 'suspende', 'propone', 'responde a las críticas por']
+OBJETOS = ['la reforma tributaria', 'el nuevo horario de pico y placa', 'la convocatoria para el Mundial',
+           'un aumento en las tarifas de energía', 'el cierre de la vía al Llano', 'su nuevo álbum',
+           'el plan de vacunación', 'la alerta por lluvias', 'los resultados de las pruebas Saber',
+           'la compra de nuevos buses eléctricos', 'el regreso del festival', 'la caída del dólar',
+           'una red de contrabando', 'el fichaje más caro del año', 'la llegada del fenómeno de La Niña']
+COMPLEMENTOS = ['', '', 'en Bogotá', 'este fin de semana', 'tras la polémica', 'según expertos',
+                'por segunda vez', 'antes de las elecciones', 'en el Caribe', '| Lo que debe saber']
+
+
+def _azar(*partes):
+    """Generador con semilla de texto: estable entre máquinas y ejecuciones."""
+    return random.Random('-'.join(str(parte) for parte in partes))
+
+
+def _slug(texto):
+    tabla = str.maketrans('áéíóúñü', 'aeiounu')
+    palabras = ''.join(c if c.isalnum() else ' ' for c in texto.lower().translate(tabla)).split()
+    return '-'.join(palabras[:10])
+
+
+def articulo(periodico, n, semilla=0):
+    """
+    El artículo n del periódico; siempre el mismo para la misma semilla.
+
+    Returns:
+        dict: 'seccion', 'titulo', 'ruta' (relativa), 'resumen' e 'id'.
+    """
+    azar = _azar(semilla, periodico, 'articulo', n)
+    titulo = ' '.join(filter(None, [azar.choice(SUJETOS), azar.choice(VERBOS), azar.choice(OBJETOS),
+                                     azar.choice(COMPLEMENTOS)]))
+    identificador = 100000 + n
+    if periodico == 'eltiempo':
+        seccion = azar.choice(sorted(SECCIONES_EL_TIEMPO))
+        subseccion = azar.choice(SECCIONES_EL_TIEMPO[seccion])
+        ruta = f'/{seccion}/{subseccion}/{_slug(titulo)}-{identificador}'
+    else:
+        seccion = azar.choice(SECCIONES_PUBLIMETRO)
+        dia = date(2025, 1, 1) + timedelta(days=n // 50)
+        ruta = f'/{_slug(seccion)}/{dia:%Y/%m/%d}/{_slug(titulo)}-{identificador}/'
+    resumen = f'{azar.choice(SUJETOS)} {azar.choice(VERBOS)} {azar.choice(OBJETOS)}.'
+    return {'seccion': seccion, 'titulo': titulo, 'ruta': ruta, 'resumen': resumen, 'id': identificador}
+
+
+def articulos_en_portada(periodico, escala=1, snapshot=0, semilla=0, permanencia=PERMANENCIA):
+    """
+    Artículos visibles en el snapshot número `snapshot`.
+
+    La ventana avanza (1 - permanencia) de su tamaño por snapshot, así que dos
+    snapshots seguidos comparten `permanencia` de sus artículos.
+    """
+    cantidad = ARTICULOS_POR_ESCALA * escala
+    avance = max(1, round(cantidad * (1 - permanencia)))
+    inicio = snapshot * avance
+    return [articulo(periodico, n, semilla) for n in range(inicio, inicio + cantidad)]
+
+
+def _ruido_cabecera(azar, sitio, escala):
+    """Recursos estáticos, estilos y configuración en línea de la cabecera."""
+    precargas = ''.join(
+        f'<link rel="preload" as="script" href="/pf/dist/components/combinations/default.js?d={azar.randint(100, 999)}&amp;c={i}"/>'
+        for i in range(6)
+    )
+    estilos = ''.join(
+        f'.c-{azar.choice(["card", "grid", "heading", "link", "nav"])}--{i}{{margin:{i % 7}px;color:#{azar.randrange(16 ** 6):06x}}}'
+        for i in range(60 * escala)
+    )
+    configuracion = json.dumps({
+        'sitio': sitio,
+        'despliegue': azar.randint(1000, 9999),
+        'contenido': [{'id': azar.randrange(10 ** 9), 'tipo': 'story', 'peso': azar.random()} for _ in range(30 * escala)],
+    })
+    return (
+        f'<meta charset="utf-8"/><meta name="viewport" content="width=device-width, initial-scale=1"/>'
+        f'<link rel="stylesheet" href="/css/main.css"/>{precargas}'
+        f'<style>{estilos}</style>'
+        f'<script type="application/javascript">window.Fusion=window.Fusion||{{}};Fusion.globalContent={configuracion};</script>'
+        f'<script async src="https://securepubads.g.doubleclick.net/tag/js/gpt.js"></script>'
+    )
+
+
+def _imagen(azar, ruta):
+    base = f'/resizer/{azar.randrange(16 ** 8):08x}{ruta.rstrip("/").rsplit("/", 1)[-1][:20]}'
+    return (
+        f'<picture><source srcset="{base}-420.webp 420w, {base}-840.webp 840w" type="image/webp"/>'
+        f'<img src="{base}-420.jpg" alt="" loading="lazy" width="420" height="280"/></picture>'
+    )
+
+
+def _anuncio(azar, i):
+    return (f'<div class="ad-slot" id="div-gpt-ad-{azar.randrange(10 ** 12)}-{i}" data-size="300x250">'
+            f'<script>googletag.cmd.push(function(){{googletag.display("div-gpt-ad-{i}")}});</script></div>')
+
+
+def _svg():
+    return ('<svg class="c-icon" viewBox="0 0 24 24" aria-hidden="true"><path d="M12 2L2 7l10 5 10-5-10-5zm0 '
+            '13l-10-5v6l10 5 10-5v-6l-10 5z"/></svg>')
+
+
+def portada_el_tiempo(escala=1, snapshot=0, semilla=0, permanencia=PERMANENCIA):
+    """
+    Portada sintética de El Tiempo.
+
+    Args:
+        escala (int): Múltiplo del tamaño de una portada (ARTICULOS_POR_ESCALA artículos).
+        snapshot (int): Número de snapshot; define qué artículos están en portada.
+        semilla: Semilla del corpus.
+        permanencia (float): Fracción de artículos compartida con el snapshot anterior.
+    Returns:
+        str: HTML de la página.
+    """
+    azar = _azar(semilla, 'eltiempo', 'pagina', escala, snapshot)
+    articulos = articulos_en_portada('eltiempo', escala, snapshot, semilla, permanencia)
+    menu = ''.join(f'<li><a href="/{s}">{s.title()}</a></li>' for s in sorted(SECCIONES_EL_TIEMPO))
+    bloques = []
+    for i, art in enumerate(articulos):
+        plantilla = i % 4
+        if plantilla == 0:
+            bloques.append(
+                f'<article class="c-article c-article--{azar.choice(["big", "medium"])}" data-id="{art["id"]}">'
+                f'<a href="{art["ruta"]}">{_imagen(azar, art["ruta"])}</a>'
+                f'<h2 class="c-article__title"><a href="{art["ruta"]}">{art["titulo"]}</a></h2>'
+                f'<p class="c-article__epigraph">{art["resumen"]}</p>'
+                f'<a class="c-article__gallery" href="/images/{art["seccion"]}/galeria-{art["id"]}">{_svg()}</a>'
+                f'</article>'
+            )
+        elif plantilla == 1:
+            bloques.append(
+                f'<div class="news-list"><a href="{art["ruta"]}">{art["titulo"]}</a>'
+                f'<a href="{art["ruta"]}#comentarios">Ver</a>'
+                f'<a href="https://patrocinado.example.com/{art["id"]}">Contenido patrocinado de nuestros aliados</a></div>'
+            )
+        elif plantilla == 2:
+            bloques.append(
+                f'<div class="headline-card"><span class="kicker">{art["seccion"].upper()}</span>'
+                f'<h3><a href="{art["ruta"]}?utm_source=portada&amp;utm_medium=home">{art["titulo"]}</a></h3></div>'
+            )
+        else:
+            bloques.append(
+                f'<div class="c-card"><div class="c-card__title"><a href="{art["ruta"]}">{art["titulo"]}</a></div>'
+                f'{_svg()}</div>'
+            )
+        if i % 10 == 9:
+            bloques.append(_anuncio(azar, i))
+    jsonld = json.dumps([
+        {'@context': 'https://schema.org', '@type': 'NewsArticle', 'headline': art['titulo'],
+         'mainEntityOfPage': {'@type': 'WebPage', '@id': f'https://www.eltiempo.com{art["ruta"]}'},
+         'datePublished': f'2025-05-28T{azar.randint(0, 23):02d}:{azar.randint(0, 59):02d}:00-05:00'}
+        for art in articulos[::3]
+    ], ensure_ascii=False)
+    return (
+        f'<!DOCTYPE html><html lang="es"><head><title>EL TIEMPO | Noticias de Colombia y el Mundo</title>'
+        f'{_ruido_cabecera(azar, "eltiempo", escala)}'
+        f'<script type="application/ld+json">{jsonld}</script></head>'
+        f'<body><header><nav class="main-menu"><ul>{menu}</ul></nav>{_svg()}</header>'
+        f'<main>{"".join(bloques)}</main>'
+        f'<footer><a href="/contactenos">Contáctenos</a><a href="/legal/terminos">Términos</a>'
+        f'<a href="https://www.facebook.com/eltiempo">Facebook</a></footer>'
+        f'<script src="/js/app.js" defer></script></body></html>'
+    )
+
+
+def portada_publimetro(escala=1, snapshot=0, semilla=0, permanencia=PERMANENCIA):
+    """
+    Portada sintética de Publimetro (mismos argumentos que portada_el_tiempo).
+
+    Como en la portada real solo las notas destacadas llevan span.c-overline;
+    el menú y los listados de resultados no.
+    """
+    azar = _azar(semilla, 'publimetro', 'pagina', escala, snapshot)
+    articulos = articulos_en_portada('publimetro', escala, snapshot, semilla, permanencia)
+    menu = ''.join(
+        f'<li class="c-nav__item"><a class="c-link" href="/{_slug(s)}/">{s}</a></li>' for s in SECCIONES_PUBLIMETRO
+    )
+    # Reparto de la portada: destacadas, bloque de entretenimiento, lista pequeña y resultados
+    n = len(articulos)
+    destacadas = articulos[:n // 4]
+    tarjetas = articulos[n // 4:n // 4 + 5]
+    pequenas = articulos[n // 4 + 5:n // 2]
+    resultados = articulos[n // 2:]
+
+    bloques = []
+    for i, art in enumerate(destacadas):
+        bloques.append(
+            f'<article class="b-top-table-list-xl"><figure>{_imagen(azar, art["ruta"])}</figure>'
+            f'<span class="c-overline">{art["seccion"]}</span>'
+            f'<h2 class="c-heading"><a class="c-link" href="{art["ruta"]}">{art["titulo"]}</a></h2>'
+            f'<p class="c-paragraph">{art["resumen"]}</p></article>'
+        )
+        if i % 5 == 4:
+            bloques.append(_anuncio(azar, i))
+    if tarjetas:
+        principal, secundarias = tarjetas[0], tarjetas[1:]
+        bloques.append(
+            '<div class="b-card-list"><h2 class="b-card-list__title">Para entretenerse</h2>'
+            f'<article class="b-card-list__main-item"><span class="c-overline">{principal["seccion"]}</span>'
+            f'{_imagen(azar, principal["ruta"])}'
+            f'<h3 class="c-heading"><a class="c-link" href="{principal["ruta"]}">{principal["titulo"]}</a></h3></article>'
+            + ''.join(
+                f'<article class="b-card-list__secondary-item"><span class="c-overline">{art["seccion"]}</span>'
+                f'<h3 class="c-heading"><a class="c-link" href="{art["ruta"]}">{art["titulo"]}</a></h3></article>'
+                for art in secundarias
+            )
+            + '</div>'
+        )
+    for art in pequenas:
+        bloques.append(
+            f'<article class="b-top-table-list-small">'
+            f'<h2 class="c-heading"><a class="c-link" href="{art["ruta"]}">{art["titulo"]}</a></h2></article>'
+        )
+    for inicio in range(0, len(resultados), 4):
+        grupo = resultados[inicio:inicio + 4]
+        bloques.append(
+            '<div class="b-results-list">' + ''.join(
+                f'<div class="c-card"><a class="c-link" aria-hidden="true" tabindex="-1" href="{art["ruta"]}">'
+                f'{_imagen(azar, art["ruta"])}</a>'
+                f'<h3 class="c-heading"><a class="c-link" href="{art["ruta"]}">{art["titulo"]}</a></h3>'
+                f'<time datetime="2025-05-28">hace {azar.randint(1, 59)} minutos</time></div>'
+                for art in grupo
+            ) + '</div>'
+        )
+    return (
+        f'<!DOCTYPE html><html lang="es"><head><title>Publimetro Colombia</title>'
+        f'{_ruido_cabecera(azar, "publimetro", escala)}</head>'
+        f'<body><header><nav class="c-nav"><ul>{menu}</ul></nav>{_svg()}</header>'
+        f'<main>{"".join(bloques)}</main>'
+        f'<footer><a class="c-link" href="https://www.metroworldnews.com">Metro World News</a>'
+        f'<a href="/terminos/">Términos y condiciones</a></footer></body></html>'
+    )
+
+
+PORTADAS = {'eltiempo': portada_el_tiempo, 'publimetro': portada_publimetro}
+
+
+def snapshots(dias=1, por_dia=4, escala=1, semilla=0, desde=date(2025, 5, 28), permanencia=PERMANENCIA):
+    """
+    Snapshots del corpus en el orden en que los subiría el scraper.
+
+    Los snapshots de un día se reparten en horas fijas desde las 06:00; el
+    número de snapshot sigue corriendo entre días, así que la portada rota
+    también de un día al siguiente.
+
+    Returns:
+        generator[tuple]: (clave en raw/, HTML).
+    """
+    paso = max(1, 18 // por_dia)
+    for d in range(dias):
+        dia = desde + timedelta(days=d)
+        for s in range(por_dia):
+            numero = d * por_dia + s
+            hora = f'{6 + s * paso:02d}-{(numero * 7) % 60:02d}'
+            for periodico, portada in PORTADAS.items():
+                yield f'raw/contenido-{periodico}-{dia.isoformat()}-{hora}.html', portada(escala, numero, semilla, permanencia)
+
+
+def escribir(s3, bucket, claves_y_paginas, comprimir=False):
+    """
+    Sube los snapshots a raw/ como lo hace el scraper (gzip opcional, ver proyecto.COMPRESION_RAW).
+
+    Returns:
+        list[str]: Claves escritas.
+    """
+    escritas = []
+    for key, html in claves_y_paginas:
+        cuerpo = html.encode('utf-8')
+        opciones = {'ContentType': 'text/html'}
+        if comprimir:
+            cuerpo = gzip.compress(cuerpo, mtime=0)
+            opciones['ContentEncoding'] = 'gzip'
+        s3.put_object(Bucket=bucket, Key=key, Body=cuerpo, **opciones)
+        escritas.append(key)
+    return escritas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera un corpus sintético de portadas en raw/.')
+    parser.add_argument('--directorio', default='almacen_local', help='Raíz de AlmacenLocal')
+    parser.add_argument('--bucket', default=BUCKET)
+    parser.add_argument('--dias', type=int, default=1)
+    parser.add_argument('--snapshots', type=int, default=4, help='Snapshots por día y periódico')
+    parser.add_argument('--escala', type=int, default=1, help=f'Múltiplo de {ARTICULOS_POR_ESCALA} artículos por portada')
+    parser.add_argument('--semilla', default='0')
+    parser.add_argument('--desde', type=date.fromisoformat, default=date(2025, 5, 28))
+    parser.add_argument('--permanencia', type=float, default=PERMANENCIA)
+    parser.add_argument('--gzip', action='store_true', help='Sube con Content-Encoding: gzip')
+    args = parser.parse_args(argv)
+
+    from almacen import AlmacenLocal
+
+    paginas = snapshots(args.dias, args.snapshots, args.escala, args.semilla, args.desde, args.permanencia)
+    escritas = escribir(AlmacenLocal(args.directorio), args.bucket, paginas, args.gzip)
+    print(f'{len(escritas)} snapshots escritos en {args.directorio}/{args.bucket}/raw/')
+
+
+if __name__ == "__main__":
+    main()
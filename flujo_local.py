@@ -0,0 +1,86 @@
+"""
+Corre el flujo scrape -> extracción -> partición contra un directorio local.
+
+Uso:
+    python flujo_local.py --directorio /tmp/s3
+    python flujo_local.py --directorio /tmp/s3 --sin-descarga
+
+Usa ALMACEN=local, así que proyecto.app y proyecto1.app escriben en el
+directorio en lugar de S3; cada HTML nuevo de raw/ se entrega a proyecto1.app
+con el mismo evento que mandaría S3. Con --sin-descarga no se descargan las
+portadas y se procesan los HTML que ya estén en raw/ (p. ej. copiados de S3).
+"""
+import argparse
+import os
+import time
+
+BUCKET = 'parcialfinal2025'
+
+
+def evento_s3(bucket, key):
+    """Evento ObjectCreated con la forma que reciben los handlers."""
+    return {'Records': [{'s3': {'bucket': {'name': bucket}, 'object': {'key': key}}}]}
+
+
+def correr(bucket=BUCKET, descargar=True):
+    """
+    Ejecuta el flujo completo y devuelve el tiempo de cada etapa.
+
+    Args:
+        bucket (str): Bucket (subdirectorio de ALMACEN_DIRECTORIO).
+        descargar (bool): Si es False se procesan los HTML que ya están en raw/.
+    Returns:
+        dict: Claves procesadas, salidas, marcas de corrida y segundos por etapa.
+    """
+    import proyecto
+    import proyecto1
+    from almacen import crear_cliente, listar_claves
+    from senales import es_marca_completo
+
+    s3 = crear_cliente()
+    resultado = {'raw': [], 'salidas': [], 'marcas': [], 'segundos': {}}
+
+    inicio = time.perf_counter()
+    if descargar:
+        proyecto.BUCKET = bucket
+        resultado['raw'] = [key for key in proyecto.app({}, None) if key]
+    else:
+        resultado['raw'] = [key for key in listar_claves(s3, bucket, 'raw/') if key.endswith('.html')]
+    resultado['segundos']['descarga'] = time.perf_counter() - inicio
+
+    marcas_previas = {key for key in listar_claves(s3, bucket, 'control/corridas/') if es_marca_completo(key)}
+    inicio = time.perf_counter()
+    for key in resultado['raw']:
+        respuesta = proyecto1.app(evento_s3(bucket, key), None)
+        print(respuesta['body'])
+        resultado['salidas'].append(respuesta['body'])
+    resultado['segundos']['extraccion'] = time.perf_counter() - inicio
+
+    # proyecto2 iniciaría el crawler con cada marca nueva; aquí solo se reportan
+    resultado['marcas'] = sorted(
+        key for key in listar_claves(s3, bucket, 'control/corridas/')
+        if es_marca_completo(key) and key not in marcas_previas
+    )
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Corre el flujo completo contra un directorio local.')
+    parser.add_argument('--directorio', default='almacen_local', help='Raíz del almacenamiento local')
+    parser.add_argument('--bucket', default=BUCKET)
+    parser.add_argument('--sin-descarga', action='store_true', help='Procesa los HTML que ya están en raw/')
+    args = parser.parse_args(argv)
+
+    os.environ['ALMACEN'] = 'local'
+    os.environ['ALMACEN_DIRECTORIO'] = args.directorio
+    resultado = correr(args.bucket, descargar=not args.sin_descarga)
+
+    print(f"HTML procesados: {len(resultado['raw'])}")
+    for marca in resultado['marcas']:
+        print(f'Corrida completa: {marca}')
+    for etapa, segundos in resultado['segundos'].items():
+        print(f'{etapa}: {segundos:.2f} s')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Manifiesto de particiones escritas en final/ y marca de agua del procesamiento siguiente.
+
+proyecto1 deja una entrada por snapshot procesado en
+control/manifiesto/<día>/<hora UTC>-<periódico>.json con los objetos que
+escribió (clave y tamaño). Las claves ordenan por hora de escritura, así que
+proyecto3 lista solo las posteriores a la marca de agua (StartAfter), procesa
+esas particiones y avanza la marca: el costo de cada corrida depende de lo
+nuevo y no de toda la historia de final/.
+
+Si el trabajo va a EMR la marca no avanza al enviar los pasos: el rango queda
+en control/marca_agua_en_curso.json con los pasos, y la corrida siguiente lo
+confirma si todos terminaron bien o lo descarta si alguno falló, para que esas
+particiones se vuelvan a procesar.
+
+La compactación (compactar.py) no toca las particiones con entradas
+posteriores a la marca: así los archivos por snapshot que la agregación va a
+leer siguen en su lugar hasta que se procesan.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+from almacen import listar_objetos
+from catalogo import valores_particion
+
+PREFIJO_MANIFIESTO = 'control/manifiesto'
+CLAVE_MARCA_AGUA = 'control/marca_agua.json'
+CLAVE_EN_CURSO = 'control/marca_agua_en_curso.json'
+FORMATO_HORA = '%Y%m%dT%H%M%S%fZ'
+
+# Una entrada se escribe apenas después de tomar su hora; las de los últimos
+# MANIFIESTO_MARGEN segundos se dejan para la siguiente corrida para no saltarse
+# una que todavía se esté escribiendo con una hora anterior a la marca.
+MARGEN = float(os.environ.get('MANIFIESTO_MARGEN', '60'))
+
+
+def clave_entrada(ahora, periodico):
+    """
+    Clave de la entrada del manifiesto para una escritura.
+
+    Args:
+        ahora (float): Hora de la escritura en segundos (epoch).
+        periodico (str): Periódico procesado.
+    Returns:
+        str: control/manifiesto/AAAA-MM-DD/<hora>-<periódico>.json.
+    """
+    momento = datetime.fromtimestamp(ahora, tz=timezone.utc)
+    return f"{PREFIJO_MANIFIESTO}/{momento:%Y-%m-%d}/{momento.strftime(FORMATO_HORA)}-{periodico}.json"
+
+
+def hora_entrada(key):
+    """Hora (epoch) en que se escribió la entrada del manifiesto."""
+    nombre = key.rsplit('/', 1)[-1]
+    momento = datetime.strptime(nombre.split('-', 1)[0], FORMATO_HORA)
+    return momento.replace(tzinfo=timezone.utc).timestamp()
+
+
+def registrar(s3, bucket, periodico, objetos, ahora):
+    """
+    Agrega al manifiesto los objetos escritos en final/ por un snapshot.
+
+    Args:
+        s3: Cliente de almacenamiento (ver almacen.crear_cliente).
+        bucket (str): Bucket de datos.
+        periodico (str): Periódico procesado.
+        objetos (list[dict]): Objetos escritos, con 'Key' y 'Size'.
+        ahora (float): Hora de la escritura en segundos (epoch).
+    Returns:
+        str: Clave de la entrada escrita.
+    """
+    key = clave_entrada(ahora, periodico)
+    s3.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps({'periodico': periodico, 'objetos': objetos}).encode('utf-8'),
+        ContentType='application/json'
+    )
+    return key
+
+
+def _leer_json(s3, bucket, key, por_defecto):
+    try:
+        return json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return por_defecto
+        raise
+
+
+def leer_marca_agua(s3, bucket):
+    """
+    Última entrada del manifiesto ya procesada.
+
+    Returns:
+        dict: {'hasta': clave o '' si nunca se procesó nada, ...}.
+    """
+    return _leer_json(s3, bucket, CLAVE_MARCA_AGUA, {'hasta': ''})
+
+
+def particiones_entrada(s3, bucket, key):
+    """Particiones (periódico, 'AAAA-MM-DD') de los objetos de una entrada del manifiesto."""
+    contenido = json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+    particiones = set()
+    for obj in contenido['objetos']:
+        periodico, anio, mes, dia = valores_particion(obj['Key'])
+        particiones.add((periodico, f'{anio}-{mes}-{dia}'))
+    return particiones
+
+
+def sin_procesar(s3, bucket):
+    """
+    Particiones con entradas posteriores a la marca de agua, incluidas las recientes.
+
+    La compactación las deja para después de que la agregación las procese
+    (ver compactar.compactar).
+
+    Returns:
+        set | None: Pares (periódico, 'AAAA-MM-DD'), o None si nunca se
+        confirmó una marca de agua (nadie está procesando el manifiesto).
+    """
+    marca = _leer_json(s3, bucket, CLAVE_MARCA_AGUA, None)
+    if marca is None:
+        return None
+    particiones = set()
+    for entrada in listar_objetos(s3, bucket, f'{PREFIJO_MANIFIESTO}/', desde=marca['hasta']):
+        particiones |= particiones_entrada(s3, bucket, entrada['Key'])
+    return particiones
+
+
+def pendientes(s3, bucket, ahora):
+    """
+    Particiones del manifiesto con archivos nuevos desde la marca de agua.
+
+    Solo dice qué días hay que rehacer; la agregación lee los días completos
+    (ver proyecto3.objetos_entrada), no únicamente los archivos nuevos.
+
+    Args:
+        s3: Cliente de almacenamiento.
+        bucket (str): Bucket de datos.
+        ahora (float): Hora actual en segundos (epoch).
+    Returns:
+        dict: {'particiones': [(periódico, 'AAAA-MM-DD')], 'desde': marca actual,
+               'hasta': última entrada incluida}.
+    """
+    desde = leer_marca_agua(s3, bucket)['hasta']
+    hasta = desde
+    particiones = set()
+    for entrada in listar_objetos(s3, bucket, f'{PREFIJO_MANIFIESTO}/', desde=desde):
+        # Ordenadas por hora: desde la primera demasiado reciente, todas lo son
+        if hora_entrada(entrada['Key']) > ahora - MARGEN:
+            break
+        particiones |= particiones_entrada(s3, bucket, entrada['Key'])
+        hasta = entrada['Key']
+    return {
+        'particiones': sorted(particiones),
+        'desde': desde,
+        'hasta': hasta,
+    }
+
+
+def confirmar(s3, bucket, hasta, **detalle):
+    """
+    Avanza la marca de agua hasta la última entrada procesada.
+
+    Args:
+        s3: Cliente de almacenamiento.
+        bucket (str): Bucket de datos.
+        hasta (str): Clave de la última entrada incluida (ver pendientes).
+        **detalle: Datos extra para el registro, p. ej. jobFlowId.
+    """
+    s3.put_object(
+        Bucket=bucket,
+        Key=CLAVE_MARCA_AGUA,
+        Body=json.dumps({'hasta': hasta, **detalle}).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def leer_en_curso(s3, bucket):
+    """
+    Rango enviado a EMR que todavía no se confirmó.
+
+    Returns:
+        dict | None: {'hasta', 'jobFlowId', 'stepIds'} o None si no hay ninguno.
+    """
+    return _leer_json(s3, bucket, CLAVE_EN_CURSO, None)
+
+
+def registrar_en_curso(s3, bucket, hasta, job_flow_id, step_ids):
+    """Guarda el rango enviado a EMR y sus pasos; la marca avanza cuando terminan (ver confirmar)."""
+    s3.put_object(
+        Bucket=bucket,
+        Key=CLAVE_EN_CURSO,
+        Body=json.dumps({'hasta': hasta, 'jobFlowId': job_flow_id, 'stepIds': step_ids}).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def descartar_en_curso(s3, bucket):
+    s3.delete_object(Bucket=bucket, Key=CLAVE_EN_CURSO)
@@ -0,0 +1,173 @@
+"""
+Métricas por invocación de los handlers: tiempos por etapa, bytes, titulares y llamadas a APIs.
+
+Cada `app` va decorada con instrumentar(). Con METRICAS=emf, al terminar la
+invocación se imprime una sola línea JSON en el formato de métricas embebidas de
+CloudWatch (EMF): CloudWatch Logs la convierte en métricas del espacio
+METRICAS_ESPACIO con la dimensión Funcion (el módulo del handler), sin llamadas
+extra a la API. Con METRICAS=desactivado (por defecto) el handler corre tal cual.
+
+Dentro del handler las etapas se miden con medir('<etapa>_ms') y las cantidades
+con contar(); fuera de una invocación instrumentada (reprocesar.py, pruebas que
+llaman funciones sueltas) no hacen nada. Las llamadas a S3, Glue y EMR se
+cuentan solas en los clientes pasados por contar_llamadas() (AlmacenLocal cuenta
+las suyas). Los contadores aceptan hilos: las descargas concurrentes de proyecto
+suman su tiempo en la misma métrica.
+
+En pruebas, recolectar() junta los registros en una lista en lugar de imprimirlos.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# 'desactivado' (por defecto): no se mide ni se emite nada
+# 'emf': un registro EMF por invocación en stdout
+MODOS_METRICAS = ('desactivado', 'emf')
+
+ESPACIO = os.environ.get('METRICAS_ESPACIO', 'Noticias')
+
+# Métricas de la invocación en curso y listas de recolectar() activas
+_actual = None
+_recolectores = []
+
+
+def modo_configurado():
+    modo = os.environ.get('METRICAS', 'desactivado')
+    if modo not in MODOS_METRICAS:
+        raise ValueError(f"METRICAS no soportado: {modo}. Opciones: {', '.join(MODOS_METRICAS)}")
+    return modo
+
+
+class Metricas:
+    """Contadores, tiempos y propiedades de una invocación."""
+
+    def __init__(self, funcion):
+        self.funcion = funcion
+        self.valores = {}
+        self.unidades = {}
+        self.propiedades = {}
+        self._candado = threading.Lock()
+
+    def contar(self, nombre, valor=1, unidad='Count'):
+        with self._candado:
+            self.valores[nombre] = self.valores.get(nombre, 0) + valor
+            self.unidades[nombre] = unidad
+
+    @contextlib.contextmanager
+    def medir(self, nombre):
+        """Suma a `nombre` los milisegundos del bloque, aunque termine con una excepción."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.contar(nombre, (time.perf_counter() - inicio) * 1000, 'Milliseconds')
+
+    def registro(self, ahora):
+        """
+        Registro EMF de la invocación.
+
+        Args:
+            ahora (float): Hora de emisión en segundos (epoch).
+        Returns:
+            dict: Metadatos '_aws', la dimensión Funcion, las propiedades y un campo por métrica.
+        """
+        return {
+            '_aws': {
+                'Timestamp': int(ahora * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': ESPACIO,
+                    'Dimensions': [['Funcion']],
+                    'Metrics': [{'Name': nombre, 'Unit': unidad} for nombre, unidad in sorted(self.unidades.items())],
+                }],
+            },
+            'Funcion': self.funcion,
+            **self.propiedades,
+            **{nombre: round(valor, 3) for nombre, valor in sorted(self.valores.items())},
+        }
+
+
+def contar(nombre, valor=1, unidad='Count'):
+    if _actual is not None:
+        _actual.contar(nombre, valor, unidad)
+
+
+def medir(nombre):
+    """Context manager que mide el bloque en milisegundos dentro de la invocación en curso."""
+    if _actual is None:
+        return contextlib.nullcontext()
+    return _actual.medir(nombre)
+
+
+def propiedad(nombre, valor):
+    """Campo del registro que no es métrica (p. ej. la clave procesada), útil para buscar en los logs."""
+    if _actual is not None:
+        _actual.propiedades[nombre] = valor
+
+
+def contar_llamadas(cliente, servicio):
+    """
+    Cuenta en llamadas_<servicio> cada llamada a la API del cliente de boto3.
+
+    Usa el evento before-parameter-build de botocore, que se emite una vez por
+    llamada: cuenta cada página de un paginador pero no los reintentos internos.
+    Otros clientes se devuelven tal cual.
+
+    Returns:
+        El mismo cliente.
+    """
+    eventos = getattr(getattr(cliente, 'meta', None), 'events', None)
+    if eventos is not None:
+        eventos.register('before-parameter-build', lambda **_: contar(f'llamadas_{servicio}'))
+    return cliente
+
+
+def emitir(registro):
+    if _recolectores:
+        for lista in _recolectores:
+            lista.append(registro)
+        return
+    print(json.dumps(registro, ensure_ascii=False))
+
+
+@contextlib.contextmanager
+def recolectar():
+    """Junta en una lista los registros emitidos dentro del bloque, aun con METRICAS=desactivado."""
+    lista = []
+    _recolectores.append(lista)
+    try:
+        yield lista
+    finally:
+        _recolectores.remove(lista)
+
+
+def instrumentar(funcion):
+    """
+    Decora un handler para emitir un registro de métricas por invocación.
+
+    Siempre incluye duracion_ms; si el handler lanza una excepción se cuenta en
+    errores y la excepción sigue su camino.
+    """
+    nombre = funcion.__module__
+
+    @functools.wraps(funcion)
+    def handler(event, context):
+        global _actual
+        if not _recolectores and modo_configurado() == 'desactivado':
+            return funcion(event, context)
+
+        anterior = _actual
+        _actual = metricas = Metricas(nombre)
+        try:
+            with metricas.medir('duracion_ms'):
+                return funcion(event, context)
+        except Exception:
+            metricas.contar('errores')
+            raise
+        finally:
+            _actual = anterior
+            emitir(metricas.registro(time.time()))
+
+    return handler
@@ -0,0 +1,163 @@
+"""
+Perfilado opcional de los handlers con cProfile y tracemalloc.
+
+Cada `app` va decorada con perfilar(). Con PERFILADO=activado, cada invocación
+corre bajo cProfile y tracemalloc y deja dos objetos en
+PERFILADO_BUCKET/PERFILADO_PREFIJO/<módulo>/<hora>:
+    .prof  estadísticas de cProfile (formato de pstats, se abre con
+           `python -m pstats` o snakeviz)
+    .txt   resumen: evento, duración, pico de memoria, las funciones con más
+           tiempo acumulado y los PERFILADO_ASIGNACIONES sitios con más memoria
+           asignada que sigue viva al terminar
+
+La variable se lee al decorar (al importar el módulo del handler): con
+PERFILADO=desactivado (por defecto) perfilar() devuelve el handler sin
+envolver, así que no cuesta nada. Sirve para reproducir en producción una
+página que vuelve lento o pesado a proyecto1: se activa en el stage, se espera
+la invocación y se desactiva.
+
+El almacenamiento se elige con ALMACEN (ver almacen.py); si no se puede
+guardar el perfil se avisa en el log y la respuesta del handler no cambia.
+cProfile, pstats y tracemalloc solo se importan con el perfilado activo.
+"""
+import functools
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+# 'desactivado' (por defecto): el handler corre sin envolver
+# 'activado': cada invocación deja su perfil en el almacenamiento
+MODOS_PERFILADO = ('desactivado', 'activado')
+
+BUCKET = os.environ.get('PERFILADO_BUCKET', 'parcialfinal2025')
+PREFIJO_PERFILES = os.environ.get('PERFILADO_PREFIJO', 'control/perfiles')
+ASIGNACIONES = int(os.environ.get('PERFILADO_ASIGNACIONES', '25'))
+# Marcos de pila por asignación; más de 1 da contexto pero hace tracemalloc más lento
+MARCOS = int(os.environ.get('PERFILADO_MARCOS', '1'))
+FUNCIONES = 40
+
+# El almacenamiento (S3 o local) se elige con ALMACEN, ver almacen.py
+s3 = None
+
+
+def cliente_s3():
+    global s3
+    if s3 is None:
+        from almacen import crear_cliente
+        s3 = crear_cliente()
+    return s3
+
+
+def modo_configurado():
+    modo = os.environ.get('PERFILADO', 'desactivado')
+    if modo not in MODOS_PERFILADO:
+        raise ValueError(f"PERFILADO no soportado: {modo}. Opciones: {', '.join(MODOS_PERFILADO)}")
+    return modo
+
+
+def clave_perfil(modulo, ahora):
+    """Clave sin extensión del perfil de una invocación."""
+    return f"{PREFIJO_PERFILES}/{modulo}/{ahora:%Y%m%dT%H%M%S%fZ}"
+
+
+def resumen(event, duracion, pico, perfil, instantanea):
+    """
+    Resumen legible de una invocación perfilada.
+
+    Args:
+        event: Evento del handler.
+        duracion (float): Segundos de la invocación.
+        pico (int): Pico de memoria rastreada en bytes.
+        perfil (cProfile.Profile): Perfil ya detenido.
+        instantanea (tracemalloc.Snapshot): Memoria viva al terminar.
+    Returns:
+        str: Texto con el evento, las funciones más costosas y los sitios de asignación.
+    """
+    import pstats
+    import tracemalloc
+
+    salida = io.StringIO()
+    salida.write(f"Evento: {json.dumps(event, default=str, ensure_ascii=False)[:2000]}\n")
+    salida.write(f"Duración: {duracion * 1000:.1f} ms\n")
+    salida.write(f"Pico de memoria: {pico / 1024:.0f} KiB\n\n")
+
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(FUNCIONES)
+
+    salida.write(f"Sitios con más memoria asignada (top {ASIGNACIONES}):\n")
+    instantanea = instantanea.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    for estadistica in instantanea.statistics('traceback' if MARCOS > 1 else 'lineno')[:ASIGNACIONES]:
+        salida.write(f"{estadistica.size / 1024:10.1f} KiB {estadistica.count:8d} bloques\n")
+        for linea in estadistica.traceback.format():
+            salida.write(f"    {linea}\n")
+    return salida.getvalue()
+
+
+def guardar(modulo, ahora, event, duracion, pico, perfil, instantanea):
+    """
+    Sube el .prof y el .txt de una invocación.
+
+    Returns:
+        str: Clave base (sin extensión) de los objetos escritos.
+    """
+    import marshal
+
+    base = clave_perfil(modulo, ahora)
+    perfil.create_stats()
+    cliente_s3().put_object(
+        Bucket=BUCKET,
+        Key=f'{base}.prof',
+        Body=marshal.dumps(perfil.stats),
+        ContentType='application/octet-stream'
+    )
+    cliente_s3().put_object(
+        Bucket=BUCKET,
+        Key=f'{base}.txt',
+        Body=resumen(event, duracion, pico, perfil, instantanea).encode('utf-8'),
+        ContentType='text/plain'
+    )
+    return base
+
+
+def perfilar(funcion):
+    """
+    Decora un handler para perfilar cada invocación si PERFILADO=activado.
+
+    Si tracemalloc ya estaba activo (p. ej. en benchmark.py) se usa tal cual y
+    no se detiene al terminar. El perfil se guarda también si el handler lanza
+    una excepción, que sigue su camino.
+    """
+    if modo_configurado() == 'desactivado':
+        return funcion
+    import cProfile
+    import tracemalloc
+
+    nombre = funcion.__module__
+
+    @functools.wraps(funcion)
+    def handler(event, context):
+        propio = not tracemalloc.is_tracing()
+        if propio:
+            tracemalloc.start(MARCOS)
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            return perfil.runcall(funcion, event, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            instantanea = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+            if propio:
+                tracemalloc.stop()
+            try:
+                base = guardar(nombre, datetime.now(timezone.utc), event, duracion, pico, perfil, instantanea)
+                print(f"Perfil guardado en s3://{BUCKET}/{base}.prof")
+            except Exception as e:
+                print(f"No se pudo guardar el perfil de {nombre}: {e}")
+
+    return handler
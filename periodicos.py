@@ -0,0 +1,418 @@
+"""
+Registro declarativo de periódicos.
+
+Cada periódico se describe como datos en PERIODICOS:
+
+    nombre            Nombre usado en la partición periodico=...
+    patron_clave      Regex que identifica sus archivos en raw/.
+    url_base          Prefijo para completar enlaces relativos.
+    campos            Nombres de columna de (categoría, titular, enlace).
+    reglas_enlace     Dónde están los titulares, en orden de salida. Cada regla tiene:
+                        pasos: cadena de selectores simples desde el documento hasta
+                          el enlace; un paso es 'selector' (todas las coincidencias
+                          dentro del paso anterior) o ('selector', 'primero') (solo
+                          la primera, como find).
+                        ancestro: selector que debe cumplir algún ancestro del enlace.
+                        href_prefijo, min_segmentos, excluir, min_texto,
+                          omitir_ocultos: filtros sobre el enlace.
+                        elemento_categoria: índice del paso cuyo nodo define la
+                          categoría, o 'padre' para el padre del enlace.
+    reglas_categoria  'url' (primer segmento de la ruta) u 'overline' (span más
+                      cercano, con respaldo por patrones de URL).
+    jsonld            Tipos de schema.org a leer de los bloques JSON-LD, o None.
+    deduplicacion     Clave ('titulo' o 'titulo_normalizado'), longitud mínima y
+                      si antes se eliminan registros exactos repetidos.
+
+compilar() convierte una especificación en un ExtractorCompilado que recorre el
+DOM una sola vez evaluando todas sus reglas; extractor_para_clave() lo hace una
+vez por contenedor y lo reutiliza en las siguientes invocaciones.
+"""
+import json
+import re
+
+PERIODICOS = [
+    {
+        'nombre': 'eltiempo',
+        'patron_clave': r'eltiempo',
+        'url_base': 'https://www.eltiempo.com',
+        'campos': ('categoria', 'titulo', 'enlace'),
+        'reglas_enlace': [
+            # Enlaces generales, sin rutas de recursos estáticos
+            {'pasos': ['a[href]'], 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10,
+             'excluir': ['/images/', '/assets/', '/css/', '/js/', '.jpg', '.png', '.gif']},
+            # Contenedores típicos de noticias
+            {'pasos': ['a[href]'], 'ancestro': 'article', 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10},
+            {'pasos': ['a[href]'], 'ancestro': '.noticia', 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10},
+            {'pasos': ['a[href]'], 'ancestro': '.articulo', 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10},
+            {'pasos': ['a[href]'], 'ancestro': '[class*="headline"]', 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10},
+            {'pasos': ['a[href]'], 'ancestro': '[class*="title"]', 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10},
+            {'pasos': ['a[href]'], 'ancestro': '[class*="news"]', 'href_prefijo': '/', 'min_segmentos': 3, 'min_texto': 10},
+        ],
+        'reglas_categoria': {'fuente': 'url'},
+        'jsonld': ['NewsArticle', 'ReportageNewsArticle'],
+        'deduplicacion': {'registro_exacto': True, 'clave': 'titulo_normalizado', 'min_titulo': 15},
+    },
+    {
+        'nombre': 'publimetro',
+        'patron_clave': r'publimetro',
+        'url_base': 'https://www.publimetro.co',
+        'campos': ('categoria', 'titular', 'link'),
+        'reglas_enlace': [
+            # Noticias principales
+            {'pasos': ['article.b-top-table-list-xl', ('h2.c-heading', 'primero'), ('a.c-link', 'primero')],
+             'elemento_categoria': 0},
+            # Sección "Para entretenerse"
+            {'pasos': [('div.b-card-list', 'primero'), ('article.b-card-list__main-item', 'primero'),
+                       ('h3.c-heading', 'primero'), ('a.c-link', 'primero')],
+             'elemento_categoria': 1},
+            {'pasos': [('div.b-card-list', 'primero'), 'article.b-card-list__secondary-item',
+                       ('h3.c-heading', 'primero'), ('a.c-link', 'primero')],
+             'elemento_categoria': 1},
+            # Lista pequeña
+            {'pasos': ['article.b-top-table-list-small', ('h2.c-heading', 'primero'), ('a.c-link', 'primero')],
+             'elemento_categoria': 0},
+            # Resultados
+            {'pasos': ['div.b-results-list', 'a.c-link[href]'], 'omitir_ocultos': True, 'min_texto': 0,
+             'elemento_categoria': 'padre'},
+            # Búsqueda general
+            {'pasos': ['a.c-link[href]'], 'ancestro': 'h1, h2, h3, h4, h5, h6', 'href_prefijo': '/',
+             'omitir_ocultos': True, 'min_texto': 0, 'elemento_categoria': 'padre'},
+        ],
+        'reglas_categoria': {
+            'fuente': 'overline',
+            'selector': 'span.c-overline',
+            'respaldo': [('/deportes/', 'Deportes'), ('/entretenimiento/', 'Entretenimiento'),
+                         ('/noticias/', 'Noticias'), ('/barranquilla/', 'Barranquilla')],
+            'por_defecto': 'Sin categoría',
+        },
+        'jsonld': None,
+        'deduplicacion': {'registro_exacto': False, 'clave': 'titulo'},
+    },
+]
+
+_ATOMO = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<resto>(?:\.[\w-]+|\[[^\]]+\])*)$')
+_PARTE = re.compile(r'\.([\w-]+)|\[\s*([\w-]+)\s*(?:(\*?=)\s*"?([^"\]]*)"?)?\s*\]')
+
+_compilados = {}
+
+
+def _clases(tag):
+    clases = tag.get('class') or []
+    return clases.split() if isinstance(clases, str) else clases
+
+
+def _limpiar_texto(texto):
+    return re.sub(r'\s+', ' ', texto.strip()) if texto else ""
+
+
+class Selector:
+    """
+    Lista de selectores simples separados por comas: etiqueta, .clase, [attr],
+    [attr="valor"] y [attr*="valor"]. No admite combinadores; las relaciones
+    entre nodos se expresan con los pasos y el ancestro de cada regla.
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.alternativas = []
+        for parte in texto.split(','):
+            coincidencia = _ATOMO.match(parte.strip())
+            if not coincidencia:
+                raise ValueError(f"Selector no soportado: {parte.strip()!r}")
+            clases, atributos = [], []
+            for clase, atributo, operador, valor in _PARTE.findall(coincidencia.group('resto')):
+                if clase:
+                    clases.append(clase)
+                else:
+                    atributos.append((atributo, operador, valor))
+            self.alternativas.append((coincidencia.group('tag'), clases, atributos))
+
+    def coincide(self, tag, clases):
+        for nombre, requeridas, atributos in self.alternativas:
+            if nombre and tag.name != nombre:
+                continue
+            if any(clase not in clases for clase in requeridas):
+                continue
+            if all(self._atributo(tag, clases, *atributo) for atributo in atributos):
+                return True
+        return False
+
+    @staticmethod
+    def _atributo(tag, clases, atributo, operador, valor):
+        if atributo == 'class':
+            actual = ' '.join(clases) if tag.get('class') is not None else None
+        else:
+            actual = tag.get(atributo)
+        if actual is None:
+            return False
+        if operador == '=':
+            return actual == valor
+        if operador == '*=':
+            return valor in actual
+        return True
+
+
+class _Marco:
+    """Estado de una regla mientras el recorrido está dentro de su ámbito actual."""
+    __slots__ = ('regla', 'paso', 'ambito', 'nodos', 'orden', 'vivo')
+
+    def __init__(self, regla, paso, ambito, nodos, orden):
+        self.regla = regla
+        self.paso = paso
+        self.ambito = ambito
+        self.nodos = nodos
+        self.orden = orden
+        self.vivo = True
+
+
+class ExtractorCompilado:
+    """Extractor de un periódico que evalúa todas sus reglas en un solo recorrido del DOM."""
+
+    def __init__(self, spec):
+        self.nombre = spec['nombre']
+        self.patron_clave = re.compile(spec['patron_clave'])
+        self.url_base = spec['url_base']
+        self.campos = spec['campos']
+        self.jsonld = spec.get('jsonld')
+        self.deduplicacion = spec['deduplicacion']
+
+        categoria = spec['reglas_categoria']
+        self.fuente_categoria = categoria['fuente']
+        if self.fuente_categoria not in ('url', 'overline'):
+            raise ValueError(f"Fuente de categoría no soportada: {self.fuente_categoria}")
+        self.overline = Selector(categoria['selector']) if self.fuente_categoria == 'overline' else None
+        self.respaldo = categoria.get('respaldo', [])
+        self.por_defecto = categoria.get('por_defecto', 'General')
+
+        self.reglas = []
+        for regla in spec['reglas_enlace']:
+            pasos = []
+            for paso in regla['pasos']:
+                selector, modo = (paso, 'todos') if isinstance(paso, str) else paso
+                if modo not in ('todos', 'primero'):
+                    raise ValueError(f"Modo de paso no soportado: {modo}")
+                pasos.append((Selector(selector), modo))
+            compilada = dict(regla, pasos=pasos)
+            compilada['bit'] = 0
+            if 'ancestro' in regla:
+                compilada['ancestro'] = Selector(regla['ancestro'])
+                compilada['bit'] = 1 << len(self.reglas)
+            self.reglas.append(compilada)
+        self.reglas_ancestro = [r for r in self.reglas if r['bit']]
+
+    def extraer(self, soup):
+        """
+        Recorre el documento una vez y devuelve la lista de noticias.
+
+        Args:
+            soup (BeautifulSoup): Documento ya parseado.
+        Returns:
+            list[dict]: Noticias con las columnas de `campos`.
+        """
+        from bs4.element import Tag
+
+        candidatos = []
+        scripts = []
+        primero_overline = {}
+        padres = {}
+
+        marcos = [_Marco(i, 0, soup, (), ()) for i in range(len(self.reglas))]
+        por_ambito = {}
+        indice = 0
+
+        # Cada entrada es (nodo, máscara de ancestros, hijos); hijos None = entrada al nodo
+        pila = [(soup, 0, None)]
+        while pila:
+            nodo, mascara, hijos = pila.pop()
+
+            if hijos is not None:
+                # Salida: cerrar ámbitos y calcular el primer overline de los descendientes
+                for marco in por_ambito.pop(id(nodo), ()):
+                    if marco.ambito is nodo:
+                        marco.vivo = False
+                if self.overline is not None:
+                    encontrado = None
+                    for hijo in hijos:
+                        encontrado = hijo if self.overline.coincide(hijo, _clases(hijo)) else primero_overline[id(hijo)]
+                        if encontrado is not None:
+                            break
+                    primero_overline[id(nodo)] = encontrado
+                continue
+
+            clases = _clases(nodo)
+            for marco in [m for m in marcos if m.vivo]:
+                regla = self.reglas[marco.regla]
+                selector, modo = regla['pasos'][marco.paso]
+                if nodo is soup or not selector.coincide(nodo, clases):
+                    continue
+                nodos = marco.nodos + (nodo,)
+                orden = marco.orden + (indice,) if modo == 'todos' else marco.orden
+                if marco.paso == len(regla['pasos']) - 1:
+                    if modo == 'primero':
+                        marco.vivo = False
+                    if not regla['bit'] or mascara & regla['bit']:
+                        self._candidato(candidatos, marco.regla, regla, nodo, nodos, orden)
+                elif modo == 'todos':
+                    nuevo = _Marco(marco.regla, marco.paso + 1, nodo, nodos, orden)
+                    marcos.append(nuevo)
+                    por_ambito.setdefault(id(nodo), []).append(nuevo)
+                else:
+                    marco.paso += 1
+                    marco.ambito = nodo
+                    marco.nodos = nodos
+                    marco.orden = orden
+                    por_ambito.setdefault(id(nodo), []).append(marco)
+            marcos = [m for m in marcos if m.vivo]
+
+            if self.jsonld and nodo.name == 'script' and nodo.get('type') == 'application/ld+json':
+                scripts.append(nodo)
+
+            mascara_hijos = mascara
+            for regla in self.reglas_ancestro:
+                if regla['ancestro'].coincide(nodo, clases):
+                    mascara_hijos |= regla['bit']
+
+            hijos = [hijo for hijo in nodo.contents if isinstance(hijo, Tag)]
+            for hijo in hijos:
+                padres[id(hijo)] = nodo
+            pila.append((nodo, mascara, hijos))
+            pila.extend((hijo, mascara_hijos, None) for hijo in reversed(hijos))
+            indice += 1
+
+        candidatos.sort(key=lambda c: (c[0], c[1]))
+        categorias = {}
+        registros = []
+        for _, _, titulo, enlace, elemento_categoria in candidatos:
+            if self.fuente_categoria == 'url':
+                categoria = self._categoria_url(enlace)
+            else:
+                categoria = self._categoria_overline(elemento_categoria, padres, primero_overline, categorias)
+            registros.append((categoria, titulo, self._completar(enlace)))
+        for script in scripts:
+            registros.extend(self._registros_jsonld(script))
+
+        return self._deduplicar(registros)
+
+    def _candidato(self, candidatos, indice_regla, regla, enlace, nodos, orden):
+        href = enlace.get('href')
+        if 'href_prefijo' in regla and not href.startswith(regla['href_prefijo']):
+            return
+        if 'min_segmentos' in regla and len(href.split('/')) < regla['min_segmentos']:
+            return
+        if any(x in href for x in regla.get('excluir', ())):
+            return
+        if regla.get('omitir_ocultos') and (enlace.get('aria-hidden') == 'true' or enlace.get('tabindex') == '-1'):
+            return
+        texto = enlace.get_text().strip()
+        if 'min_texto' in regla and not (texto and len(texto) > regla['min_texto']):
+            return
+
+        posicion = regla.get('elemento_categoria')
+        elemento_categoria = enlace.parent if posicion == 'padre' else nodos[posicion] if posicion is not None else None
+        candidatos.append((indice_regla, orden, _limpiar_texto(texto), href, elemento_categoria))
+
+    def _completar(self, href):
+        if href.startswith("http"):
+            return href
+        return self.url_base + href
+
+    def _categoria_url(self, href):
+        partes_url = href.strip('/').split('/')
+        categoria = partes_url[0] if partes_url else self.por_defecto
+        return categoria.replace('-', ' ').title()
+
+    def _categoria_overline(self, elemento, padres, primero_overline, categorias):
+        # Ancestro más cercano (empezando por el elemento) con un overline entre sus descendientes
+        cadena = []
+        actual = elemento
+        span = None
+        while actual is not None:
+            if id(actual) in categorias:
+                span = categorias[id(actual)]
+                break
+            cadena.append(actual)
+            span = primero_overline.get(id(actual))
+            if span is not None:
+                break
+            actual = padres.get(id(actual))
+        for nodo in cadena:
+            categorias[id(nodo)] = span
+
+        if span is not None:
+            return _limpiar_texto(span.get_text())
+        for link in elemento.find_all('a', href=True):
+            for patron, categoria in self.respaldo:
+                if patron in link['href']:
+                    return categoria
+        return self.por_defecto
+
+    def _registros_jsonld(self, script):
+        registros = []
+        try:
+            data = json.loads(script.string)
+            if isinstance(data, list):
+                for item in data:
+                    if isinstance(item, dict) and item.get('@type') in self.jsonld:
+                        titular = item.get('headline', '')
+                        url = item.get('mainEntityOfPage', {}).get('@id', '') if isinstance(item.get('mainEntityOfPage'), dict) else ''
+                        if titular and url:
+                            partes_url = url.replace(self.url_base + '/', '').split('/')
+                            categoria = partes_url[0] if partes_url else self.por_defecto
+                            registros.append((categoria.replace('-', ' ').title(), titular, url))
+        except:
+            pass
+        return registros
+
+    def _deduplicar(self, registros):
+        regla = self.deduplicacion
+        normalizar = regla['clave'] == 'titulo_normalizado'
+        min_titulo = regla.get('min_titulo')
+        campo_categoria, campo_titulo, campo_enlace = self.campos
+
+        noticias = []
+        vistos = set()
+        titulos_vistos = set()
+        for registro in registros:
+            if regla.get('registro_exacto'):
+                if registro in vistos:
+                    continue
+                vistos.add(registro)
+            categoria, titulo, enlace = registro
+            clave = re.sub(r'[^\w\s]', '', titulo.lower()) if normalizar else titulo
+            if clave not in titulos_vistos and (min_titulo is None or len(titulo) > min_titulo):
+                titulos_vistos.add(clave)
+                noticias.append({campo_categoria: categoria, campo_titulo: titulo, campo_enlace: enlace})
+        return noticias
+
+
+def compilar(spec):
+    """Compila la especificación de un periódico en un ExtractorCompilado."""
+    return ExtractorCompilado(spec)
+
+
+def extractor(nombre):
+    """Devuelve el extractor compilado de un periódico por nombre (compilado una vez por contenedor)."""
+    if nombre not in _compilados:
+        for spec in PERIODICOS:
+            if spec['nombre'] == nombre:
+                _compilados[nombre] = compilar(spec)
+                break
+        else:
+            raise ValueError(f"Periódico no registrado: {nombre}")
+    return _compilados[nombre]
+
+
+def extractor_para_clave(key):
+    """
+    Busca el periódico cuyo patron_clave aparece en la clave del archivo.
+
+    Args:
+        key (str): Clave del archivo en raw/.
+    Returns:
+        ExtractorCompilado | None: Extractor del periódico, o None si ninguno coincide.
+    """
+    for spec in PERIODICOS:
+        compilado = extractor(spec['nombre'])
+        if compilado.patron_clave.search(key):
+            return compilado
+    return None
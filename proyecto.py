@@ -1,24 +1,246 @@
-import boto3
-import requests
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-s3 = boto3.client('s3')
+from almacen import crear_cliente
+from metricas import contar, instrumentar, medir
+from perfilado import perfilar
+from senales import declarar_esperados
+
 BUCKET = 'parcialfinal2025'
 
+DIARIOS = {
+    'eltiempo': 'https://www.eltiempo.com',
+    'publimetro': 'https://www.publimetro.co/',
+}
+
+# Descarga concurrente: hilos, conexiones por host, timeouts (s) y reintentos con jitter
+HILOS_DESCARGA = int(os.environ.get('HILOS_DESCARGA', '8'))
+CONEXIONES_POR_HOST = int(os.environ.get('CONEXIONES_POR_HOST', '4'))
+TIMEOUT_HTTP = (
+    float(os.environ.get('TIMEOUT_CONEXION', '3.05')),
+    float(os.environ.get('TIMEOUT_LECTURA', '15')),
+)
+REINTENTOS_HTTP = int(os.environ.get('REINTENTOS_HTTP', '3'))
+
+# Compresión del HTML crudo en raw/: 'gzip' (por defecto) o 'ninguna'. La clave sigue
+# terminando en .html para que el filtro de sufijo del trigger S3 no cambie.
+COMPRESIONES_RAW = ('gzip', 'ninguna')
+
+# Validadores HTTP (ETag/Last-Modified) y hash de la última copia guardada de cada diario
+PREFIJO_ESTADO = 'control/scraper'
+
+# boto3 y requests se cargan en la primera invocación para no pagarlos en el arranque en frío.
+# El almacenamiento (S3 o local) se elige con ALMACEN, ver almacen.py
+s3 = None
+requests = None
+sesion = None
+
+
+def cliente_s3():
+    global s3
+    if s3 is None:
+        s3 = crear_cliente()
+    return s3
+
+
+def modulo_requests():
+    global requests
+    if requests is None:
+        import requests as modulo
+        requests = modulo
+    return requests
+
+
+def sesion_http():
+    """
+    Sesión HTTP compartida entre hilos e invocaciones calientes.
+
+    Mantiene las conexiones abiertas (keep-alive), limita las conexiones por host
+    a CONEXIONES_POR_HOST y reintenta errores de conexión y respuestas 429/5xx
+    con backoff exponencial y jitter.
+
+    Returns:
+        requests.Session: Sesión configurada.
+    """
+    global sesion
+    if sesion is None:
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        reintentos = Retry(
+            total=REINTENTOS_HTTP,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',),
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(
+            pool_connections=max(len(DIARIOS), 1),
+            pool_maxsize=CONEXIONES_POR_HOST,
+            pool_block=True,
+            max_retries=reintentos,
+        )
+        nueva = modulo_requests().Session()
+        nueva.mount('https://', adaptador)
+        nueva.mount('http://', adaptador)
+        sesion = nueva
+    return sesion
+
+
+def clave_estado(nombre):
+    return f'{PREFIJO_ESTADO}/{nombre}.json'
+
+
+def leer_estado(nombre):
+    """
+    Lee los validadores y el hash de la última copia guardada del diario.
+
+    El estado es solo una optimización: si no existe o no se puede leer se
+    descarga la página completa.
+    """
+    try:
+        respuesta = cliente_s3().get_object(Bucket=BUCKET, Key=clave_estado(nombre))
+        estado = json.loads(respuesta['Body'].read())
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+            print(f'Estado de {nombre} no disponible, se descarga completo: {e}')
+        return {}
+    return estado if isinstance(estado, dict) else {}
+
+
+def guardar_estado(nombre, estado):
+    cliente_s3().put_object(
+        Bucket=BUCKET,
+        Key=clave_estado(nombre),
+        Body=json.dumps(estado).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def consultar(nombre, url):
+    """
+    Pide la portada con una petición condicional y decide si cambió.
+
+    Envía If-None-Match/If-Modified-Since con los validadores guardados; un 304
+    o un cuerpo con el mismo SHA-256 que la última copia cuentan como sin cambios.
+
+    Args:
+        nombre (str): Nombre del diario.
+        url (str): Portada a descargar.
+    Returns:
+        tuple: (contenido, estado nuevo); contenido es None si no hay nada que subir.
+    """
+    estado = leer_estado(nombre)
+    cabeceras = {}
+    if estado.get('etag'):
+        cabeceras['If-None-Match'] = estado['etag']
+    if estado.get('last_modified'):
+        cabeceras['If-Modified-Since'] = estado['last_modified']
+
+    contar('llamadas_http')
+    try:
+        # Las descargas corren en hilos: descarga_ms es la suma de todas, no el tiempo de pared
+        with medir('descarga_ms'):
+            if cabeceras:
+                resp = sesion_http().get(url, timeout=TIMEOUT_HTTP, headers=cabeceras)
+            else:
+                resp = sesion_http().get(url, timeout=TIMEOUT_HTTP)
+    except modulo_requests().RequestException as e:
+        print(f'Error al descargar {url}: {e}')
+        return None, None
+
+    if resp.status_code == 304:
+        contar('sin_cambios')
+        print(f'Sin cambios (304): {url}')
+        return None, None
+    if resp.status_code != 200:
+        print(f'Error al descargar {url}')
+        return None, None
+
+    contar('descarga_bytes', len(resp.content), 'Bytes')
+    nuevo = {
+        'etag': resp.headers.get('ETag'),
+        'last_modified': resp.headers.get('Last-Modified'),
+        'sha256': hashlib.sha256(resp.content).hexdigest(),
+    }
+    if nuevo['sha256'] == estado.get('sha256'):
+        contar('sin_cambios')
+        print(f'Sin cambios (mismo contenido): {url}')
+        if nuevo != estado:
+            guardar_estado(nombre, nuevo)
+        return None, None
+    return resp.content, nuevo
+
+
+def compresion_configurada():
+    compresion = os.environ.get('COMPRESION_RAW', 'gzip')
+    if compresion not in COMPRESIONES_RAW:
+        raise ValueError(f"COMPRESION_RAW no soportada: {compresion}. Opciones: {', '.join(COMPRESIONES_RAW)}")
+    return compresion
+
+
+def cuerpo_raw(contenido):
+    """
+    Prepara el HTML crudo para put_object según COMPRESION_RAW.
+
+    En gzip el objeto lleva Content-Encoding: gzip, que es lo que proyecto1 usa
+    para descomprimir; mtime=0 hace que el mismo HTML dé siempre los mismos bytes.
+
+    Args:
+        contenido (bytes): HTML descargado.
+    Returns:
+        dict: Argumentos Body/ContentType/ContentEncoding para put_object.
+    """
+    if compresion_configurada() == 'gzip':
+        return {
+            'Body': gzip.compress(contenido, compresslevel=6, mtime=0),
+            'ContentType': 'text/html',
+            'ContentEncoding': 'gzip',
+        }
+    return {'Body': contenido, 'ContentType': 'text/html'}
+
+
+def subir(nombre, contenido, estado, timestamp):
+    """Sube el HTML crudo a raw/ y después guarda su estado (si la subida falla se reintenta la próxima vez)."""
+    key = f'raw/contenido-{nombre}-{timestamp}.html'
+    cuerpo = cuerpo_raw(contenido)
+    with medir('subida_ms'):
+        cliente_s3().put_object(Bucket=BUCKET, Key=key, **cuerpo)
+    contar('subida_bytes', len(cuerpo['Body']), 'Bytes')
+    guardar_estado(nombre, estado)
+    print(f'Subido: s3://{BUCKET}/{key}')
+    return key
+
+
+@perfilar
+@instrumentar
 def app(event, context):
     now = datetime.utcnow()
     timestamp = now.strftime('%Y-%m-%d-%H-%M')
 
-    diarios = {
-        'eltiempo': 'https://www.eltiempo.com',
-        'publimetro': 'https://www.publimetro.co/',
-    }
+    compresion_configurada()
+
+    # Los clientes se crean antes de repartir el trabajo: crearlos no es seguro entre hilos
+    cliente_s3()
+    sesion_http()
+
+    # El tiempo total es el del diario más lento, no la suma de todos
+    with ThreadPoolExecutor(max_workers=min(HILOS_DESCARGA, len(DIARIOS)) or 1) as hilos:
+        consultas = list(hilos.map(lambda item: consultar(*item), DIARIOS.items()))
+        nuevos = [nombre for nombre, (contenido, _) in zip(DIARIOS, consultas) if contenido is not None]
+        if not nuevos:
+            print('Ningún diario cambió; no se sube nada.')
+            return [None] * len(DIARIOS)
 
-    for nombre, url in diarios.items():
-        resp = requests.get(url)
-        if resp.status_code == 200:
-            key = f'raw/contenido-{nombre}-{timestamp}.html'
-            s3.put_object(Bucket=BUCKET, Key=key, Body=resp.content)
-            print(f'Subido: s3://{BUCKET}/{key}')
-        else:
-            print(f'Error al descargar {url}')
+        # Solo los diarios que cambiaron forman la corrida; lo demás no vuelve a procesarse
+        declarar_esperados(cliente_s3(), BUCKET, timestamp, nuevos)
+        futuros = [
+            hilos.submit(subir, nombre, contenido, estado, timestamp) if contenido is not None else None
+            for nombre, (contenido, estado) in zip(DIARIOS, consultas)
+        ]
+        return [f.result() if f else None for f in futuros]
@@ -1,307 +1,365 @@
-import boto3
+import csv
+import io
 import os
-import pandas as pd
-from bs4 import BeautifulSoup
-from urllib.parse import unquote_plus
-from datetime import datetime
 import re
-import json
-import csv
 import time
+from datetime import datetime
+from urllib.parse import unquote_plus
 
+from almacen import abrir, crear_cliente
+from catalogo import COLUMNAS, modo_configurado, registrar_particiones
+from manifiesto import registrar as registrar_en_manifiesto
+from metricas import contar, instrumentar, medir, propiedad
+from perfilado import perfilar
+from periodicos import PERIODICOS, extractor, extractor_para_clave
+from senales import id_corrida, registrar_salida
+from vistos import IndiceVistos, modo_configurado as vistos_configurado
 
+# boto3, bs4 y pyarrow se importan al usarse: el arranque en frío solo carga la biblioteca estándar.
+# El almacenamiento (S3 o local) se elige con ALMACEN, ver almacen.py
+s3 = None
 
 
-s3 = boto3.client('s3')
+def cliente_s3():
+    global s3
+    if s3 is None:
+        s3 = crear_cliente()
+    return s3
 
-def app(event, context):
-    bucket = event['Records'][0]['s3']['bucket']['name']
-    key = unquote_plus(event['Records'][0]['s3']['object']['key'])
+# Backends de parseo HTML soportados; se elige con la variable de entorno PARSER_HTML
+PARSERS_HTML = ('html.parser', 'lxml', 'html5lib')
 
-    if not key.endswith('.html'):
-        print(f"Ignorado: archivo no es HTML ({key})")
-        return {
-            'statusCode': 200,
-            'body': f'Se ignoró el archivo: {key}'
-        }
 
-    local_file = '/tmp/page.html'
-    s3.download_file(bucket, key, local_file)
+def parser_configurado():
+    parser = os.environ.get('PARSER_HTML', 'html.parser')
+    if parser not in PARSERS_HTML:
+        raise ValueError(f"PARSER_HTML no soportado: {parser}. Opciones: {', '.join(PARSERS_HTML)}")
+    return parser
 
-    with open(local_file, 'r', encoding='utf-8') as f:
-        html = f.read()
 
-    soup = BeautifulSoup(html, 'html.parser')
+def crear_sopa(html_content, parser=None):
+    """
+    Construye el árbol del documento con el backend indicado o el configurado.
 
-    # Determinar el periódico por el nombre del archivo
-    if 'eltiempo' in key:
-        periodico = 'eltiempo'
-        data = parse_el_tiempo(html)
-    elif 'publimetro' in key :
-        periodico = 'publimetro'
-        data = extraer_noticias_publimetro(html)
-    else:
-        raise ValueError('No se pudo determinar el periódico del archivo.')
+    Si el backend no está instalado se usa 'html.parser', que viene con Python.
+    Acepta texto, bytes o un objeto con read() (p. ej. el Body de get_object);
+    los bytes se decodifican como UTF-8.
 
-    if not data:
-        raise ValueError("No se extrajo ninguna noticia.")
+    Args:
+        html_content (str | bytes | file): Contenido HTML de la página.
+        parser (str): Backend a usar; por defecto el de PARSER_HTML.
+    Returns:
+        BeautifulSoup: Documento parseado.
+    """
+    from bs4 import BeautifulSoup, FeatureNotFound
+
+    parser = parser or parser_configurado()
+    if hasattr(html_content, 'read'):
+        html_content = html_content.read()
+    opciones = {} if isinstance(html_content, str) else {'from_encoding': 'utf-8'}
+    try:
+        return BeautifulSoup(html_content, parser, **opciones)
+    except FeatureNotFound:
+        print(f"Parser '{parser}' no disponible, se usa 'html.parser'.")
+        return BeautifulSoup(html_content, 'html.parser', **opciones)
 
-    df = pd.DataFrame(data)
+# Formato de los titulares en final/: 'csv', 'parquet' o 'ambos' (variable FORMATO_SALIDA)
+FORMATOS_SALIDA = ('csv', 'parquet', 'ambos')
+
+
+def formato_configurado():
+    formato = os.environ.get('FORMATO_SALIDA', 'csv')
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"FORMATO_SALIDA no soportado: {formato}. Opciones: {', '.join(FORMATOS_SALIDA)}")
+    return formato
+
+# Archivos de final/ por partición (variable PARTICION_SALIDA):
+#   'dia'  un solo day=DD/titulares.<ext>; otro snapshot del mismo día lo reemplaza (por defecto)
+#   'hora' un archivo por snapshot en day=DD/hour=HH/<corrida>.<ext>; compactar.py los junta
+#          al cerrar el día. Exige REGISTRO_PARTICIONES=directo
+PARTICIONES_SALIDA = ('dia', 'hora')
+
+
+def particion_configurada():
+    particion = os.environ.get('PARTICION_SALIDA', 'dia')
+    if particion not in PARTICIONES_SALIDA:
+        raise ValueError(f"PARTICION_SALIDA no soportado: {particion}. Opciones: {', '.join(PARTICIONES_SALIDA)}")
+    return particion
+
+
+def clave_base(periodico, fecha, corrida, particion):
+    """
+    Clave de salida sin extensión para un snapshot.
+
+    Args:
+        periodico (str): Periódico.
+        fecha (datetime): Día del snapshot.
+        corrida (str): Identificador de la corrida (ver senales.id_corrida).
+        particion (str): 'dia' u 'hora' (ver particion_configurada).
+    Returns:
+        str: final/periodico=/year=/month=/day=/titulares o .../day=/hour=HH/<corrida>.
+    """
+    base = f"final/periodico={periodico}/year={fecha.year}/month={fecha.month:02d}/day={fecha.day:02d}"
+    if particion == 'dia':
+        return f'{base}/titulares'
+    # Las corridas sin hora (solo la fecha) quedan en hour=00
+    hora = corrida[11:13] if len(corrida) > 10 else '00'
+    return f'{base}/hour={hora}/{corrida}'
+
+
+def esquema_parquet():
+    """
+    Esquema explícito de los titulares en Parquet.
+
+    Las columnas son catalogo.COLUMNAS para todos los periódicos: la tabla de
+    Parquet lee por nombre. La categoría se guarda con codificación de
+    diccionario porque se repite en casi todas las filas. El periódico no se
+    guarda como columna: ya es la partición periodico=... de la ruta y
+    repetirlo rompe las tablas Hive.
+
+    Returns:
+        pyarrow.Schema: Esquema de la tabla.
+    """
+    import pyarrow as pa
+
+    categoria, titulo, enlace = COLUMNAS
+    return pa.schema([
+        pa.field(categoria, pa.dictionary(pa.int32(), pa.string())),
+        pa.field(titulo, pa.string()),
+        pa.field(enlace, pa.string()),
+    ])
+
+
+def titulares_a_csv(data):
+    """
+    Serializa los titulares a CSV fila por fila, sin construir un DataFrame.
+
+    Produce la misma salida que DataFrame.to_csv(index=False): cabecera con las
+    claves de la primera noticia, comillas solo cuando hacen falta y saltos '\\n'.
+
+    Args:
+        data (list[dict]): Noticias extraídas.
+    Returns:
+        bytes: CSV codificado en UTF-8.
+    """
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=list(data[0]), lineterminator='\n')
+    escritor.writeheader()
+    for noticia in data:
+        escritor.writerow(noticia)
+    return buffer.getvalue().encode('utf-8')
+
+
+def titulares_a_parquet(data, campos):
+    """
+    Serializa los titulares a Parquet comprimido (COMPRESION_PARQUET, snappy por defecto).
+
+    Los campos del periódico (categoría, titular, enlace) se escriben con los
+    nombres comunes de catalogo.COLUMNAS.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabla = pa.Table.from_pydict(
+        {columna: [noticia[campo] for noticia in data] for columna, campo in zip(COLUMNAS, campos)},
+        schema=esquema_parquet()
+    )
+    buffer = io.BytesIO()
+    pq.write_table(tabla, buffer, compression=os.environ.get('COMPRESION_PARQUET', 'snappy'))
+    return buffer.getvalue()
+
+def procesar_snapshot(bucket, key, formato=None, vistos=None):
+    """
+    Extrae los titulares de un HTML crudo de raw/ y los escribe en su partición de final/.
+
+    Es el trabajo de app sin las señales de corrida; reprocesar.py lo usa para
+    rellenar historia en lote. Lo escrito queda en el manifiesto (ver
+    manifiesto.py) para que la agregación siguiente lo procese, y con
+    REGISTRO_PARTICIONES=directo también se registra la partición en Glue
+    (ver catalogo.py). Con VISTOS=descartar solo se escriben los artículos que
+    no salieron en snapshots anteriores (ver vistos.py); si no queda ninguno no
+    se escribe nada. Ese modo exige PARTICION_SALIDA=hora: con un archivo por
+    día cada snapshot pisaría lo escrito por los anteriores. PARTICION_SALIDA=hora
+    exige a su vez REGISTRO_PARTICIONES=directo: el crawler inferiría particiones
+    de profundidad distinta para hour=HH/ y para los archivos ya compactados.
+
+    Args:
+        bucket (str): Bucket de datos.
+        key (str): Clave del HTML crudo.
+        formato (str): 'csv', 'parquet' o 'ambos'; por defecto FORMATO_SALIDA.
+        vistos (str): 'desactivado' o 'descartar'; por defecto VISTOS.
+    Returns:
+        tuple: (periódico, claves escritas, número de noticias escritas).
+    """
+    # Determinar el periódico por el nombre del archivo
+    compilado = extractor_para_clave(key)
+    if compilado is None:
+        raise ValueError('No se pudo determinar el periódico del archivo.')
+    periodico = compilado.nombre
 
     filename = key.split('/')[-1].replace('.html', '')
     match = re.search(r'(\d{4}-\d{2}-\d{2})', filename)
     if not match:
         raise ValueError(f"No se encontró una fecha válida en el nombre del archivo: {filename}")
-    
+
     fecha_str = match.group(1)
     fecha = datetime.strptime(fecha_str, '%Y-%m-%d')
 
-    output_key = f"final/periodico={periodico}/year={fecha.year}/month={fecha.month:02d}/day={fecha.day:02d}/titulares.csv"
-    output_file = '/tmp/titulares.csv'
-    df.to_csv(output_file, index=False)
-    s3.upload_file(output_file, bucket, output_key)
-    
-    time.sleep(20)
-    
-    client = boto3.client('lambda')
-    response = client.invoke(
-        FunctionName='lambda-333-dev3',
-        InvocationType='Event',  # Usa 'RequestResponse' si necesitas esperar la respuesta
-        Payload=b'{}'  # Puedes pasar datos aquí si lo necesitas
-    )
+    formato = formato or formato_configurado()
+    particion = particion_configurada()
+    registro = modo_configurado()
+    vistos = vistos or vistos_configurado()
+    # Con un archivo por día cada snapshot reemplazaría el archivo con solo sus artículos nuevos
+    if vistos == 'descartar' and particion != 'hora':
+        raise ValueError("VISTOS=descartar requiere PARTICION_SALIDA=hora.")
+    # El registro directo da de alta solo el día; el crawler además vería hour= como partición
+    if particion == 'hora' and registro != 'directo':
+        raise ValueError("PARTICION_SALIDA=hora requiere REGISTRO_PARTICIONES=directo.")
+
+    # Sin archivo temporal y un solo parseo. El cuerpo se lee antes de parsear (BeautifulSoup
+    # lo leería entero igual) para medir descarga y parseo por separado
+    with medir('descarga_ms'):
+        contenido = abrir(cliente_s3(), bucket, key).read()
+    contar('descarga_bytes', len(contenido), 'Bytes')
+    with medir('parseo_ms'):
+        data = compilado.extraer(crear_sopa(contenido))
+    contar('titulares', len(data))
+
+    if not data:
+        raise ValueError("No se extrajo ninguna noticia.")
+
+    indice = None
+    if vistos == 'descartar':
+        indice = IndiceVistos.cargar(cliente_s3(), bucket, periodico)
+        extraidas = len(data)
+        data = indice.filtrar(data, compilado.campos[2], time.time())
+        contar('titulares_nuevos', len(data))
+        print(f"{periodico}: {len(data)} artículos nuevos de {extraidas} titulares.")
+        if not data:
+            indice.guardar(cliente_s3(), bucket, periodico)
+            return periodico, [], 0
+
+    base_key = clave_base(periodico, fecha, id_corrida(key) or fecha_str, particion)
+    output_keys = []
+    escritos = []
+
+    if formato in ('csv', 'ambos'):
+        with medir('serializacion_ms'):
+            cuerpo = titulares_a_csv(data)
+        with medir('subida_ms'):
+            cliente_s3().put_object(
+                Bucket=bucket,
+                Key=f'{base_key}.csv',
+                Body=cuerpo,
+                ContentType='text/csv'
+            )
+        contar('subida_bytes', len(cuerpo), 'Bytes')
+        output_keys.append(f'{base_key}.csv')
+        escritos.append({'Key': f'{base_key}.csv', 'Size': len(cuerpo)})
+
+    if formato in ('parquet', 'ambos'):
+        with medir('serializacion_ms'):
+            cuerpo = titulares_a_parquet(data, compilado.campos)
+        with medir('subida_ms'):
+            cliente_s3().put_object(
+                Bucket=bucket,
+                Key=f'{base_key}.parquet',
+                Body=cuerpo,
+                ContentType='application/vnd.apache.parquet'
+            )
+        contar('subida_bytes', len(cuerpo), 'Bytes')
+        output_keys.append(f'{base_key}.parquet')
+        escritos.append({'Key': f'{base_key}.parquet', 'Size': len(cuerpo)})
+
+    registrar_en_manifiesto(cliente_s3(), bucket, periodico, escritos, time.time())
+    # El índice se guarda cuando la salida ya está escrita: un fallo antes no pierde titulares
+    if indice is not None:
+        indice.guardar(cliente_s3(), bucket, periodico)
+
+    # En modo directo la partición queda consultable sin esperar al crawler
+    if registro == 'directo':
+        registrar_particiones(bucket, output_keys, compilado.campos)
+
+    return periodico, output_keys, len(data)
+
+@perfilar
+@instrumentar
+def app(event, context):
+    bucket = event['Records'][0]['s3']['bucket']['name']
+    key = unquote_plus(event['Records'][0]['s3']['object']['key'])
+    propiedad('clave', key)
 
-    print("Invocación enviada a la tercera Lambda.")
+    if not key.endswith('.html'):
+        print(f"Ignorado: archivo no es HTML ({key})")
+        return {
+            'statusCode': 200,
+            'body': f'Se ignoró el archivo: {key}'
+        }
 
+    try:
+        periodico, output_keys, _ = procesar_snapshot(bucket, key)
+    except Exception as e:
+        # Sin su entrada la corrida nunca se marcaría completa: se registra el
+        # fallo como un periódico sin salidas y la excepción sigue su camino. Si
+        # un reintento de Lambda termina bien, su entrada reemplaza a esta y la
+        # marca se reescribe (ver senales.escribir_marca)
+        compilado = extractor_para_clave(key)
+        if compilado is not None:
+            try:
+                registrar_salida(
+                    cliente_s3(), bucket, id_corrida(key), compilado.nombre, [],
+                    [spec['nombre'] for spec in PERIODICOS], error=str(e)
+                )
+            except Exception as error_registro:
+                print(f"No se pudo registrar el fallo de {key}: {error_registro}")
+        raise
+    output_key = ', '.join(output_keys)
+
+    # La etapa siguiente espera la marca de corrida completa, no un tiempo fijo
+    with medir('senales_ms'):
+        manifiesto = registrar_salida(
+            cliente_s3(), bucket, id_corrida(key), periodico, output_keys,
+            [spec['nombre'] for spec in PERIODICOS]
+        )
+    if manifiesto:
+        print(f"Corrida {manifiesto['corrida']} completa.")
+
+    if not output_keys:
+        return {
+            'statusCode': 200,
+            'body': f'Sin artículos nuevos en {key}'
+        }
     return {
         'statusCode': 200,
         'body': f'Archivo procesado y guardado en {output_key}'
     }
 
 # -----------------------------
-# FUNCIONES EXTRACTORAS NUEVAS
+# FUNCIONES EXTRACTORAS
 # -----------------------------
+# Las reglas de cada periódico están declaradas en periodicos.PERIODICOS.
+
+def parse_el_tiempo(html_content, parser=None):
+    """
+    Extrae las noticias del HTML de El Tiempo.
+
+    Args:
+        html_content (str): Contenido HTML de la página.
+        parser (str): Backend de parseo; por defecto el de PARSER_HTML.
+    Returns:
+        list[dict]: Lista de noticias con categoría, título y enlace.
+    """
+    return extractor('eltiempo').extraer(crear_sopa(html_content, parser))
+
 
-def parse_el_tiempo(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
-    noticias = []
-
-    enlaces_noticias = soup.find_all('a', href=True)
-    for enlace in enlaces_noticias:
-        href = enlace.get('href', '')
-        if (href.startswith('/') and len(href.split('/')) >= 3 and
-            not any(x in href for x in ['/images/', '/assets/', '/css/', '/js/', '.jpg', '.png', '.gif'])):
-            titular = enlace.get_text().strip()
-            if titular and len(titular) > 10:
-                partes_url = href.strip('/').split('/')
-                categoria = partes_url[0] if partes_url else 'General'
-                titular_limpio = re.sub(r'\s+', ' ', titular).strip()
-                categoria_limpia = categoria.replace('-', ' ').title()
-                url_completa = f"https://www.eltiempo.com{href}"
-
-                noticia = {
-                    'categoria': categoria_limpia,
-                    'titulo': titular_limpio,
-                    'enlace': url_completa
-                }
-
-                if noticia not in noticias:
-                    noticias.append(noticia)
-
-    selectores_noticias = [
-        'article a[href]',
-        '.noticia a[href]',
-        '.articulo a[href]',
-        '[class*="headline"] a[href]',
-        '[class*="title"] a[href]',
-        '[class*="news"] a[href]'
-    ]
-
-    for selector in selectores_noticias:
-        elementos = soup.select(selector)
-        for elemento in elementos:
-            href = elemento.get('href', '')
-            titular = elemento.get_text().strip()
-            if (href and titular and len(titular) > 10 and
-                href.startswith('/') and len(href.split('/')) >= 3):
-                partes_url = href.strip('/').split('/')
-                categoria = partes_url[0] if partes_url else 'General'
-                titular_limpio = re.sub(r'\s+', ' ', titular).strip()
-                categoria_limpia = categoria.replace('-', ' ').title()
-                url_completa = f"https://www.eltiempo.com{href}"
-
-                noticia = {
-                    'categoria': categoria_limpia,
-                    'titulo': titular_limpio,
-                    'enlace': url_completa
-                }
-
-                if noticia not in noticias:
-                    noticias.append(noticia)
-
-    scripts_jsonld = soup.find_all('script', type='application/ld+json')
-    for script in scripts_jsonld:
-        try:
-            data = json.loads(script.string)
-            if isinstance(data, list):
-                for item in data:
-                    if isinstance(item, dict) and item.get('@type') in ['NewsArticle', 'ReportageNewsArticle']:
-                        titular = item.get('headline', '')
-                        url = item.get('mainEntityOfPage', {}).get('@id', '') if isinstance(item.get('mainEntityOfPage'), dict) else ''
-                        if titular and url:
-                            partes_url = url.replace('https://www.eltiempo.com/', '').split('/')
-                            categoria = partes_url[0] if partes_url else 'General'
-                            categoria_limpia = categoria.replace('-', ' ').title()
-                            noticia = {
-                                'categoria': categoria_limpia,
-                                'titulo': titular,
-                                'enlace': url
-                            }
-                            if noticia not in noticias:
-                                noticias.append(noticia)
-        except:
-            continue
-
-    # Filtrar duplicados por titular
-    noticias_filtradas = []
-    titulares_vistos = set()
-    for noticia in noticias:
-        normalizado = re.sub(r'[^\w\s]', '', noticia['titulo'].lower())
-        if normalizado not in titulares_vistos and len(noticia['titulo']) > 15:
-            titulares_vistos.add(normalizado)
-            noticias_filtradas.append(noticia)
-
-    return noticias_filtradas
-
-# Mantén esta función como está si quieres seguir extrayendo de El Espectador
-
-def extraer_noticias_publimetro(html_content):
+def extraer_noticias_publimetro(html_content, parser=None):
     """
     Extrae información de noticias del HTML de Publimetro y retorna una lista de noticias.
 
     Args:
         html_content (str): Contenido HTML de la página.
+        parser (str): Backend de parseo; por defecto el de PARSER_HTML.
     Returns:
         list[dict]: Lista de noticias con categoría, titular y link completo.
     """
-    BASE_URL = "https://www.publimetro.co"
-    soup = BeautifulSoup(html_content, 'html.parser')
-    noticias = []
-
-    def limpiar_texto(texto):
-        return re.sub(r'\s+', ' ', texto.strip()) if texto else ""
-
-    def completar_link(href):
-        if href.startswith("http"):
-            return href
-        return BASE_URL + href
-
-    def extraer_categoria(elemento):
-        categoria_elem = elemento.find('span', class_='c-overline')
-        if categoria_elem:
-            return limpiar_texto(categoria_elem.get_text())
-
-        parent = elemento.find_parent()
-        while parent:
-            categoria_elem = parent.find('span', class_='c-overline')
-            if categoria_elem:
-                return limpiar_texto(categoria_elem.get_text())
-            parent = parent.find_parent()
-
-        links = elemento.find_all('a', href=True)
-        for link in links:
-            href = link['href']
-            if '/deportes/' in href:
-                return 'Deportes'
-            if '/entretenimiento/' in href:
-                return 'Entretenimiento'
-            if '/noticias/' in href:
-                return 'Noticias'
-            if '/barranquilla/' in href:
-                return 'Barranquilla'
-
-        return 'Sin categoría'
-
-    # Noticias principales
-    for noticia in soup.find_all('article', class_='b-top-table-list-xl'):
-        titulo_elem = noticia.find('h2', class_='c-heading')
-        link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
-        if link_elem:
-            noticias.append({
-                'categoria': extraer_categoria(noticia),
-                'titular': limpiar_texto(link_elem.get_text()),
-                'link': completar_link(link_elem.get('href'))
-            })
-
-    # Sección "Para entretenerse"
-    seccion_entretenimiento = soup.find('div', class_='b-card-list')
-    if seccion_entretenimiento:
-        noticia_main = seccion_entretenimiento.find('article', class_='b-card-list__main-item')
-        if noticia_main:
-            titulo_elem = noticia_main.find('h3', class_='c-heading')
-            link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
-            if link_elem:
-                noticias.append({
-                    'categoria': extraer_categoria(noticia_main),
-                    'titular': limpiar_texto(link_elem.get_text()),
-                    'link': completar_link(link_elem.get('href'))
-                })
-
-        for noticia in seccion_entretenimiento.find_all('article', class_='b-card-list__secondary-item'):
-            titulo_elem = noticia.find('h3', class_='c-heading')
-            link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
-            if link_elem:
-                noticias.append({
-                    'categoria': extraer_categoria(noticia),
-                    'titular': limpiar_texto(link_elem.get_text()),
-                    'link': completar_link(link_elem.get('href'))
-                })
-
-    # Lista pequeña
-    for noticia in soup.find_all('article', class_='b-top-table-list-small'):
-        titulo_elem = noticia.find('h2', class_='c-heading')
-        link_elem = titulo_elem.find('a', class_='c-link') if titulo_elem else None
-        if link_elem:
-            noticias.append({
-                'categoria': extraer_categoria(noticia),
-                'titular': limpiar_texto(link_elem.get_text()),
-                'link': completar_link(link_elem.get('href'))
-            })
-
-    # Resultados
-    for seccion in soup.find_all('div', class_='b-results-list'):
-        for enlace in seccion.find_all('a', class_='c-link', href=True):
-            if enlace.get('aria-hidden') == 'true' or enlace.get('tabindex') == '-1':
-                continue
-            titulo = limpiar_texto(enlace.get_text())
-            if titulo:
-                noticias.append({
-                    'categoria': extraer_categoria(enlace.find_parent()),
-                    'titular': titulo,
-                    'link': completar_link(enlace['href'])
-                })
-
-    # Búsqueda general
-    for enlace in soup.find_all('a', class_='c-link', href=True):
-        if (enlace.get('aria-hidden') == 'true' or
-            enlace.get('tabindex') == '-1' or
-            not enlace['href'].startswith('/')):
-            continue
-
-        if enlace.find_parent(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            titulo = limpiar_texto(enlace.get_text())
-            if titulo and titulo not in [n['titular'] for n in noticias]:
-                noticias.append({
-                    'categoria': extraer_categoria(enlace.find_parent()),
-                    'titular': titulo,
-                    'link': completar_link(enlace['href'])
-                })
-
-    # Eliminar duplicados
-    noticias_unicas = []
-    titulos_vistos = set()
-    for noticia in noticias:
-        if noticia['titular'] not in titulos_vistos:
-            noticias_unicas.append(noticia)
-            titulos_vistos.add(noticia['titular'])
-
-    return noticias_unicas
+    return extractor('publimetro').extraer(crear_sopa(html_content, parser))
@@ -1,25 +1,125 @@
-import boto3
+import json
+import os
+import time
 
+from almacen import crear_cliente
+from catalogo import modo_configurado as registro_configurado
+from metricas import contar_llamadas, instrumentar, propiedad
+from perfilado import perfilar
+from senales import completar_vencidas, es_marca_completo
+
+BUCKET = 'parcialfinal2025'
+CRAWLER = 'noticias'
+
+# Disparo agrupado del crawler: cada llegada solo anota su hora en PENDIENTE y
+# el crawler arranca como mucho una vez por VENTANA_CRAWLER segundos. Lo que
+# llega dentro de la ventana o con el crawler corriendo queda pendiente y lo
+# lanza la siguiente llegada o la invocación programada (zappa_settings.json),
+# en una sola corrida de seguimiento.
+VENTANA_CRAWLER = float(os.environ.get('VENTANA_CRAWLER', '300'))
+CLAVE_PENDIENTE = 'control/crawler/pendiente'
+CLAVE_ESTADO = 'control/crawler/estado.json'
+
+# El almacenamiento (S3 o local) se elige con ALMACEN, ver almacen.py
+s3 = None
+
+
+def cliente_s3():
+    global s3
+    if s3 is None:
+        s3 = crear_cliente()
+    return s3
+
+
+def es_llegada(key):
+    return es_marca_completo(key) or (key.startswith('final/') and key.endswith(('.csv', '.parquet')))
+
+
+def _leer(key):
+    try:
+        return cliente_s3().get_object(Bucket=BUCKET, Key=key)['Body'].read()
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def registrar_llegada(ahora):
+    """Anota que hay datos nuevos; varias llegadas seguidas se pisan en un solo pendiente."""
+    cliente_s3().put_object(Bucket=BUCKET, Key=CLAVE_PENDIENTE, Body=repr(ahora).encode('utf-8'))
+
+
+def intentar_crawler(glue, ahora):
+    """
+    Inicia el crawler si hay llegadas sin atender y ya pasó la ventana.
+
+    El estado guarda la última llegada cubierta por una corrida (atendido_hasta)
+    y cuándo se inició; lo que llegue después queda pendiente para una sola
+    corrida de seguimiento.
+
+    Args:
+        glue: Cliente de Glue.
+        ahora (float): Hora actual en segundos (epoch).
+    Returns:
+        str: 'iniciado', 'sin pendientes', 'en ventana', 'en curso' o 'error'.
+    """
+    pendiente = _leer(CLAVE_PENDIENTE)
+    estado = json.loads(_leer(CLAVE_ESTADO) or '{}')
+    atendido = estado.get('atendido_hasta', 0.0)
+    iniciado = estado.get('iniciado_en', 0.0)
+
+    if pendiente is None or float(pendiente) <= atendido:
+        return 'sin pendientes'
+    if ahora - iniciado < VENTANA_CRAWLER:
+        print(f"Llegadas agrupadas: el crawler '{CRAWLER}' se inició hace {ahora - iniciado:.0f} s.")
+        return 'en ventana'
+
+    try:
+        glue.start_crawler(Name=CRAWLER)
+    except glue.exceptions.CrawlerRunningException:
+        print(f"El crawler '{CRAWLER}' ya está corriendo; queda una corrida pendiente.")
+        return 'en curso'
+    except Exception as e:
+        print(f"Error al iniciar el crawler: {str(e)}")
+        return 'error'
+
+    cliente_s3().put_object(
+        Bucket=BUCKET,
+        Key=CLAVE_ESTADO,
+        Body=json.dumps({'atendido_hasta': float(pendiente), 'iniciado_en': ahora}).encode('utf-8'),
+        ContentType='application/json'
+    )
+    print(f"Crawler '{CRAWLER}' iniciado con éxito.")
+    return 'iniciado'
+
+
+@perfilar
+@instrumentar
 def app(event, context):
-    glue = boto3.client('glue')
-
-    # Nombre del crawler
-    crawler_name = 'noticias'
-    
-    # Puedes filtrar si quieres solo ciertos tipos de archivos (opcional)
-    for record in event['Records']:
-        s3_key = record['s3']['object']['key']
-        
-        if s3_key.startswith('final/') and s3_key.endswith('.csv'):
-            try:
-                response = glue.start_crawler(Name=crawler_name)
-                print(f"Crawler '{crawler_name}' iniciado con éxito.")
-            except glue.exceptions.CrawlerRunningException:
-                print(f"El crawler '{crawler_name}' ya está corriendo.")
-            except Exception as e:
-                print(f"Error al iniciar el crawler: {str(e)}")
+    # Con REGISTRO_PARTICIONES=directo proyecto1 ya registró cada partición en Glue
+    if registro_configurado() == 'directo':
+        propiedad('crawler', 'omitido')
+        return {
+            'statusCode': 200,
+            'body': 'Particiones registradas por proyecto1; no se inicia el crawler.'
+        }
+
+    # boto3 se importa aquí para no pagarlo en el arranque en frío
+    import boto3
+    glue = contar_llamadas(boto3.client('glue'), 'glue')
+    ahora = time.time()
+
+    # Todas las llegadas del evento cuentan como una sola; la invocación programada
+    # llega sin Records, cierra las corridas a las que les faltó un periódico y
+    # revisa si hay algo pendiente
+    records = event.get('Records', [])
+    if any(es_llegada(record['s3']['object']['key']) for record in records):
+        registrar_llegada(ahora)
+    elif not records and completar_vencidas(cliente_s3(), BUCKET, ahora):
+        registrar_llegada(ahora)
+    propiedad('crawler', intentar_crawler(glue, ahora))
 
     return {
         'statusCode': 200,
         'body': 'Evento procesado.'
-    }
\ No newline at end of file
+    }
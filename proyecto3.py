@@ -1,19 +1,302 @@
 import json
-import boto3
 import os
 import logging
+import time
 from datetime import datetime
 
+from metricas import contar, contar_llamadas, instrumentar, medir, propiedad
+from perfilado import perfilar
+
 # Configurar logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def app(event, context):
+# Modo de ejecución (EMR_MODO):
+#   'efimero'    un clúster nuevo por invocación que se termina al acabar su paso (por defecto)
+#   'reutilizar' agrega los pasos a un clúster etiquetado que ya esté encendido y solo
+#                lanza uno (que queda encendido hasta EMR_IDLE_TIMEOUT_SECONDS) si no hay ninguno
+MODOS_EMR = ('efimero', 'reutilizar')
+
+# Ubicación del script de Spark en S3
+SPARK_SCRIPT_S3_PATH = 's3://parcialfinal2025/app/script.py'
+
+# Etiqueta con la que se reconocen los clústeres reutilizables de este proyecto
+ETIQUETA_CLUSTER = {'Key': 'pipeline', 'Value': os.environ.get('EMR_ETIQUETA', 'noticias')}
+# y prefijo de su nombre: list_clusters trae el nombre, así que buscar_cluster solo
+# describe (para ver la etiqueta) los que ya coinciden y no todos los de la cuenta
+PREFIJO_CLUSTER = f"EMR-Spark-{ETIQUETA_CLUSTER['Value']}-"
+
+
+# Entrada de cada corrida (EMR_ENTRADA):
+#   'completa'    todo final/ o lo que indique el evento (por defecto)
+#   'incremental' solo las particiones del manifiesto nuevas desde la marca de agua (ver manifiesto.py)
+ENTRADAS = ('completa', 'incremental')
+
+
+def modo_configurado():
+    modo = os.environ.get('EMR_MODO', 'efimero')
+    if modo not in MODOS_EMR:
+        raise ValueError(f"EMR_MODO no soportado: {modo}. Opciones: {', '.join(MODOS_EMR)}")
+    return modo
+
+
+def entrada_configurada():
+    entrada = os.environ.get('EMR_ENTRADA', 'completa')
+    if entrada not in ENTRADAS:
+        raise ValueError(f"EMR_ENTRADA no soportado: {entrada}. Opciones: {', '.join(ENTRADAS)}")
+    return entrada
+
+
+def subred_configurada():
+    # Debes reemplazar esto con un ID de subred válido en tu VPC.
+    # El clúster EMR se lanzará en esta subred.
+    # Puedes obtenerlo desde la consola de VPC -> Subnets.
+    # Asegúrate de que la subred tenga acceso a S3 (e.g., a través de un NAT Gateway o S3 VPC Endpoint).
+    EC2_SUBNET_ID = os.environ.get('EC2_SUBNET_ID', 'subnet-xxxxxxxxxxxxxxxxx')
+    if EC2_SUBNET_ID == 'subnet-xxxxxxxxxxxxxxxxx':
+        logger.error("EC2_SUBNET_ID no está configurado correctamente. Por favor, actualiza la variable de entorno o el código.")
+        raise ValueError("EC2_SUBNET_ID no configurado.")
+    return EC2_SUBNET_ID
+
+
+def pasos_spark(accion_en_fallo):
     """
-    Lanza un clúster EMR, añade un paso para ejecutar un script de Spark y se configura para auto-terminarse.
+    Paso spark-submit del script, sin argumentos.
+
+    app/script.py procesa final/ completo y no acepta filtros por periódico o
+    fecha: los periodicos, fechas o particiones del evento solo acotan la
+    medida de la entrada (ver objetos_entrada), no lo que lee el paso.
+
+    Args:
+        accion_en_fallo (str): ActionOnFailure del paso.
+    Returns:
+        list[dict]: Pasos para run_job_flow o add_job_flow_steps.
     """
-    emr_client = boto3.client('emr')
+    return [{
+        'Name': 'Run Spark Application',
+        'ActionOnFailure': accion_en_fallo,
+        'HadoopJarStep': {
+            'Jar': 'command-runner.jar',
+            'Args': [
+                'spark-submit',
+                SPARK_SCRIPT_S3_PATH
+                # Puedes añadir más argumentos para spark-submit aquí si es necesario
+                # Por ejemplo:
+                # '--deploy-mode', 'cluster',
+                # '--conf', 'spark.executor.memory=2g',
+            ]
+        }
+    }]
+
+
+def buscar_cluster(emr_client):
+    """
+    Busca un clúster encendido con ETIQUETA_CLUSTER; prefiere los que esperan pasos.
+
+    Solo se describen los clústeres cuyo nombre empieza con PREFIJO_CLUSTER,
+    en orden de preferencia y hasta dar con uno etiquetado (normalmente uno).
+
+    Returns:
+        dict | None: Descripción del clúster (describe_cluster) o None.
+    """
+    candidatos = []
+    marcador = None
+    while True:
+        parametros = {'ClusterStates': ['WAITING', 'RUNNING']}
+        if marcador:
+            parametros['Marker'] = marcador
+        listado = emr_client.list_clusters(**parametros)
+        candidatos += [r for r in listado.get('Clusters', []) if r.get('Name', '').startswith(PREFIJO_CLUSTER)]
+        marcador = listado.get('Marker')
+        if not marcador:
+            break
+    candidatos.sort(key=lambda r: r['Status']['State'] != 'WAITING')
+    for resumen in candidatos:
+        cluster = emr_client.describe_cluster(ClusterId=resumen['Id'])['Cluster']
+        if ETIQUETA_CLUSTER in cluster.get('Tags', []):
+            return cluster
+    return None
+
+
+# Dimensionamiento (EMR_DIMENSIONAMIENTO):
+#   'fijo'    un nodo core m5.xlarge bajo demanda (por defecto)
+#   'volumen' mide la entrada pendiente en final/ y elige la cantidad de nodos core,
+#             con flotas de instancias spot (respaldo bajo demanda) y escalado administrado
+DIMENSIONAMIENTOS = ('fijo', 'volumen')
+BUCKET = 'parcialfinal2025'
+
+# Tipos equivalentes para la flota core: más tipos = más capacidad spot disponible
+TIPOS_FLOTA_CORE = ('m5.xlarge', 'm5a.xlarge', 'm6i.xlarge', 'r5.xlarge')
+
+# El almacenamiento (S3 o local) se elige con ALMACEN, ver almacen.py
+s3 = None
 
+
+def cliente_s3():
+    global s3
+    if s3 is None:
+        from almacen import crear_cliente
+        s3 = crear_cliente()
+    return s3
+
+
+def dimensionamiento_configurado():
+    dimensionamiento = os.environ.get('EMR_DIMENSIONAMIENTO', 'fijo')
+    if dimensionamiento not in DIMENSIONAMIENTOS:
+        raise ValueError(
+            f"EMR_DIMENSIONAMIENTO no soportado: {dimensionamiento}. Opciones: {', '.join(DIMENSIONAMIENTOS)}"
+        )
+    return dimensionamiento
+
+
+def objetos_entrada(s3, event, bucket=BUCKET):
+    """
+    Objetos de final/ que van a leer los pasos del evento.
+
+    Si el evento trae 'particiones' (del manifiesto) se listan todos los archivos
+    de esos días, también los de snapshots anteriores a la marca de agua: el
+    resumen se reescribe con el día completo. Si trae 'periodicos' o 'fechas'
+    solo se listan esos; si no, todo final/.
+
+    Args:
+        s3: Cliente de almacenamiento (ver almacen.crear_cliente).
+        event (dict): Evento de la Lambda.
+        bucket (str): Bucket de datos.
+    Returns:
+        generator[dict]: Objetos con 'Key' y 'Size'.
+    """
+    from almacen import listar_objetos
+
+    if event.get('particiones'):
+        for periodico, fecha in event['particiones']:
+            yield from listar_objetos(s3, bucket, 'final/periodico={}/year={}/month={}/day={}/'.format(periodico, *fecha.split('-')))
+        return
+    prefijos = [f'final/periodico={p}/' for p in event.get('periodicos') or []] or ['final/']
+    dias = {
+        '/year={}/month={}/day={}/'.format(*fecha.split('-'))
+        for fecha in event.get('fechas') or []
+    }
+    for prefijo in prefijos:
+        for obj in listar_objetos(s3, bucket, prefijo):
+            if dias and not any(dia in obj['Key'] for dia in dias):
+                continue
+            yield obj
+
+
+def medir_entrada(s3, event, bucket=BUCKET):
+    """
+    Mide la entrada pendiente en final/ (ver objetos_entrada): objetos, bytes y particiones.
+
+    Returns:
+        dict: {'objetos', 'bytes', 'particiones'}.
+    """
+    return medir_objetos(objetos_entrada(s3, event, bucket))
+
+
+def medir_objetos(objetos):
+    """Objetos, bytes y particiones de una lista de objetos de final/ (Key, Size)."""
+    medida = {'objetos': 0, 'bytes': 0, 'particiones': 0}
+    particiones = set()
+    for obj in objetos:
+        medida['objetos'] += 1
+        medida['bytes'] += obj.get('Size', 0)
+        # Los archivos por snapshot (hour=HH/) son de la misma partición diaria
+        particiones.add(obj['Key'].rsplit('/', 1)[0].split('/hour=')[0])
+    medida['particiones'] = len(particiones)
+    return medida
+
+
+def umbral_en_proceso():
+    """
+    Bytes de entrada (AGREGACION_UMBRAL_BYTES) por debajo de los cuales la
+    agregación correría dentro de la Lambda en lugar de en EMR.
+
+    Por ahora solo se acepta 0: agregacion.py no es el trabajo que corre en EMR
+    (app/script.py, que no está en este repositorio) y daría otra salida. El
+    camino en proceso queda deshabilitado hasta portar ese script con una
+    prueba de paridad.
+    """
+    umbral = int(os.environ.get('AGREGACION_UMBRAL_BYTES', 0))
+    if umbral != 0:
+        raise ValueError(
+            f"AGREGACION_UMBRAL_BYTES no soportado: {umbral}. La agregación en proceso está "
+            f"deshabilitada hasta portar app/script.py; Opciones: 0"
+        )
+    return umbral
+
+
+def nodos_para(medida):
+    """
+    Nodos core para la entrada medida: uno por EMR_BYTES_POR_NODO (2 GiB por
+    defecto), entre EMR_NODOS_MIN y EMR_NODOS_MAX.
+    """
+    bytes_por_nodo = int(os.environ.get('EMR_BYTES_POR_NODO', 2 * 1024 ** 3))
+    minimo = int(os.environ.get('EMR_NODOS_MIN', 1))
+    maximo = int(os.environ.get('EMR_NODOS_MAX', 20))
+    nodos = -(-medida['bytes'] // bytes_por_nodo)
+    return max(minimo, min(maximo, nodos))
+
+
+def flotas_instancias(nodos, subred):
+    """
+    Flotas de instancias: maestro bajo demanda y core con un nodo bajo demanda
+    (estable para HDFS) más el resto en spot. Si spot no llega a tiempo se pasa
+    a bajo demanda.
+    """
+    spot = {
+        'SpotSpecification': {
+            'TimeoutDurationMinutes': int(os.environ.get('EMR_SPOT_TIMEOUT_MINUTOS', 10)),
+            'TimeoutAction': 'SWITCH_TO_ON_DEMAND',
+            'AllocationStrategy': 'capacity-optimized',
+        }
+    }
+    bajo_demanda = min(int(os.environ.get('EMR_NODOS_BAJO_DEMANDA', 1)), nodos)
+    return {
+        'InstanceFleets': [
+            {
+                'Name': 'Master fleet',
+                'InstanceFleetType': 'MASTER',
+                'TargetOnDemandCapacity': 1,
+                'InstanceTypeConfigs': [{'InstanceType': 'm5.xlarge'}],
+            },
+            {
+                'Name': 'Core fleet',
+                'InstanceFleetType': 'CORE',
+                'TargetOnDemandCapacity': bajo_demanda,
+                'TargetSpotCapacity': nodos - bajo_demanda,
+                'InstanceTypeConfigs': [
+                    {'InstanceType': tipo, 'WeightedCapacity': 1} for tipo in TIPOS_FLOTA_CORE
+                ],
+                'LaunchSpecifications': spot,
+            },
+        ],
+        'Ec2SubnetIds': [subred],
+    }
+
+
+def politica_escalado(nodos):
+    """Escalado administrado entre EMR_NODOS_MIN y los nodos calculados para la entrada."""
+    minimo = min(int(os.environ.get('EMR_NODOS_MIN', 1)), nodos)
+    return {
+        'ComputeLimits': {
+            'UnitType': 'InstanceFleetUnits',
+            'MinimumCapacityUnits': minimo,
+            'MaximumCapacityUnits': nodos,
+            'MaximumOnDemandCapacityUnits': nodos,
+            'MaximumCoreCapacityUnits': nodos,
+        }
+    }
+
+
+def lanzar_cluster(emr_client, pasos, reutilizable, nodos=None):
+    """
+    Lanza un clúster EMR con los pasos dados.
+
+    Un clúster reutilizable queda encendido al terminar sus pasos (hasta el
+    IdleTimeout), acepta StepConcurrencyLevel pasos a la vez y lleva la
+    etiqueta con la que buscar_cluster lo encuentra. Con nodos (ver nodos_para)
+    usa flotas spot y escalado administrado en lugar de los grupos fijos.
+    """
     # --- Configuración del Clúster EMR ---
     # ¡IMPORTANTE! Reemplaza estos valores con tu configuración específica.
     EMR_RELEASE_LABEL = 'emr-6.15.0'  # O la versión más reciente que necesites
@@ -21,22 +304,15 @@ def app(event, context):
     CORE_INSTANCE_TYPE = 'm5.xlarge'
     CORE_INSTANCE_COUNT = 1  # Ajusta según tus necesidades (mínimo 1 para Spark)
     
-    # Debes reemplazar esto con un ID de subred válido en tu VPC.
-    # El clúster EMR se lanzará en esta subred.
-    # Puedes obtenerlo desde la consola de VPC -> Subnets.
-    # Asegúrate de que la subred tenga acceso a S3 (e.g., a través de un NAT Gateway o S3 VPC Endpoint).
-    EC2_SUBNET_ID = os.environ.get('EC2_SUBNET_ID', 'subnet-xxxxxxxxxxxxxxxxx') 
-    
+    EC2_SUBNET_ID = subred_configurada()
+
     # Roles IAM para EMR. Usualmente 'EMR_EC2_DefaultRole' y 'EMR_DefaultRole'.
     # Asegúrate de que estos roles existen y tienen los permisos necesarios.
     JOB_FLOW_ROLE = os.environ.get('EMR_EC2_DEFAULT_ROLE', 'EMR_EC2_DefaultRole')
     SERVICE_ROLE = os.environ.get('EMR_DEFAULT_ROLE', 'EMR_DefaultRole')
 
-    # Ubicación del script de Spark en S3
-    SPARK_SCRIPT_S3_PATH = 's3://parcialfinal2025/app/script.py'
-    
     # Nombre para el clúster EMR (puedes hacerlo dinámico)
-    cluster_name = f"EMR-Spark-Job-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    cluster_name = f"{PREFIJO_CLUSTER if reutilizable else 'EMR-Spark-Job-'}{datetime.now().strftime('%Y%m%d-%H%M%S')}"
     
     # Opcional: Bucket S3 para los logs del clúster EMR
     # Asegúrate de que este bucket exista y el rol de EMR tenga permisos para escribir en él.
@@ -46,79 +322,247 @@ def app(event, context):
     logger.info(f"Script de Spark a ejecutar: {SPARK_SCRIPT_S3_PATH}")
     logger.info(f"Subred EC2: {EC2_SUBNET_ID}")
 
-    if EC2_SUBNET_ID == 'subnet-xxxxxxxxxxxxxxxxx':
-        logger.error("EC2_SUBNET_ID no está configurado correctamente. Por favor, actualiza la variable de entorno o el código.")
-        raise ValueError("EC2_SUBNET_ID no configurado.")
+    opciones = {}
+    if reutilizable:
+        opciones['StepConcurrencyLevel'] = int(os.environ.get('EMR_CONCURRENCIA_PASOS', 4))
+        opciones['Tags'] = [ETIQUETA_CLUSTER]
 
-    try:
-        response = emr_client.run_job_flow(
-            Name=cluster_name,
-            LogUri=LOG_S3_URI, # Opcional, pero recomendado
-            ReleaseLabel=EMR_RELEASE_LABEL,
-            Instances={
-                'InstanceGroups': [
-                    {
-                        'Name': 'Master nodes',
-                        'Market': 'ON_DEMAND', # O 'SPOT'
-                        'InstanceRole': 'MASTER',
-                        'InstanceType': MASTER_INSTANCE_TYPE,
-                        'InstanceCount': 1,
-                    },
-                    {
-                        'Name': 'Core nodes',
-                        'Market': 'ON_DEMAND', # O 'SPOT'
-                        'InstanceRole': 'CORE',
-                        'InstanceType': CORE_INSTANCE_TYPE,
-                        'InstanceCount': CORE_INSTANCE_COUNT,
-                    }
-                ],
-                'Ec2KeyName': os.environ.get('EC2_KEY_NAME', ''), # Opcional: si necesitas acceso SSH al clúster
-                'KeepJobFlowAliveWhenNoSteps': False, # Clave para que se termine automáticamente
-                'TerminationProtected': False, # Permite que se termine mediante API/Auto-terminación
-                'Ec2SubnetId': EC2_SUBNET_ID,
-                # 'EmrManagedMasterSecurityGroup': 'sg-xxxxxxxx', # Opcional: Especificar SGs
-                # 'EmrManagedSlaveSecurityGroup': 'sg-xxxxxxxx',  # Opcional: Especificar SGs
+    instancias = {
+        'InstanceGroups': [
+            {
+                'Name': 'Master nodes',
+                'Market': 'ON_DEMAND', # O 'SPOT'
+                'InstanceRole': 'MASTER',
+                'InstanceType': MASTER_INSTANCE_TYPE,
+                'InstanceCount': 1,
             },
-            Steps=[
-                {
-                    'Name': 'Run Spark Application',
-                    'ActionOnFailure': 'TERMINATE_CLUSTER', # Termina el clúster si el paso falla
-                    'HadoopJarStep': {
-                        'Jar': 'command-runner.jar',
-                        'Args': [
-                            'spark-submit',
-                            SPARK_SCRIPT_S3_PATH
-                            # Puedes añadir más argumentos para spark-submit aquí si es necesario
-                            # Por ejemplo:
-                            # '--deploy-mode', 'cluster',
-                            # '--conf', 'spark.executor.memory=2g',
-                            # 's3://pacialcorte3-2025/app/script.py',
-                            # 'arg1', 'arg2' # Argumentos para tu script
-                        ]
-                    }
-                }
-            ],
-            Applications=[{'Name': 'Spark'}], # Asegúrate de que Spark esté incluido
-            JobFlowRole=JOB_FLOW_ROLE, # Rol para las instancias EC2 del clúster
-            ServiceRole=SERVICE_ROLE,  # Rol para el servicio EMR
-            VisibleToAllUsers=True,
-            AutoTerminationPolicy={ # Política explícita de auto-terminación (opcional si KeepJobFlowAliveWhenNoSteps=False)
-                'IdleTimeout': int(os.environ.get('EMR_IDLE_TIMEOUT_SECONDS', 3600)) # Termina después de 1 hora de inactividad (si no hay pasos)
+            {
+                'Name': 'Core nodes',
+                'Market': 'ON_DEMAND', # O 'SPOT'
+                'InstanceRole': 'CORE',
+                'InstanceType': CORE_INSTANCE_TYPE,
+                'InstanceCount': CORE_INSTANCE_COUNT,
             }
+        ],
+        'Ec2KeyName': os.environ.get('EC2_KEY_NAME', ''), # Opcional: si necesitas acceso SSH al clúster
+        # Efímero: se termina al acabar sus pasos. Reutilizable: espera más pasos hasta el IdleTimeout
+        'KeepJobFlowAliveWhenNoSteps': reutilizable,
+        'TerminationProtected': False, # Permite que se termine mediante API/Auto-terminación
+        'Ec2SubnetId': EC2_SUBNET_ID,
+        # 'EmrManagedMasterSecurityGroup': 'sg-xxxxxxxx', # Opcional: Especificar SGs
+        # 'EmrManagedSlaveSecurityGroup': 'sg-xxxxxxxx',  # Opcional: Especificar SGs
+    }
+    if nodos is not None:
+        del instancias['InstanceGroups'], instancias['Ec2SubnetId']
+        instancias.update(flotas_instancias(nodos, EC2_SUBNET_ID))
+        opciones['ManagedScalingPolicy'] = politica_escalado(nodos)
+        logger.info(f"Flota core: {nodos} nodos (spot con respaldo bajo demanda).")
+
+    response = emr_client.run_job_flow(
+        Name=cluster_name,
+        LogUri=LOG_S3_URI, # Opcional, pero recomendado
+        ReleaseLabel=EMR_RELEASE_LABEL,
+        Instances=instancias,
+        Steps=pasos,
+        Applications=[{'Name': 'Spark'}], # Asegúrate de que Spark esté incluido
+        JobFlowRole=JOB_FLOW_ROLE, # Rol para las instancias EC2 del clúster
+        ServiceRole=SERVICE_ROLE,  # Rol para el servicio EMR
+        VisibleToAllUsers=True,
+        AutoTerminationPolicy={ # Política explícita de auto-terminación (opcional si KeepJobFlowAliveWhenNoSteps=False)
+            'IdleTimeout': int(os.environ.get('EMR_IDLE_TIMEOUT_SECONDS', 3600)) # Termina después de 1 hora de inactividad (si no hay pasos)
+        },
+        **opciones
+    )
+    return response['JobFlowId']
+
+
+# Estados finales de un paso de EMR distintos de COMPLETED
+ESTADOS_PASO_FALLIDO = ('CANCELLED', 'FAILED', 'INTERRUPTED')
+
+
+def estados_pasos(emr_client, job_flow_id):
+    """Estado de cada paso del clúster: {StepId: State}."""
+    estados = {}
+    parametros = {'ClusterId': job_flow_id}
+    while True:
+        respuesta = emr_client.list_steps(**parametros)
+        for paso in respuesta.get('Steps', []):
+            estados[paso['Id']] = paso['Status']['State']
+        if not respuesta.get('Marker'):
+            return estados
+        parametros['Marker'] = respuesta['Marker']
+
+
+def resultado_pasos(emr_client, en_curso):
+    """
+    Resultado de los pasos de un rango enviado a EMR (ver manifiesto.leer_en_curso).
+
+    Un paso que ya no aparece en el clúster cuenta como fallido.
+
+    Returns:
+        str: 'completados', 'fallidos' o 'en curso'.
+    """
+    estados = estados_pasos(emr_client, en_curso['jobFlowId'])
+    propios = [estados.get(step_id, 'FAILED') for step_id in en_curso['stepIds']]
+    if any(estado in ESTADOS_PASO_FALLIDO for estado in propios):
+        return 'fallidos'
+    if all(estado == 'COMPLETED' for estado in propios):
+        return 'completados'
+    return 'en curso'
+
+
+def ejecutar(emr_client, event, modo, dimensionamiento, umbral):
+    """
+    Ejecuta la agregación en la Lambda o en EMR según el tamaño de la entrada.
+
+    Args:
+        emr_client: Cliente de EMR.
+        event (dict): Evento (periodicos, fechas o particiones de los pasos).
+        modo (str): Modo de EMR (ver modo_configurado).
+        dimensionamiento (str): Ver dimensionamiento_configurado.
+        umbral (int): Ver umbral_en_proceso.
+    Returns:
+        dict: Cuerpo de la respuesta.
+    """
+    nodos = None
+    if dimensionamiento == 'volumen' or umbral:
+        objetos = list(objetos_entrada(cliente_s3(), event))
+        medida = medir_objetos(objetos)
+        contar('entrada_objetos', medida['objetos'])
+        contar('entrada_bytes', medida['bytes'], 'Bytes')
+        logger.info(
+            f"Entrada pendiente: {medida['objetos']} objetos, {medida['bytes']} bytes en "
+            f"{medida['particiones']} particiones."
         )
-        
-        job_flow_id = response['JobFlowId']
+        if medida['bytes'] < umbral:
+            from agregacion import agregar_en_proceso
+            with medir('agregacion_ms'):
+                salidas = agregar_en_proceso(cliente_s3(), BUCKET, [obj['Key'] for obj in objetos])
+            propiedad('motor', 'en_proceso')
+            logger.info(f"Agregación en proceso: {len(salidas)} resúmenes escritos, sin EMR.")
+            return {
+                'message': 'Agregación ejecutada en la Lambda',
+                'motor': 'en_proceso',
+                'salidas': salidas
+            }
+        if dimensionamiento == 'volumen':
+            nodos = nodos_para(medida)
+            logger.info(f"Flota core para la entrada: {nodos} nodos.")
+
+    subred_configurada()
+    if modo == 'efimero':
+        job_flow_id = lanzar_cluster(emr_client, pasos_spark('TERMINATE_CLUSTER'), reutilizable=False, nodos=nodos)
+        propiedad('motor', 'emr')
         logger.info(f"Clúster EMR lanzado con éxito. JobFlowId: {job_flow_id}")
-        
+        return {
+            'message': 'Cluster EMR lanzado exitosamente',
+            'jobFlowId': job_flow_id
+        }
+
+    # En un clúster compartido un paso fallido no debe tumbar a los demás
+    pasos = pasos_spark('CONTINUE')
+    cluster = buscar_cluster(emr_client)
+    propiedad('motor', 'emr')
+    if cluster is None:
+        job_flow_id = lanzar_cluster(emr_client, pasos, reutilizable=True, nodos=nodos)
+        logger.info(f"No había clúster caliente; lanzado {job_flow_id} con {len(pasos)} pasos.")
+        return {
+            'message': 'Cluster EMR lanzado exitosamente',
+            'jobFlowId': job_flow_id,
+            'reutilizado': False
+        }
+
+    job_flow_id = cluster['Id']
+    concurrencia = int(os.environ.get('EMR_CONCURRENCIA_PASOS', 4))
+    if cluster.get('StepConcurrencyLevel', 1) != concurrencia:
+        emr_client.modify_cluster(ClusterId=job_flow_id, StepConcurrencyLevel=concurrencia)
+    # Un clúster caliente con flotas crece (o se achica) según la entrada de estos pasos
+    if nodos is not None and cluster.get('InstanceCollectionType') == 'INSTANCE_FLEET':
+        emr_client.put_managed_scaling_policy(ClusterId=job_flow_id, ManagedScalingPolicy=politica_escalado(nodos))
+    respuesta = emr_client.add_job_flow_steps(JobFlowId=job_flow_id, Steps=pasos)
+    logger.info(f"{len(pasos)} pasos agregados al clúster caliente {job_flow_id}.")
+    return {
+        'message': 'Pasos agregados a un cluster EMR existente',
+        'jobFlowId': job_flow_id,
+        'stepIds': respuesta['StepIds'],
+        'reutilizado': True
+    }
+
+
+@perfilar
+@instrumentar
+def app(event, context):
+    """
+    Ejecuta el script de Spark (app/script.py) en EMR.
+
+    Con EMR_ENTRADA=incremental y un evento sin periodicos ni fechas solo corre
+    si hay particiones del manifiesto posteriores a la marca de agua. El rango
+    queda en curso con sus pasos y la corrida siguiente avanza la marca si
+    terminaron bien, o lo vuelve a procesar si alguno falló (mientras sigan
+    corriendo no lanza nada). Un evento con periodicos/fechas no toca la marca.
+
+    En modo 'efimero' lanza un clúster que se auto-termina; en modo
+    'reutilizar' agrega los pasos a un clúster caliente y solo lanza uno si no
+    hay. La agregación en proceso (ver umbral_en_proceso) está deshabilitada.
+    """
+    import boto3  # Se importa aquí para no pagarlo en el arranque en frío
+    emr_client = contar_llamadas(boto3.client('emr'), 'emr')
+
+    event = event or {}
+    modo = modo_configurado()
+    dimensionamiento = dimensionamiento_configurado()
+    entrada = entrada_configurada()
+    umbral = umbral_en_proceso()
+    # Sin camino en proceso todo va a EMR: la subred se valida antes de tocar nada.
+    # Con umbral, ejecutar la valida solo si la entrada termina en EMR
+    if not umbral:
+        subred_configurada()
+
+    try:
+        lote = None
+        if entrada == 'incremental' and not (event.get('periodicos') or event.get('fechas')):
+            from manifiesto import confirmar, descartar_en_curso, leer_en_curso, pendientes
+            en_curso = leer_en_curso(cliente_s3(), BUCKET)
+            if en_curso is not None:
+                resultado = resultado_pasos(emr_client, en_curso)
+                if resultado == 'en curso':
+                    logger.info(f"Los pasos de {en_curso['jobFlowId']} siguen corriendo; no se lanza nada nuevo.")
+                    return {
+                        'statusCode': 200,
+                        'body': json.dumps({'message': 'Pasos anteriores en curso', 'jobFlowId': en_curso['jobFlowId']})
+                    }
+                if resultado == 'completados':
+                    confirmar(cliente_s3(), BUCKET, en_curso['hasta'], jobFlowId=en_curso['jobFlowId'])
+                else:
+                    logger.warning(f"Pasos fallidos en {en_curso['jobFlowId']}; sus particiones se vuelven a procesar.")
+                descartar_en_curso(cliente_s3(), BUCKET)
+            lote = pendientes(cliente_s3(), BUCKET, time.time())
+            if not lote['particiones']:
+                logger.info(f"Sin particiones nuevas desde {lote['desde'] or 'el inicio'}.")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({'message': 'Sin particiones nuevas', 'hasta': lote['hasta']})
+                }
+            event = dict(event, particiones=lote['particiones'])
+            logger.info(f"{len(lote['particiones'])} particiones nuevas desde {lote['desde'] or 'el inicio'}.")
+
+        cuerpo = ejecutar(emr_client, event, modo, dimensionamiento, umbral)
+
+        if lote is not None:
+            if cuerpo.get('jobFlowId'):
+                from manifiesto import registrar_en_curso
+                pasos = cuerpo.get('stepIds') or list(estados_pasos(emr_client, cuerpo['jobFlowId']))
+                registrar_en_curso(cliente_s3(), BUCKET, lote['hasta'], cuerpo['jobFlowId'], pasos)
+            else:
+                confirmar(cliente_s3(), BUCKET, lote['hasta'])
+            cuerpo['particiones'] = len(lote['particiones'])
         return {
             'statusCode': 200,
-            'body': json.dumps({
-                'message': 'Cluster EMR lanzado exitosamente',
-                'jobFlowId': job_flow_id
-            })
+            'body': json.dumps(cuerpo)
         }
 
     except Exception as e:
+        contar('errores')
         logger.error(f"Error al lanzar el clúster EMR: {str(e)}")
         return {
             'statusCode': 500,
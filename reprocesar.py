@@ -0,0 +1,159 @@
+"""
+Reprocesamiento en lote de los HTML crudos de raw/ hacia final/.
+
+Ejemplo:
+    python reprocesar.py --desde 2025-05-01 --hasta 2025-05-31 --periodico eltiempo
+    python reprocesar.py --local /tmp/s3 --procesos 4
+
+Para cada periódico y día se procesa solo el último snapshot, que es el que
+queda en final/ cuando los eventos se procesan en orden; con
+PARTICION_SALIDA=hora cada snapshot tiene su archivo y se procesan todos. El
+parseo, que es intensivo en CPU, se reparte en un pool de procesos.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import proyecto1
+from periodicos import PERIODICOS, extractor_para_clave
+from almacen import AlmacenLocal, listar_claves
+from senales import id_corrida
+
+BUCKET = 'parcialfinal2025'
+PREFIJO_RAW = 'raw/'
+
+
+def seleccionar_snapshots(claves, desde=None, hasta=None, periodicos=None, todos=False):
+    """
+    Filtra los HTML crudos por fecha y periódico y deja el último de cada día.
+
+    Args:
+        claves (iterable[str]): Claves de raw/.
+        desde (date): Primer día incluido.
+        hasta (date): Último día incluido.
+        periodicos (set[str]): Periódicos a incluir; todos si es None.
+        todos (bool): Deja todos los snapshots del día, no solo el último.
+    Returns:
+        list[str]: Claves a procesar, ordenadas.
+    """
+    ultimos = {}
+    seleccionados = []
+    for key in claves:
+        if not key.endswith('.html'):
+            continue
+        compilado = extractor_para_clave(key)
+        corrida = id_corrida(key)
+        if compilado is None or corrida is None:
+            continue
+        if periodicos and compilado.nombre not in periodicos:
+            continue
+        dia = date.fromisoformat(corrida[:10])
+        if (desde and dia < desde) or (hasta and dia > hasta):
+            continue
+        if todos:
+            seleccionados.append(key)
+            continue
+        particion = (compilado.nombre, dia)
+        if particion not in ultimos or corrida > id_corrida(ultimos[particion]):
+            ultimos[particion] = key
+    return sorted(seleccionados or ultimos.values())
+
+
+def _iniciar_proceso(directorio_local):
+    # Cada proceso crea su propio cliente: los clientes de boto3 no se comparten entre procesos
+    proyecto1.s3 = AlmacenLocal(directorio_local) if directorio_local else None
+
+
+def _procesar(bucket, key, formato):
+    # Los snapshots se procesan en paralelo y sin orden: el índice de vistos no aplica
+    _, salidas, noticias = proyecto1.procesar_snapshot(bucket, key, formato, vistos='desactivado')
+    return salidas, noticias
+
+
+def reprocesar(bucket, claves, formato=None, procesos=None, directorio_local=None, cada=50):
+    """
+    Procesa los snapshots en un pool de procesos e imprime progreso y rendimiento.
+
+    Un snapshot que falla se reporta y no detiene el resto.
+
+    Args:
+        bucket (str): Bucket de datos.
+        claves (list[str]): Snapshots a procesar (ver seleccionar_snapshots).
+        formato (str): Formato de salida; por defecto FORMATO_SALIDA.
+        procesos (int): Tamaño del pool; por defecto un proceso por núcleo.
+        directorio_local (str): Directorio de AlmacenLocal si no se usa S3.
+        cada (int): Cada cuántos snapshots se imprime el progreso.
+    Returns:
+        dict: Resumen con snapshots, errores, noticias, salidas y segundos.
+    """
+    formato = formato or proyecto1.formato_configurado()
+    procesos = procesos or os.cpu_count() or 1
+    resumen = {'snapshots': 0, 'errores': [], 'noticias': 0, 'salidas': [], 'segundos': 0.0}
+    inicio = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                             initargs=(directorio_local,)) as pool:
+        futuros = {pool.submit(_procesar, bucket, key, formato): key for key in claves}
+        for hecho, futuro in enumerate(as_completed(futuros), start=1):
+            try:
+                salidas, noticias = futuro.result()
+                resumen['snapshots'] += 1
+                resumen['noticias'] += noticias
+                resumen['salidas'].extend(salidas)
+            except Exception as e:
+                resumen['errores'].append((futuros[futuro], str(e)))
+                print(f'Error en {futuros[futuro]}: {e}')
+            if hecho % cada == 0:
+                transcurrido = time.perf_counter() - inicio
+                print(f'{hecho}/{len(claves)} snapshots ({hecho / transcurrido:.1f}/s)')
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    resumen['salidas'].sort()
+    return resumen
+
+
+def imprimir_resumen(resumen, procesos):
+    segundos = resumen['segundos'] or 1e-9
+    print(f"Snapshots procesados: {resumen['snapshots']} ({len(resumen['errores'])} con error)")
+    print(f"Noticias extraídas: {resumen['noticias']}")
+    print(f"Archivos escritos en final/: {len(resumen['salidas'])}")
+    print(f"Tiempo: {resumen['segundos']:.1f} s con {procesos} procesos "
+          f"({resumen['snapshots'] / segundos:.1f} snapshots/s, {resumen['noticias'] / segundos:.0f} noticias/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reprocesa los HTML de raw/ hacia final/ en paralelo.')
+    parser.add_argument('--desde', type=date.fromisoformat, help='Primer día (AAAA-MM-DD)')
+    parser.add_argument('--hasta', type=date.fromisoformat, help='Último día (AAAA-MM-DD)')
+    parser.add_argument('--periodico', action='append', choices=[spec['nombre'] for spec in PERIODICOS],
+                        help='Periódico a incluir (se puede repetir); por defecto todos')
+    parser.add_argument('--formato', choices=proyecto1.FORMATOS_SALIDA, help='Por defecto FORMATO_SALIDA')
+    parser.add_argument('--procesos', type=int, help='Procesos del pool; por defecto uno por núcleo')
+    parser.add_argument('--bucket', default=BUCKET)
+    parser.add_argument('--local', metavar='DIRECTORIO', help='Usa AlmacenLocal en lugar de S3')
+    parser.add_argument('--iniciar-crawler', action='store_true',
+                        help="Inicia el crawler 'noticias' una vez al terminar")
+    args = parser.parse_args(argv)
+
+    s3 = AlmacenLocal(args.local) if args.local else proyecto1.cliente_s3()
+    claves = seleccionar_snapshots(listar_claves(s3, args.bucket, PREFIJO_RAW), args.desde, args.hasta,
+                                   set(args.periodico) if args.periodico else None,
+                                   todos=proyecto1.particion_configurada() == 'hora')
+    print(f'{len(claves)} snapshots a procesar.')
+
+    procesos = args.procesos or os.cpu_count() or 1
+    resumen = reprocesar(args.bucket, claves, args.formato, procesos, args.local)
+    imprimir_resumen(resumen, procesos)
+
+    # Una sola corrida del crawler para todo el lote, no una por archivo
+    if args.iniciar_crawler and resumen['salidas']:
+        import proyecto2
+        proyecto2.app({'Records': [{'s3': {'object': {'key': resumen['salidas'][0]}}}]}, None)
+
+    return 1 if resumen['errores'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from almacen import listar_objetos
+
+# Manifiesto por corrida: cada periódico procesado deja una entrada en
+# control/corridas/<corrida>/<periodico>.json y el último en llegar escribe la
+# marca _COMPLETO con todas las salidas. La etapa siguiente se dispara con esa
+# marca en lugar de esperar un tiempo fijo. Un periódico que falla deja su
+# entrada con el error, y si alguno ni siquiera llegó la invocación programada
+# de proyecto2 cierra la corrida al vencer CORRIDA_PLAZO (ver completar_vencidas).
+# Si después un reintento de ese periódico termina bien (o llega tarde), la marca
+# se reescribe con sus salidas y vuelve a disparar la etapa siguiente.
+PREFIJO_CORRIDAS = 'control/corridas'
+MARCA_COMPLETO = '_COMPLETO'
+# El scraper declara qué periódicos trae cada corrida (los que no cambiaron no se suben)
+PREFIJO_ESPERADO = 'esperado='
+
+# Errores de S3 cuando la marca ya existe (escritura condicional con IfNoneMatch)
+CODIGOS_YA_EXISTE = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+# Segundos desde la hora de la corrida tras los que se marca completa con lo que haya
+PLAZO_CORRIDA = float(os.environ.get('CORRIDA_PLAZO', '3600'))
+
+
+def id_corrida(key):
+    """
+    Identifica la corrida de scraping a partir de la clave del HTML crudo.
+
+    Args:
+        key (str): Clave S3, p. ej. raw/contenido-eltiempo-2025-05-28-10-30.html.
+    Returns:
+        str | None: Marca de tiempo de la corrida (o solo la fecha si no hay hora).
+    """
+    nombre = key.split('/')[-1]
+    match = re.search(r'(\d{4}-\d{2}-\d{2}(?:-\d{2}-\d{2})?)', nombre)
+    return match.group(1) if match else None
+
+
+def hora_corrida(corrida):
+    """Hora (epoch, UTC) de una corrida; las que solo traen fecha cuentan desde la medianoche."""
+    formato = '%Y-%m-%d-%H-%M' if len(corrida) > len('AAAA-MM-DD') else '%Y-%m-%d'
+    return datetime.strptime(corrida, formato).replace(tzinfo=timezone.utc).timestamp()
+
+
+def clave_entrada(corrida, periodico):
+    return f'{PREFIJO_CORRIDAS}/{corrida}/{periodico}.json'
+
+
+def clave_marca(corrida):
+    return f'{PREFIJO_CORRIDAS}/{corrida}/{MARCA_COMPLETO}'
+
+
+def declarar_esperados(s3, bucket, corrida, periodicos):
+    """
+    Declara los periódicos que componen la corrida con objetos vacíos esperado=<periódico>.
+
+    Se llama antes de subir el HTML crudo para que la marca no dependa de
+    periódicos que el scraper omitió o no pudo descargar.
+    """
+    for periodico in periodicos:
+        s3.put_object(Bucket=bucket, Key=f'{PREFIJO_CORRIDAS}/{corrida}/{PREFIJO_ESPERADO}{periodico}', Body=b'')
+
+
+def es_marca_completo(key):
+    return key.startswith(f'{PREFIJO_CORRIDAS}/') and key.endswith(f'/{MARCA_COMPLETO}')
+
+
+def _codigo_error(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def registrar_salida(s3, bucket, corrida, periodico, salidas, esperados, error=None):
+    """
+    Registra las salidas de un periódico y marca la corrida como completa si ya están todos.
+
+    La entrada propia se escribe antes de listar, así que de dos procesos
+    concurrentes al menos el último ve las dos entradas; la marca se escribe
+    con IfNoneMatch='*' para que solo uno de ellos la cree.
+
+    Args:
+        s3: Cliente de almacenamiento (ver almacen.crear_cliente).
+        bucket (str): Bucket de datos.
+        corrida (str): Identificador de la corrida (ver id_corrida).
+        periodico (str): Periódico procesado.
+        salidas (list[str]): Claves escritas en final/.
+        esperados (iterable[str]): Periódicos de una corrida si el scraper no los declaró.
+        error (str): Motivo si el periódico falló; cuenta como procesado sin salidas.
+    Returns:
+        dict | None: Manifiesto completo si esta llamada escribió la marca.
+    """
+    entrada = {'periodico': periodico, 'salidas': salidas}
+    if error is not None:
+        entrada['error'] = error
+    s3.put_object(
+        Bucket=bucket,
+        Key=clave_entrada(corrida, periodico),
+        Body=json.dumps(entrada).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+    prefijo = f'{PREFIJO_CORRIDAS}/{corrida}/'
+    listado = s3.list_objects_v2(Bucket=bucket, Prefix=prefijo)
+    nombres = [obj['Key'][len(prefijo):] for obj in listado.get('Contents', [])]
+    presentes = {n[:-len('.json')] for n in nombres if n.endswith('.json')}
+    declarados = {n[len(PREFIJO_ESPERADO):] for n in nombres if n.startswith(PREFIJO_ESPERADO)}
+    esperados = declarados or set(esperados)
+    if not esperados <= presentes:
+        return None
+    return escribir_marca(s3, bucket, corrida, esperados)
+
+
+def escribir_marca(s3, bucket, corrida, presentes, faltantes=()):
+    """
+    Escribe la marca _COMPLETO con las salidas de los periódicos presentes.
+
+    Args:
+        s3: Cliente de almacenamiento.
+        bucket (str): Bucket de datos.
+        corrida (str): Identificador de la corrida.
+        presentes (iterable[str]): Periódicos con entrada en la corrida.
+        faltantes (iterable[str]): Declarados que no llegaron antes del plazo.
+    Returns:
+        dict | None: Manifiesto escrito, o None si otro proceso ya escribió una
+        marca igual de completa.
+    """
+    manifiesto = {'corrida': corrida, 'periodicos': {}}
+    errores = {}
+    for nombre in sorted(presentes):
+        entrada = json.loads(s3.get_object(Bucket=bucket, Key=clave_entrada(corrida, nombre))['Body'].read())
+        manifiesto['periodicos'][nombre] = entrada['salidas']
+        if 'error' in entrada:
+            errores[nombre] = entrada['error']
+    if errores:
+        manifiesto['errores'] = errores
+    if faltantes:
+        manifiesto['faltantes'] = sorted(faltantes)
+
+    try:
+        s3.put_object(
+            Bucket=bucket,
+            Key=clave_marca(corrida),
+            Body=json.dumps(manifiesto).encode('utf-8'),
+            ContentType='application/json',
+            IfNoneMatch='*'
+        )
+    except Exception as e:
+        if _codigo_error(e) not in CODIGOS_YA_EXISTE:
+            raise
+        # Solo se reemplaza una marca que daba por fallido o faltante a un periódico
+        # que ahora sí tiene salidas; reescribirla dispara otra vez la etapa siguiente
+        previo = json.loads(s3.get_object(Bucket=bucket, Key=clave_marca(corrida))['Body'].read())
+        if not _sin_resolver(manifiesto) < _sin_resolver(previo):
+            return None
+        s3.put_object(
+            Bucket=bucket,
+            Key=clave_marca(corrida),
+            Body=json.dumps(manifiesto).encode('utf-8'),
+            ContentType='application/json'
+        )
+    return manifiesto
+
+
+def _sin_resolver(manifiesto):
+    """Periódicos de un manifiesto que fallaron o no llegaron."""
+    return set(manifiesto.get('errores', {})) | set(manifiesto.get('faltantes', []))
+
+
+def completar_vencidas(s3, bucket, ahora, plazo=PLAZO_CORRIDA):
+    """
+    Marca completas las corridas sin marca que ya pasaron el plazo.
+
+    Cubre los periódicos declarados que nunca llegaron a proyecto1 (p. ej. si
+    falló la subida del HTML): la marca se escribe con lo que haya y la lista
+    de faltantes. Solo se revisan las corridas desde el día anterior al plazo,
+    así que el listado no crece con la historia.
+
+    Args:
+        s3: Cliente de almacenamiento.
+        bucket (str): Bucket de datos.
+        ahora (float): Hora actual en segundos (epoch).
+        plazo (float): Segundos de espera desde la hora de la corrida.
+    Returns:
+        list[dict]: Manifiestos escritos.
+    """
+    limite = datetime.fromtimestamp(ahora - plazo, tz=timezone.utc)
+    desde = f'{PREFIJO_CORRIDAS}/{limite - timedelta(days=1):%Y-%m-%d}'
+    corridas = {}
+    for obj in listar_objetos(s3, bucket, f'{PREFIJO_CORRIDAS}/', desde=desde):
+        corrida, nombre = obj['Key'][len(PREFIJO_CORRIDAS) + 1:].split('/', 1)
+        corridas.setdefault(corrida, []).append(nombre)
+
+    escritos = []
+    for corrida, nombres in sorted(corridas.items()):
+        if MARCA_COMPLETO in nombres or hora_corrida(corrida) > limite.timestamp():
+            continue
+        presentes = {n[:-len('.json')] for n in nombres if n.endswith('.json')}
+        declarados = {n[len(PREFIJO_ESPERADO):] for n in nombres if n.startswith(PREFIJO_ESPERADO)}
+        manifiesto = escribir_marca(s3, bucket, corrida, presentes, declarados - presentes)
+        if manifiesto:
+            print(f"Corrida {corrida} marcada completa al vencer el plazo; faltan: {', '.join(manifiesto.get('faltantes', [])) or 'ninguno'}.")
+            escritos.append(manifiesto)
+    return escritos
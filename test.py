@@ -2,7 +2,7 @@ import pytest
 import boto3
 from unittest.mock import patch, MagicMock
 from datetime import datetime
-from proyecto import app
+from proyecto import app, TIMEOUT_HTTP
 
 @pytest.fixture
 def mock_event():
@@ -44,6 +44,10 @@ def sample_publimetro_html():
     </html>
     """.encode('utf-8')
 
+def subidas_raw(mock_s3):
+    """Llamadas a put_object del HTML crudo (sin el estado del scraper ni las señales de corrida)"""
+    return [c for c in mock_s3.put_object.call_args_list if c[1]['Key'].startswith('raw/')]
+
 @pytest.fixture
 def mock_s3_client():
     """Mock para simular interacciones con S3"""
@@ -53,9 +57,9 @@ def mock_s3_client():
     return mock_s3
 
 @patch('proyecto.s3')
-@patch('proyecto.requests')
+@patch('proyecto.sesion')
 @patch('proyecto.datetime')
-def test_app_successful_downloads(mock_datetime, mock_requests, mock_s3, 
+def test_app_successful_downloads(mock_datetime, mock_sesion, mock_s3, 
                                   mock_event, mock_context, sample_eltiempo_html, 
                                   sample_publimetro_html, mock_s3_client):
     """Prueba descarga exitosa de ambos diarios"""
@@ -64,40 +68,42 @@ def test_app_successful_downloads(mock_datetime, mock_requests, mock_s3,
     mock_now.strftime.return_value = '2025-05-28-10-30'
     mock_datetime.utcnow.return_value = mock_now
     
-    # Mock de requests exitosos
+    # Mock de la sesión HTTP exitosos
     mock_response_eltiempo = MagicMock()
     mock_response_eltiempo.status_code = 200
+    mock_response_eltiempo.headers = {}
     mock_response_eltiempo.content = sample_eltiempo_html
     
     mock_response_publimetro = MagicMock()
     mock_response_publimetro.status_code = 200
+    mock_response_publimetro.headers = {}
     mock_response_publimetro.content = sample_publimetro_html
     
     # Configurar respuestas según la URL
-    def side_effect(url):
+    def side_effect(url, **kwargs):
         if 'eltiempo' in url:
             return mock_response_eltiempo
         elif 'publimetro' in url:
             return mock_response_publimetro
     
-    mock_requests.get.side_effect = side_effect
+    mock_sesion.get.side_effect = side_effect
     mock_s3.put_object.side_effect = mock_s3_client.put_object
     
     # Ejecutar función
     app(mock_event, mock_context)
     
     # Verificaciones
-    assert mock_requests.get.call_count == 2
-    assert mock_s3.put_object.call_count == 2
+    assert mock_sesion.get.call_count == 2
+    assert len(subidas_raw(mock_s3)) == 2
     
     # Verificar llamadas específicas
-    mock_requests.get.assert_any_call('https://www.eltiempo.com')
-    mock_requests.get.assert_any_call('https://www.publimetro.co/')
+    mock_sesion.get.assert_any_call('https://www.eltiempo.com', timeout=TIMEOUT_HTTP)
+    mock_sesion.get.assert_any_call('https://www.publimetro.co/', timeout=TIMEOUT_HTTP)
 
 @patch('proyecto.s3')
-@patch('proyecto.requests')
+@patch('proyecto.sesion')
 @patch('proyecto.datetime')
-def test_app_partial_failure(mock_datetime, mock_requests, mock_s3, 
+def test_app_partial_failure(mock_datetime, mock_sesion, mock_s3, 
                             mock_event, mock_context, sample_eltiempo_html):
     """Prueba cuando un diario falla y otro es exitoso"""
     # Mock del timestamp
@@ -105,34 +111,35 @@ def test_app_partial_failure(mock_datetime, mock_requests, mock_s3,
     mock_now.strftime.return_value = '2025-05-28-10-30'
     mock_datetime.utcnow.return_value = mock_now
     
-    # Mock de requests - uno exitoso, uno fallido
+    # Mock de la sesión HTTP - uno exitoso, uno fallido
     mock_response_success = MagicMock()
     mock_response_success.status_code = 200
+    mock_response_success.headers = {}
     mock_response_success.content = sample_eltiempo_html
     
     mock_response_failure = MagicMock()
     mock_response_failure.status_code = 404
     
-    def side_effect(url):
+    def side_effect(url, **kwargs):
         if 'eltiempo' in url:
             return mock_response_success
         elif 'publimetro' in url:
             return mock_response_failure
     
-    mock_requests.get.side_effect = side_effect
+    mock_sesion.get.side_effect = side_effect
     mock_s3.put_object.return_value = {}
     
     # Ejecutar función
     app(mock_event, mock_context)
     
     # Verificaciones
-    assert mock_requests.get.call_count == 2
-    assert mock_s3.put_object.call_count == 1  # Solo uno exitoso
+    assert mock_sesion.get.call_count == 2
+    assert len(subidas_raw(mock_s3)) == 1  # Solo uno exitoso
 
 @patch('proyecto.s3')
-@patch('proyecto.requests')
+@patch('proyecto.sesion')
 @patch('proyecto.datetime')
-def test_app_all_failures(mock_datetime, mock_requests, mock_s3, 
+def test_app_all_failures(mock_datetime, mock_sesion, mock_s3, 
                          mock_event, mock_context):
     """Prueba cuando ambos diarios fallan"""
     # Mock del timestamp
@@ -140,23 +147,23 @@ def test_app_all_failures(mock_datetime, mock_requests, mock_s3,
     mock_now.strftime.return_value = '2025-05-28-10-30'
     mock_datetime.utcnow.return_value = mock_now
     
-    # Mock de requests - ambos fallan
+    # Mock de la sesión HTTP - ambos fallan
     mock_response_failure = MagicMock()
     mock_response_failure.status_code = 500
     
-    mock_requests.get.return_value = mock_response_failure
+    mock_sesion.get.return_value = mock_response_failure
     
     # Ejecutar función
     app(mock_event, mock_context)
     
     # Verificaciones
-    assert mock_requests.get.call_count == 2
+    assert mock_sesion.get.call_count == 2
     assert mock_s3.put_object.call_count == 0  # Ninguno exitoso
 
 @patch('proyecto.s3')
-@patch('proyecto.requests')
+@patch('proyecto.sesion')
 @patch('proyecto.datetime')
-def test_app_s3_upload_failure(mock_datetime, mock_requests, mock_s3, 
+def test_app_s3_upload_failure(mock_datetime, mock_sesion, mock_s3, 
                               mock_event, mock_context, sample_eltiempo_html):
     """Prueba cuando la descarga es exitosa pero falla la subida a S3"""
     # Mock del timestamp
@@ -164,11 +171,12 @@ def test_app_s3_upload_failure(mock_datetime, mock_requests, mock_s3,
     mock_now.strftime.return_value = '2025-05-28-10-30'
     mock_datetime.utcnow.return_value = mock_now
     
-    # Mock de requests exitoso
+    # Mock de la sesión HTTP exitoso
     mock_response = MagicMock()
     mock_response.status_code = 200
+    mock_response.headers = {}
     mock_response.content = sample_eltiempo_html
-    mock_requests.get.return_value = mock_response
+    mock_sesion.get.return_value = mock_response
     
     # Mock de S3 que falla
     mock_s3.put_object.side_effect = Exception("Error de S3")
@@ -178,9 +186,9 @@ def test_app_s3_upload_failure(mock_datetime, mock_requests, mock_s3,
         app(mock_event, mock_context)
 
 @patch('proyecto.s3')
-@patch('proyecto.requests') 
+@patch('proyecto.sesion') 
 @patch('proyecto.datetime')
-def test_app_correct_s3_keys(mock_datetime, mock_requests, mock_s3,
+def test_app_correct_s3_keys(mock_datetime, mock_sesion, mock_s3,
                             mock_event, mock_context, sample_eltiempo_html):
     """Prueba que las keys de S3 se generen correctamente"""
     # Mock del timestamp específico
@@ -188,11 +196,12 @@ def test_app_correct_s3_keys(mock_datetime, mock_requests, mock_s3,
     mock_now.strftime.return_value = '2025-05-28-15-45'
     mock_datetime.utcnow.return_value = mock_now
     
-    # Mock de requests exitoso
+    # Mock de la sesión HTTP exitoso
     mock_response = MagicMock()
     mock_response.status_code = 200
+    mock_response.headers = {}
     mock_response.content = sample_eltiempo_html
-    mock_requests.get.return_value = mock_response
+    mock_sesion.get.return_value = mock_response
     
     mock_s3.put_object.return_value = {}
     
@@ -213,10 +222,133 @@ def test_app_correct_s3_keys(mock_datetime, mock_requests, mock_s3,
         }
     ]
     
-    assert mock_s3.put_object.call_count == 2
+    assert len(subidas_raw(mock_s3)) == 2
     # Verificar que se llamó con los parámetros correctos
-    for call in mock_s3.put_object.call_args_list:
+    for call in subidas_raw(mock_s3):
         call_kwargs = call[1]
         assert call_kwargs['Bucket'] == 'parcialfinal2025'
         assert call_kwargs['Key'].startswith('raw/contenido-')
-        assert '2025-05-28-15-45' in call_kwargs['Key']
\ No newline at end of file
+        assert '2025-05-28-15-45' in call_kwargs['Key']
+
+
+@patch('proyecto.s3')
+@patch('proyecto.sesion')
+def test_app_descargas_concurrentes(mock_sesion, mock_s3, mock_event, mock_context, sample_eltiempo_html):
+    """Prueba que el tiempo total sea el del diario más lento y no la suma"""
+    import time
+    import proyecto
+
+    diarios = {f'diario{i}': f'https://diario{i}.example.com' for i in range(8)}
+
+    def lento(url, **kwargs):
+        time.sleep(0.2)
+        return MagicMock(status_code=200, content=sample_eltiempo_html, headers={})
+
+    mock_sesion.get.side_effect = lento
+    with patch.dict(proyecto.DIARIOS, diarios, clear=True):
+        inicio = time.perf_counter()
+        subidos = app(mock_event, mock_context)
+        duracion = time.perf_counter() - inicio
+
+    assert len(subidos) == 8 and all(subidos)
+    assert duracion < 0.2 * 8 / 2
+
+@patch('proyecto.s3')
+@patch('proyecto.sesion')
+def test_app_error_de_red_no_detiene_la_corrida(mock_sesion, mock_s3, mock_event, mock_context, sample_eltiempo_html):
+    """Prueba que un timeout en un diario no impida subir los demás"""
+    import requests
+
+    def side_effect(url, **kwargs):
+        if 'eltiempo' in url:
+            raise requests.Timeout('lento')
+        return MagicMock(status_code=200, content=sample_eltiempo_html, headers={})
+
+    mock_sesion.get.side_effect = side_effect
+
+    subidos = app(mock_event, mock_context)
+
+    assert subidos[0] is None and subidos[1].startswith('raw/contenido-publimetro-')
+    assert len(subidas_raw(mock_s3)) == 1
+
+def test_sesion_http_pool_y_reintentos(monkeypatch):
+    """Prueba que la sesión compartida limite conexiones por host y reintente con jitter"""
+    import proyecto
+
+    monkeypatch.setattr(proyecto, 'sesion', None)
+    sesion = proyecto.sesion_http()
+    adaptador = sesion.get_adapter('https://www.eltiempo.com')
+
+    assert proyecto.sesion_http() is sesion
+    assert adaptador._pool_maxsize == proyecto.CONEXIONES_POR_HOST and adaptador._pool_block
+    assert adaptador.max_retries.total == proyecto.REINTENTOS_HTTP
+    assert adaptador.max_retries.backoff_jitter > 0
+    assert 503 in adaptador.max_retries.status_forcelist
+
+def test_app_omite_contenido_sin_cambios(monkeypatch, tmp_path, mock_event, mock_context,
+                                         sample_eltiempo_html, sample_publimetro_html):
+    """Prueba peticiones condicionales y que no se suba una portada que no cambió"""
+    import proyecto
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto, 's3', almacen)
+    sesion = MagicMock()
+    monkeypatch.setattr(proyecto, 'sesion', sesion)
+    paginas = {'https://www.eltiempo.com': sample_eltiempo_html, 'https://www.publimetro.co/': sample_publimetro_html}
+
+    def primera(url, **kwargs):
+        return MagicMock(status_code=200, content=paginas[url], headers={'ETag': f'"{len(url)}"'})
+
+    sesion.get.side_effect = primera
+    primeras = app(mock_event, mock_context)
+    assert all(primeras)
+
+    # El Tiempo responde 304; Publimetro ignora los validadores pero devuelve lo mismo
+    def segunda(url, **kwargs):
+        assert kwargs['headers'] == {'If-None-Match': f'"{len(url)}"'}
+        if 'eltiempo' in url:
+            return MagicMock(status_code=304, content=b'', headers={})
+        return MagicMock(status_code=200, content=paginas[url], headers={'ETag': f'"{len(url)}"'})
+
+    sesion.get.side_effect = segunda
+    with patch('proyecto.datetime') as mock_datetime:
+        mock_datetime.utcnow.return_value.strftime.return_value = '2099-01-01-00-00'
+        assert app(mock_event, mock_context) == [None, None]
+    assert almacen.list_objects_v2(Bucket='parcialfinal2025', Prefix='raw/contenido-eltiempo-2099') == {}
+    assert almacen.list_objects_v2(Bucket='parcialfinal2025', Prefix='control/corridas/2099') == {}
+
+    # Un cambio real sí se sube y solo ese diario queda declarado en la corrida
+    paginas['https://www.publimetro.co/'] = sample_publimetro_html + b'<!-- nuevo -->'
+    with patch('proyecto.datetime') as mock_datetime:
+        mock_datetime.utcnow.return_value.strftime.return_value = '2099-01-01-00-10'
+        assert app(mock_event, mock_context) == [None, 'raw/contenido-publimetro-2099-01-01-00-10.html']
+    claves = [o['Key'] for o in almacen.list_objects_v2(Bucket='parcialfinal2025', Prefix='control/corridas/2099')['Contents']]
+    assert claves == ['control/corridas/2099-01-01-00-10/esperado=publimetro']
+
+@patch('proyecto.s3')
+@patch('proyecto.sesion')
+def test_app_guarda_html_comprimido(mock_sesion, mock_s3, mock_event, mock_context, sample_eltiempo_html):
+    """Prueba que el HTML crudo se guarde en gzip con Content-Encoding y la misma clave .html"""
+    import gzip
+
+    mock_sesion.get.return_value = MagicMock(status_code=200, content=sample_eltiempo_html, headers={})
+
+    app(mock_event, mock_context)
+
+    for llamada in subidas_raw(mock_s3):
+        kwargs = llamada[1]
+        assert kwargs['Key'].endswith('.html')
+        assert kwargs['ContentEncoding'] == 'gzip'
+        assert gzip.decompress(kwargs['Body']) == sample_eltiempo_html
+
+@patch('proyecto.s3')
+@patch('proyecto.sesion')
+def test_app_sin_compresion(mock_sesion, mock_s3, monkeypatch, mock_event, mock_context, sample_eltiempo_html):
+    """Prueba que COMPRESION_RAW=ninguna guarde el HTML tal cual"""
+    monkeypatch.setenv('COMPRESION_RAW', 'ninguna')
+    mock_sesion.get.return_value = MagicMock(status_code=200, content=sample_eltiempo_html, headers={})
+
+    app(mock_event, mock_context)
+
+    assert all(c[1]['Body'] == sample_eltiempo_html and 'ContentEncoding' not in c[1] for c in subidas_raw(mock_s3))
@@ -1,43 +1,25 @@
 import pytest
-from unittest.mock import MagicMock, mock_open
+from unittest.mock import MagicMock
+import io
 from datetime import datetime
 import json
-import pandas as pd
 
-# --- CRITICAL CHANGE: Patch boto3.client before importing proyecto1 ---
-# This ensures that when proyecto1.s3 is initialized, it uses the mocked client.
-# We'll use a global mock object that will be reset per test if needed.
+import proyecto1
+from proyecto1 import app, parse_el_tiempo, extraer_noticias_publimetro, titulares_a_csv
+from senales import id_corrida
 
-# Create a mock for the S3 client that will be used globally by proyecto1
-# when it's imported.
+# Cliente S3 simulado compartido; proyecto1 crea el suyo de forma perezosa
+# y aquí se inyecta en proyecto1.s3 antes de cada prueba.
 mock_s3_instance_global = MagicMock()
-mock_s3_instance_global.download_file.return_value = None
-mock_s3_instance_global.upload_file.return_value = None
-mock_s3_instance_global.head_object.return_value = {'ContentLength': 123, 'ContentType': 'text/html'} # Crucial for 404
-
-# Now, patch boto3.client BEFORE importing proyecto1
-# The 's3' variable in proyecto1 will receive this mock instance.
-import boto3 # Import boto3 here to patch it
-original_boto3_client = boto3.client # Store original for cleanup, though pytest handles it
-boto3.client = MagicMock(return_value=mock_s3_instance_global)
-
-# Now, import proyecto1. Its global 's3' will be the mocked one.
-from proyecto1 import app, parse_el_tiempo, extraer_noticias_publimetro
-
-# Restore original boto3.client after import to avoid interfering with other modules if any,
-# though pytest's isolation generally handles this.
-boto3.client = original_boto3_client # This might not be strictly necessary with pytest, but good practice.
-
-# --- END CRITICAL CHANGE ---
+mock_s3_instance_global.put_object.return_value = {}
+mock_s3_instance_global.head_object.return_value = {'ContentLength': 123, 'ContentType': 'text/html'}
 
 
 @pytest.fixture(autouse=True) # This fixture will run automatically for every test
-def reset_mocks():
+def reset_mocks(monkeypatch):
     """Resets the state of the global mock_s3_instance_global before each test."""
     mock_s3_instance_global.reset_mock()
-    # If you have other shared mocks, reset them here too.
-    # For example, if app also calls boto3.client('lambda') globally, you'd need to mock that too.
-    # For now, assuming lambda client is created within the app function.
+    monkeypatch.setattr(proyecto1, 's3', mock_s3_instance_global)
 
 
 @pytest.fixture
@@ -181,9 +163,8 @@ def test_app_success(mocker, newspaper_type, request, mock_context, mock_lambda_
     }.get(service))
 
 
-    # Also patch time.sleep and builtins.open using mocker for this test's scope
+    # Also patch time.sleep using mocker for this test's scope
     mocker.patch('time.sleep', return_value=None)
-    mock_open_func = mocker.patch('builtins.open', new_callable=mock_open)
 
 
     # Determine event and HTML content based on newspaper_type
@@ -196,7 +177,7 @@ def test_app_success(mocker, newspaper_type, request, mock_context, mock_lambda_
         html_content = request.getfixturevalue("sample_publimetro_html")
         expected_periodico = 'publimetro'
 
-    mock_open_func.return_value.read.return_value = html_content
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(html_content.encode('utf-8'))}
 
     # Ejecutar función
     result = app(event, mock_context)
@@ -204,9 +185,14 @@ def test_app_success(mocker, newspaper_type, request, mock_context, mock_lambda_
     # Verificaciones
     assert result['statusCode'] == 200
     assert f'final/periodico={expected_periodico}/year=2025/month=05/day=28/titulares.csv' in result['body']
-    mock_s3_instance_global.download_file.assert_called_once()
-    mock_s3_instance_global.upload_file.assert_called_once()
-    mock_lambda_client.invoke.assert_called_once()
+    mock_s3_instance_global.get_object.assert_called_once_with(Bucket='parcialfinal2025', Key=event['Records'][0]['s3']['object']['key'])
+    claves = [c[1]['Key'] for c in mock_s3_instance_global.put_object.call_args_list]
+    assert claves[0] == f'final/periodico={expected_periodico}/year=2025/month=05/day=28/titulares.csv'
+    assert claves[1].startswith('control/manifiesto/') and claves[1].endswith(f'-{expected_periodico}.json')
+    assert claves[2:] == [
+        f'control/corridas/{id_corrida(event["Records"][0]["s3"]["object"]["key"])}/{expected_periodico}.json',
+    ]
+    mock_lambda_client.invoke.assert_not_called()
 
 
 # Individual tests that need specific mocking configurations
@@ -228,9 +214,7 @@ def test_app_non_html_file(mocker, mock_s3_event_non_html, mock_context):
 def test_app_no_news_extracted(mocker, mock_s3_event_eltiempo, mock_context, sample_empty_html):
     """Prueba cuando no se extraen noticias del HTML"""
     mocker.patch('boto3.client', return_value=mock_s3_instance_global) # Ensure any future call to boto3.client gets the global mock
-    mock_open_func = mocker.patch('builtins.open', new_callable=mock_open)
-    
-    mock_open_func.return_value.read.return_value = sample_empty_html
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(sample_empty_html.encode('utf-8'))}
     
     # Ejecutar función y esperar excepción
     with pytest.raises(ValueError, match="No se extrajo ninguna noticia"):
@@ -240,8 +224,6 @@ def test_app_no_news_extracted(mocker, mock_s3_event_eltiempo, mock_context, sam
 def test_app_invalid_date_format(mocker, mock_context, sample_eltiempo_html):
     """Prueba con formato de fecha inválido en el nombre del archivo"""
     mocker.patch('boto3.client', return_value=mock_s3_instance_global)
-    mock_open_func = mocker.patch('builtins.open', new_callable=mock_open)
-
     # Event con nombre de archivo sin fecha válida
     event_invalid_date = {
         'Records': [{
@@ -252,18 +234,17 @@ def test_app_invalid_date_format(mocker, mock_context, sample_eltiempo_html):
         }]
     }
     
-    mock_open_func.return_value.read.return_value = sample_eltiempo_html
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(sample_eltiempo_html.encode('utf-8'))}
     
     # Ejecutar función y esperar excepción
     with pytest.raises(ValueError, match="No se encontró una fecha válida"):
         app(event_invalid_date, mock_context)
+    mock_s3_instance_global.get_object.assert_not_called()
 
 
 def test_app_unknown_newspaper(mocker, mock_context, sample_eltiempo_html):
     """Prueba con periódico desconocido"""
     mocker.patch('boto3.client', return_value=mock_s3_instance_global)
-    mock_open_func = mocker.patch('builtins.open', new_callable=mock_open)
-
     # Event con nombre que no contiene 'eltiempo' ni 'publimetro'
     event_unknown = {
         'Records': [{
@@ -274,11 +255,31 @@ def test_app_unknown_newspaper(mocker, mock_context, sample_eltiempo_html):
         }]
     }
     
-    mock_open_func.return_value.read.return_value = sample_eltiempo_html
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(sample_eltiempo_html.encode('utf-8'))}
     
     # Ejecutar función y esperar excepción
     with pytest.raises(ValueError, match="No se pudo determinar el periódico"):
         app(event_unknown, mock_context)
+    mock_s3_instance_global.get_object.assert_not_called()
+
+
+def test_app_parsea_una_sola_vez(mocker, mock_s3_event_eltiempo, mock_context,
+                                 sample_eltiempo_html, mock_lambda_client):
+    """Prueba que el HTML se lea de memoria y se parsee exactamente una vez"""
+    import proyecto1
+    mocker.patch('boto3.client', return_value=mock_lambda_client)
+    mocker.patch('time.sleep', return_value=None)
+    espia = mocker.spy(proyecto1, 'crear_sopa')
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(sample_eltiempo_html.encode('utf-8'))}
+
+    result = app(mock_s3_event_eltiempo, mock_context)
+
+    assert result['statusCode'] == 200
+    assert espia.call_count == 1
+    mock_s3_instance_global.download_file.assert_not_called()
+    cuerpo = mock_s3_instance_global.put_object.call_args_list[0][1]['Body'].decode('utf-8')
+    assert cuerpo.splitlines()[0] == 'categoria,titulo,enlace'
+    assert 'Nueva ley aprobada en el congreso' in cuerpo
 
 def test_parse_el_tiempo_multiple_news(sample_eltiempo_html):
     """Prueba extracción de múltiples noticias de El Tiempo"""
@@ -296,9 +297,43 @@ def test_parse_el_tiempo_multiple_news(sample_eltiempo_html):
 def test_parse_el_tiempo_empty_html():
     """Prueba con HTML vacío para El Tiempo"""
     noticias = parse_el_tiempo("<html><body></body></html>")
-    
+
     assert len(noticias) == 0
 
+def test_parse_el_tiempo_golden(sample_eltiempo_html):
+    """Prueba que la salida de El Tiempo sea exactamente la esperada"""
+    assert parse_el_tiempo(sample_eltiempo_html) == [
+        {'categoria': 'Politica', 'titulo': 'Nueva ley aprobada en el congreso',
+         'enlace': 'https://www.eltiempo.com/politica/congreso/nueva-ley-aprobada'},
+        {'categoria': 'Deportes', 'titulo': 'Colombia gana importante partido',
+         'enlace': 'https://www.eltiempo.com/deportes/futbol/colombia-gana-partido'},
+        {'categoria': 'Economia', 'titulo': 'Nuevos datos sobre economía nacional',
+         'enlace': 'https://www.eltiempo.com/economia/inflacion/datos-economia'},
+        {'categoria': 'Tecnologia', 'titulo': 'Noticia desde JSON-LD',
+         'enlace': 'https://www.eltiempo.com/tecnologia/ciencia/descubrimiento-cientifico'},
+    ]
+
+def test_parse_el_tiempo_golden_selectores():
+    """Prueba el orden de salida: enlaces generales, luego por selector y sin duplicados"""
+    html = """
+    <html><body>
+        <div class="news-block"><a href="/galerias/images/fotos-del-partido">Fotos del partido de la seleccion</a></div>
+        <article><a href="/videos/assets/resumen-del-dia">Resumen del dia en video completo</a></article>
+        <a href="/cultura/libros/feria-del-libro">Feria del libro abre sus puertas</a>
+        <a href="/cultura/libros/feria-del-libro-2">Feria del libro abre sus puertas!</a>
+        <div class="headline"><a href="/salud/x.jpg/nota">Corto</a></div>
+    </body></html>
+    """
+
+    assert parse_el_tiempo(html) == [
+        {'categoria': 'Cultura', 'titulo': 'Feria del libro abre sus puertas',
+         'enlace': 'https://www.eltiempo.com/cultura/libros/feria-del-libro'},
+        {'categoria': 'Videos', 'titulo': 'Resumen del dia en video completo',
+         'enlace': 'https://www.eltiempo.com/videos/assets/resumen-del-dia'},
+        {'categoria': 'Galerias', 'titulo': 'Fotos del partido de la seleccion',
+         'enlace': 'https://www.eltiempo.com/galerias/images/fotos-del-partido'},
+    ]
+
 def test_extraer_noticias_publimetro_multiple_sections(sample_publimetro_html):
     """Prueba extracción de noticias de diferentes secciones de Publimetro"""
     noticias = extraer_noticias_publimetro(sample_publimetro_html)
@@ -347,16 +382,255 @@ def test_extraer_noticias_publimetro_no_duplicates():
     assert len(noticias) == 1
     assert noticias[0]['titular'] == 'Noticia repetida'
 
-def test_csv_generation_format(mocker, sample_eltiempo_html):
+def test_csv_generation_format(sample_eltiempo_html):
     """Prueba que el CSV se genere con el formato correcto"""
-    # Patch pd.DataFrame.to_csv using mocker
-    mock_to_csv = mocker.patch('proyecto1.pd.DataFrame.to_csv')
-
     noticias = parse_el_tiempo(sample_eltiempo_html)
-    
-    # Simular creación de DataFrame y guardado
-    df = pd.DataFrame(noticias)
-    df.to_csv('/tmp/test.csv', index=False)
-    
-    # Verificar que to_csv se llamó con index=False
-    mock_to_csv.assert_called_with('/tmp/test.csv', index=False)
\ No newline at end of file
+    noticias.append({'categoria': 'Política, "Congreso"', 'titulo': 'Dos\nlíneas', 'enlace': 'https://www.eltiempo.com/x'})
+
+    cuerpo = titulares_a_csv(noticias)
+
+    assert cuerpo.decode('utf-8').startswith('categoria,titulo,enlace\n')
+    pd = pytest.importorskip('pandas')
+    assert cuerpo == pd.DataFrame(noticias).to_csv(index=False).encode('utf-8')
+
+def test_extraer_noticias_publimetro_categoria_ancestro_mas_cercano():
+    """Prueba que la categoría venga del primer 'c-overline' del ancestro más cercano que lo tenga"""
+    html = """
+    <html><body>
+        <span class="c-overline">Portada</span>
+        <div class="b-results-list">
+            <div><h3><a class="c-link" href="/noticias/uno">Primera noticia</a></h3></div>
+            <span class="c-overline">Resultados</span>
+        </div>
+        <div class="b-results-list">
+            <div><h3><a class="c-link" href="/noticias/dos">Segunda noticia</a></h3></div>
+        </div>
+    </body></html>
+    """
+
+    noticias = extraer_noticias_publimetro(html)
+
+    assert [(n['titular'], n['categoria']) for n in noticias] == [
+        ('Primera noticia', 'Resultados'),
+        ('Segunda noticia', 'Portada'),
+    ]
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml", "html5lib"])
+def test_extractores_iguales_en_todos_los_parsers(parser, sample_eltiempo_html, sample_publimetro_html):
+    """Prueba que ambos extractores den la misma salida con cada backend de parseo"""
+    pytest.importorskip(parser)
+
+    assert parse_el_tiempo(sample_eltiempo_html, parser) == parse_el_tiempo(sample_eltiempo_html, 'html.parser')
+    assert (extraer_noticias_publimetro(sample_publimetro_html, parser) ==
+            extraer_noticias_publimetro(sample_publimetro_html, 'html.parser'))
+
+def test_parser_configurado_invalido(monkeypatch, sample_eltiempo_html):
+    """Prueba que un PARSER_HTML desconocido falle con un error claro"""
+    monkeypatch.setenv('PARSER_HTML', 'regex')
+
+    with pytest.raises(ValueError, match="PARSER_HTML no soportado"):
+        parse_el_tiempo(sample_eltiempo_html)
+
+def test_extractor_para_clave():
+    """Prueba que cada archivo de raw/ se asigne al periódico registrado"""
+    from periodicos import extractor_para_clave
+
+    assert extractor_para_clave('raw/contenido-eltiempo-2025-05-28-10-30.html').nombre == 'eltiempo'
+    assert extractor_para_clave('raw/contenido-publimetro-2025-05-28-10-30.html').nombre == 'publimetro'
+    assert extractor_para_clave('raw/contenido-unknown-2025-05-28.html') is None
+
+def test_periodico_declarado_como_datos():
+    """Prueba que un periódico nuevo se pueda declarar solo con datos"""
+    from bs4 import BeautifulSoup
+    from periodicos import compilar
+
+    spec = {
+        'nombre': 'elheraldo',
+        'patron_clave': r'elheraldo',
+        'url_base': 'https://www.elheraldo.co',
+        'campos': ('categoria', 'titulo', 'enlace'),
+        'reglas_enlace': [
+            {'pasos': ['div.portada', ('h2', 'primero'), ('a[href]', 'primero')], 'elemento_categoria': 0},
+            {'pasos': ['a.titular[href]'], 'href_prefijo': '/', 'min_texto': 5, 'elemento_categoria': 'padre'},
+        ],
+        'reglas_categoria': {'fuente': 'overline', 'selector': 'span.seccion', 'por_defecto': 'General'},
+        'jsonld': None,
+        'deduplicacion': {'clave': 'titulo'},
+    }
+    html = """
+    <html><body>
+        <div class="portada">
+            <span class="seccion">Regional</span>
+            <h2><a href="/regional/puerto">Nuevo puerto en la ciudad</a></h2>
+            <h2><a href="/regional/otro">Segundo titular ignorado</a></h2>
+        </div>
+        <ul><li><a class="titular" href="/deportes/junior">Junior clasifica a la final</a></li></ul>
+        <ul><li><a class="titular" href="https://externo.com/x">Enlace externo</a></li></ul>
+    </body></html>
+    """
+
+    noticias = compilar(spec).extraer(BeautifulSoup(html, 'html.parser'))
+
+    assert noticias == [
+        {'categoria': 'Regional', 'titulo': 'Nuevo puerto en la ciudad', 'enlace': 'https://www.elheraldo.co/regional/puerto'},
+        {'categoria': 'Regional', 'titulo': 'Junior clasifica a la final', 'enlace': 'https://www.elheraldo.co/deportes/junior'},
+    ]
+
+def test_selector_no_soportado():
+    """Prueba que los selectores con combinadores se rechacen al compilar"""
+    from periodicos import Selector
+
+    with pytest.raises(ValueError, match="Selector no soportado"):
+        Selector('article > a')
+
+def test_app_salida_parquet(mocker, monkeypatch, mock_s3_event_publimetro, mock_context,
+                            sample_publimetro_html, mock_lambda_client):
+    """Prueba la salida Parquet con esquema explícito junto al CSV"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setenv('FORMATO_SALIDA', 'ambos')
+    mocker.patch('boto3.client', return_value=mock_lambda_client)
+    mocker.patch('time.sleep', return_value=None)
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(sample_publimetro_html.encode('utf-8'))}
+
+    result = app(mock_s3_event_publimetro, mock_context)
+
+    base = 'final/periodico=publimetro/year=2025/month=05/day=28/titulares'
+    subidos = {c[1]['Key']: c[1]['Body'] for c in mock_s3_instance_global.put_object.call_args_list
+               if c[1]['Key'].startswith('final/')}
+    assert set(subidos) == {f'{base}.csv', f'{base}.parquet'}
+    assert f'{base}.parquet' in result['body']
+
+    tabla = pq.read_table(io.BytesIO(subidos[f'{base}.parquet']))
+    # Mismas columnas que El Tiempo: la tabla de Parquet lee por nombre
+    assert tabla.column_names == ['categoria', 'titulo', 'enlace']
+    assert str(tabla.schema.field('categoria').type) == 'dictionary<values=string, indices=int32, ordered=0>'
+    assert tabla.column('titulo').to_pylist() == [n['titular'] for n in extraer_noticias_publimetro(sample_publimetro_html)]
+    assert pq.ParquetFile(io.BytesIO(subidos[f'{base}.parquet'])).metadata.row_group(0).column(0).compression == 'SNAPPY'
+
+def test_formato_salida_invalido(monkeypatch, mock_s3_event_eltiempo, mock_context):
+    """Prueba que un FORMATO_SALIDA desconocido falle con un error claro"""
+    monkeypatch.setenv('FORMATO_SALIDA', 'xlsx')
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(b'<html></html>')}
+
+    with pytest.raises(ValueError, match="FORMATO_SALIDA no soportado"):
+        app(mock_s3_event_eltiempo, mock_context)
+
+def test_app_marca_corrida_completa(monkeypatch, tmp_path, mock_s3_event_eltiempo, mock_context,
+                                    sample_eltiempo_html, sample_publimetro_html):
+    """Prueba que la marca _COMPLETO aparezca solo cuando todos los periódicos de la corrida terminaron"""
+    import json
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    almacen.put_object(Bucket='parcialfinal2025', Key='raw/contenido-eltiempo-2025-05-28-10-30.html', Body=sample_eltiempo_html)
+    almacen.put_object(Bucket='parcialfinal2025', Key='raw/contenido-publimetro-2025-05-28-10-30.html', Body=sample_publimetro_html)
+    marca = 'control/corridas/2025-05-28-10-30/_COMPLETO'
+
+    app(mock_s3_event_eltiempo, mock_context)
+    assert almacen.list_objects_v2(Bucket='parcialfinal2025', Prefix=marca) == {}
+
+    evento = {'Records': [{'s3': {'bucket': {'name': 'parcialfinal2025'},
+                                  'object': {'key': 'raw/contenido-publimetro-2025-05-28-10-30.html'}}}]}
+    app(evento, mock_context)
+    manifiesto = json.loads(almacen.get_object(Bucket='parcialfinal2025', Key=marca)['Body'].read())
+    assert manifiesto['periodicos'] == {
+        'eltiempo': ['final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv'],
+        'publimetro': ['final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv'],
+    }
+
+    # Reprocesar un archivo no vuelve a crear la marca (escritura condicional)
+    from senales import registrar_salida
+    assert registrar_salida(almacen, 'parcialfinal2025', '2025-05-28-10-30', 'eltiempo', [], ['eltiempo', 'publimetro']) is None
+
+def test_marca_con_periodicos_declarados(tmp_path):
+    """Prueba que la corrida se complete con los periódicos que declaró el scraper"""
+    from almacen import AlmacenLocal
+    from senales import declarar_esperados, registrar_salida
+
+    almacen = AlmacenLocal(str(tmp_path))
+    declarar_esperados(almacen, 'parcialfinal2025', '2025-05-28-10-30', ['publimetro'])
+
+    manifiesto = registrar_salida(almacen, 'parcialfinal2025', '2025-05-28-10-30', 'publimetro',
+                                  ['final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv'],
+                                  ['eltiempo', 'publimetro'])
+
+    assert manifiesto['periodicos'] == {'publimetro': ['final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv']}
+
+def test_app_periodico_fallido_completa_la_corrida(monkeypatch, tmp_path, mock_s3_event_eltiempo, mock_context,
+                                                   sample_eltiempo_html):
+    """Prueba que un periódico que falla cuente para la marca _COMPLETO con su error y que la excepción siga"""
+    import json
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    almacen.put_object(Bucket='parcialfinal2025', Key='raw/contenido-eltiempo-2025-05-28-10-30.html', Body=sample_eltiempo_html)
+    almacen.put_object(Bucket='parcialfinal2025', Key='raw/contenido-publimetro-2025-05-28-10-30.html', Body=b'<html></html>')
+    evento = {'Records': [{'s3': {'bucket': {'name': 'parcialfinal2025'},
+                                  'object': {'key': 'raw/contenido-publimetro-2025-05-28-10-30.html'}}}]}
+
+    with pytest.raises(ValueError, match="No se extrajo ninguna noticia"):
+        app(evento, mock_context)
+    app(mock_s3_event_eltiempo, mock_context)
+
+    marca = 'control/corridas/2025-05-28-10-30/_COMPLETO'
+    manifiesto = json.loads(almacen.get_object(Bucket='parcialfinal2025', Key=marca)['Body'].read())
+    assert manifiesto['periodicos'] == {
+        'eltiempo': ['final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv'],
+        'publimetro': [],
+    }
+    assert manifiesto['errores'] == {'publimetro': 'No se extrajo ninguna noticia.'}
+
+def test_app_reintento_exitoso_reescribe_la_marca(monkeypatch, tmp_path, mock_s3_event_eltiempo, mock_context,
+                                                  sample_eltiempo_html, sample_publimetro_html):
+    """Prueba que un reintento que termina bien reemplace el error en la marca _COMPLETO ya escrita"""
+    import json
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    clave = 'raw/contenido-publimetro-2025-05-28-10-30.html'
+    almacen.put_object(Bucket='parcialfinal2025', Key='raw/contenido-eltiempo-2025-05-28-10-30.html', Body=sample_eltiempo_html)
+    almacen.put_object(Bucket='parcialfinal2025', Key=clave, Body=b'<html></html>')
+    evento = {'Records': [{'s3': {'bucket': {'name': 'parcialfinal2025'}, 'object': {'key': clave}}}]}
+
+    with pytest.raises(ValueError):
+        app(evento, mock_context)
+    app(mock_s3_event_eltiempo, mock_context)
+    almacen.put_object(Bucket='parcialfinal2025', Key=clave, Body=sample_publimetro_html)
+    app(evento, mock_context)
+
+    marca = 'control/corridas/2025-05-28-10-30/_COMPLETO'
+    manifiesto = json.loads(almacen.get_object(Bucket='parcialfinal2025', Key=marca)['Body'].read())
+    assert manifiesto['periodicos']['publimetro'] == [
+        'final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv'
+    ]
+    assert 'errores' not in manifiesto
+
+def test_app_fallo_al_registrar_conserva_el_error(mock_context):
+    """Prueba que si no se puede registrar el fallo se propague la excepción original"""
+    mock_s3_instance_global.get_object.return_value = {'Body': io.BytesIO(b'<html></html>')}
+    mock_s3_instance_global.put_object.side_effect = ConnectionError("sin red")
+    evento = {'Records': [{'s3': {'bucket': {'name': 'parcialfinal2025'},
+                                  'object': {'key': 'raw/contenido-publimetro-2025-05-28-10-30.html'}}}]}
+
+    try:
+        with pytest.raises(ValueError, match="No se extrajo ninguna noticia"):
+            app(evento, mock_context)
+    finally:
+        mock_s3_instance_global.put_object.side_effect = None
+
+def test_app_lee_html_comprimido(mock_s3_event_eltiempo, mock_context, sample_eltiempo_html):
+    """Prueba que el HTML guardado con Content-Encoding: gzip se descomprima de forma transparente"""
+    import gzip
+
+    mock_s3_instance_global.get_object.return_value = {
+        'Body': io.BytesIO(gzip.compress(sample_eltiempo_html.encode('utf-8'))),
+        'ContentEncoding': 'gzip',
+    }
+
+    app(mock_s3_event_eltiempo, mock_context)
+
+    cuerpo = mock_s3_instance_global.put_object.call_args_list[0][1]['Body']
+    assert cuerpo == titulares_a_csv(parse_el_tiempo(sample_eltiempo_html))
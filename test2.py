@@ -2,8 +2,17 @@ import pytest
 import boto3
 from unittest.mock import patch, MagicMock
 from botocore.exceptions import ClientError
+import proyecto2
+from almacen import AlmacenLocal
 from proyecto2 import app
 
+@pytest.fixture(autouse=True)
+def almacen_local(monkeypatch, tmp_path):
+    """Estado del disparo agrupado en un directorio temporal, vacío en cada prueba"""
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto2, 's3', almacen)
+    return almacen
+
 @pytest.fixture
 def mock_context():
     """Context básico para Lambda"""
@@ -91,7 +100,7 @@ def mock_glue_client():
     mock_glue.exceptions.CrawlerRunningException = ClientError
     return mock_glue
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_single_csv_success(mock_boto3_client, s3_event_csv_valid, 
                                           mock_context, mock_glue_client):
     """Prueba inicio exitoso del crawler con un archivo CSV válido"""
@@ -105,7 +114,7 @@ def test_lambda_handler_single_csv_success(mock_boto3_client, s3_event_csv_valid
     mock_boto3_client.assert_called_once_with('glue')
     mock_glue_client.start_crawler.assert_called_once_with(Name='noticias')
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_multiple_csv_success(mock_boto3_client, s3_event_multiple_csv,
                                            mock_context, mock_glue_client):
     """Prueba con múltiples archivos CSV válidos"""
@@ -116,10 +125,10 @@ def test_lambda_handler_multiple_csv_success(mock_boto3_client, s3_event_multipl
     # Verificaciones
     assert result['statusCode'] == 200
     assert result['body'] == 'Evento procesado.'
-    # El crawler se debe intentar iniciar por cada archivo válido
-    assert mock_glue_client.start_crawler.call_count == 2
+    # Todos los archivos del evento se agrupan en una sola corrida del crawler
+    assert mock_glue_client.start_crawler.call_count == 1
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_crawler_already_running(mock_boto3_client, s3_event_csv_valid,
                                                mock_context):
     """Prueba cuando el crawler ya está corriendo"""
@@ -140,7 +149,7 @@ def test_lambda_handler_crawler_already_running(mock_boto3_client, s3_event_csv_
     assert result['body'] == 'Evento procesado.'
     mock_glue.start_crawler.assert_called_once()
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_glue_error(mock_boto3_client, s3_event_csv_valid,
                                   mock_context):
     """Prueba manejo de errores generales de Glue"""
@@ -158,7 +167,24 @@ def test_lambda_handler_glue_error(mock_boto3_client, s3_event_csv_valid,
     assert result['body'] == 'Evento procesado.'
     mock_glue.start_crawler.assert_called_once()
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
+def test_lambda_handler_parquet_success(mock_boto3_client, mock_context, mock_glue_client):
+    """Prueba que un archivo Parquet en final/ también inicie el crawler"""
+    mock_boto3_client.return_value = mock_glue_client
+    event = {
+        'Records': [{
+            's3': {
+                'object': {'key': 'final/periodico=eltiempo/year=2025/month=05/day=28/titulares.parquet'}
+            }
+        }]
+    }
+
+    result = app(event, mock_context)
+
+    assert result['statusCode'] == 200
+    mock_glue_client.start_crawler.assert_called_once_with(Name='noticias')
+
+@patch('boto3.client')
 def test_lambda_handler_csv_wrong_folder(mock_boto3_client, s3_event_csv_wrong_folder,
                                         mock_context, mock_glue_client):
     """Prueba que no se inicie el crawler para CSV en carpeta incorrecta"""
@@ -172,7 +198,7 @@ def test_lambda_handler_csv_wrong_folder(mock_boto3_client, s3_event_csv_wrong_f
     # No debe intentar iniciar el crawler
     mock_glue_client.start_crawler.assert_not_called()
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_non_csv_file(mock_boto3_client, s3_event_non_csv,
                                     mock_context, mock_glue_client):
     """Prueba que no se inicie el crawler para archivos que no son CSV"""
@@ -186,7 +212,7 @@ def test_lambda_handler_non_csv_file(mock_boto3_client, s3_event_non_csv,
     # No debe intentar iniciar el crawler
     mock_glue_client.start_crawler.assert_not_called()
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_mixed_files(mock_boto3_client, s3_event_mixed_files,
                                    mock_context, mock_glue_client):
     """Prueba con archivos mixtos (solo uno válido)"""
@@ -200,7 +226,7 @@ def test_lambda_handler_mixed_files(mock_boto3_client, s3_event_mixed_files,
     # Solo debe intentar iniciar el crawler una vez (para el archivo válido)
     mock_glue_client.start_crawler.assert_called_once_with(Name='noticias')
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_empty_event(mock_boto3_client, mock_context, mock_glue_client):
     """Prueba con evento vacío (sin records)"""
     empty_event = {'Records': []}
@@ -214,6 +240,20 @@ def test_lambda_handler_empty_event(mock_boto3_client, mock_context, mock_glue_c
     # No debe intentar iniciar el crawler
     mock_glue_client.start_crawler.assert_not_called()
 
+@patch('boto3.client')
+def test_lambda_handler_marca_corrida_completa(mock_boto3_client, mock_context, mock_glue_client):
+    """Prueba que la marca de corrida completa inicie el crawler y las entradas del manifiesto no"""
+    evento = {'Records': [
+        {'s3': {'object': {'key': 'control/corridas/2025-05-28-10-30/eltiempo.json'}}},
+        {'s3': {'object': {'key': 'control/corridas/2025-05-28-10-30/_COMPLETO'}}},
+    ]}
+    mock_boto3_client.return_value = mock_glue_client
+
+    result = app(evento, mock_context)
+
+    assert result['statusCode'] == 200
+    mock_glue_client.start_crawler.assert_called_once_with(Name='noticias')
+
 def test_csv_path_validation_final_folder():
     """Prueba validación de rutas - carpeta final/"""
     # Casos válidos
@@ -240,7 +280,7 @@ def test_csv_path_validation_invalid_cases():
         is_valid = path.startswith('final/') and path.endswith('.csv')
         assert not is_valid
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_crawler_name_consistency(mock_boto3_client, s3_event_csv_valid,
                                                 mock_context, mock_glue_client):
     """Prueba que se use consistentemente el nombre correcto del crawler"""
@@ -251,7 +291,7 @@ def test_lambda_handler_crawler_name_consistency(mock_boto3_client, s3_event_csv
     # Verificar que se use el nombre correcto
     mock_glue_client.start_crawler.assert_called_with(Name='noticias')
 
-@patch('proyecto2.boto3.client')
+@patch('boto3.client')
 def test_lambda_handler_return_format(mock_boto3_client, s3_event_csv_valid,
                                      mock_context, mock_glue_client):
     """Prueba formato de respuesta de la función Lambda"""
@@ -264,4 +304,91 @@ def test_lambda_handler_return_format(mock_boto3_client, s3_event_csv_valid,
     assert 'statusCode' in result
     assert 'body' in result
     assert result['statusCode'] == 200
-    assert isinstance(result['body'], str)
\ No newline at end of file
+    assert isinstance(result['body'], str)
+
+def evento(*keys):
+    return {'Records': [{'s3': {'object': {'key': key}}} for key in keys]}
+
+def test_llegadas_en_ventana_se_agrupan(mock_glue_client, monkeypatch):
+    """Prueba que las llegadas dentro de la ventana no inicien otra corrida hasta que esta pase"""
+    relojes = iter([1000.0, 1010.0, 1020.0, 1000.0 + proyecto2.VENTANA_CRAWLER + 1, 1000.0 + proyecto2.VENTANA_CRAWLER + 2])
+    monkeypatch.setattr(proyecto2.time, 'time', lambda: next(relojes))
+
+    with patch('boto3.client', return_value=mock_glue_client):
+        app(evento('final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv'), {})
+        app(evento('final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv'), {})
+        app(evento('control/corridas/2025-05-28-10-30/_COMPLETO'), {})
+        assert mock_glue_client.start_crawler.call_count == 1
+
+        # La invocación programada, ya fuera de la ventana, lanza una sola corrida de seguimiento
+        app({}, {})
+        assert mock_glue_client.start_crawler.call_count == 2
+        app({}, {})
+    assert mock_glue_client.start_crawler.call_count == 2
+
+def test_llegada_con_crawler_corriendo_queda_pendiente(mock_glue_client, monkeypatch):
+    """Prueba que lo que llega durante un crawl deje exactamente una corrida de seguimiento"""
+    relojes = iter([1000.0, 2000.0, 2001.0, 3000.0, 3001.0])
+    monkeypatch.setattr(proyecto2.time, 'time', lambda: next(relojes))
+    corriendo = ClientError({'Error': {'Code': 'CrawlerRunningException'}}, 'StartCrawler')
+    respuestas = iter([None, corriendo, corriendo, None])
+    iniciados = []
+
+    def start_crawler(Name):
+        respuesta = next(respuestas)
+        if respuesta is not None:
+            raise respuesta
+        iniciados.append(Name)
+
+    mock_glue_client.start_crawler.side_effect = start_crawler
+
+    with patch('boto3.client', return_value=mock_glue_client):
+        app(evento('final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv'), {})
+        app(evento('final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv'), {})  # corriendo
+        app(evento('final/periodico=publimetro/year=2025/month=05/day=29/titulares.csv'), {})  # sigue corriendo
+        app({}, {})  # terminó: una corrida de seguimiento
+        app({}, {})  # nada más pendiente
+
+    # La corrida inicial y una sola de seguimiento para las dos llegadas en curso
+    assert iniciados == ['noticias', 'noticias']
+    assert mock_glue_client.start_crawler.call_count == 4
+
+def test_registro_directo_no_inicia_crawler(mock_glue_client, monkeypatch):
+    """Prueba que con REGISTRO_PARTICIONES=directo el marcador de corrida completa no dispare el crawler"""
+    monkeypatch.setenv('REGISTRO_PARTICIONES', 'directo')
+
+    with patch('boto3.client', return_value=mock_glue_client) as cliente:
+        result = app(evento('control/corridas/2025-05-28-10-30/_COMPLETO'), {})
+
+    assert result['statusCode'] == 200
+    cliente.assert_not_called()
+    mock_glue_client.start_crawler.assert_not_called()
+
+def test_programada_completa_corridas_vencidas(almacen_local, mock_glue_client, monkeypatch):
+    """Prueba que la invocación programada marque completa una corrida a la que le faltó un periódico"""
+    import json
+    from senales import declarar_esperados, hora_corrida, registrar_salida
+
+    declarar_esperados(almacen_local, 'parcialfinal2025', '2025-05-28-10-30', ['eltiempo', 'publimetro'])
+    salidas = ['final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv']
+    registrar_salida(almacen_local, 'parcialfinal2025', '2025-05-28-10-30', 'eltiempo', salidas, [])
+    marca = 'control/corridas/2025-05-28-10-30/_COMPLETO'
+    relojes = iter([hora_corrida('2025-05-28-10-30') + 600, hora_corrida('2025-05-28-10-30') + 7200])
+    monkeypatch.setattr(proyecto2.time, 'time', lambda: next(relojes))
+
+    with patch('boto3.client', return_value=mock_glue_client):
+        app({}, {})  # dentro del plazo: se sigue esperando a publimetro
+        assert almacen_local.list_objects_v2(Bucket='parcialfinal2025', Prefix=marca) == {}
+        app({}, {})
+
+    manifiesto = json.loads(almacen_local.get_object(Bucket='parcialfinal2025', Key=marca)['Body'].read())
+    assert manifiesto['periodicos'] == {'eltiempo': salidas}
+    assert manifiesto['faltantes'] == ['publimetro']
+    mock_glue_client.start_crawler.assert_called_once_with(Name='noticias')
+
+    # publimetro llega tarde: la marca se reescribe con sus salidas
+    tardias = ['final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv']
+    assert registrar_salida(almacen_local, 'parcialfinal2025', '2025-05-28-10-30', 'publimetro', tardias, [])
+    manifiesto = json.loads(almacen_local.get_object(Bucket='parcialfinal2025', Key=marca)['Body'].read())
+    assert manifiesto['periodicos'] == {'eltiempo': salidas, 'publimetro': tardias}
+    assert 'faltantes' not in manifiesto
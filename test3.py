@@ -0,0 +1,294 @@
+import json
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+import proyecto3
+from proyecto3 import app
+
+@pytest.fixture(autouse=True)
+def entorno_emr(monkeypatch):
+    """Variables mínimas para lanzar un clúster; sin umbral (por defecto todo va a EMR) salvo que la prueba lo pida"""
+    monkeypatch.setenv('EC2_SUBNET_ID', 'subnet-0123456789abcdef0')
+    monkeypatch.setenv('EMR_LOG_BUCKET', 'zappalogs')
+    monkeypatch.delenv('AGREGACION_UMBRAL_BYTES', raising=False)
+
+@pytest.fixture
+def mock_emr_client():
+    """Mock del cliente de EMR sin clústeres encendidos"""
+    mock_emr = MagicMock()
+    mock_emr.run_job_flow.return_value = {'JobFlowId': 'j-NUEVO'}
+    mock_emr.list_clusters.return_value = {'Clusters': []}
+    mock_emr.add_job_flow_steps.return_value = {'StepIds': ['s-1', 's-2']}
+    return mock_emr
+
+def cluster(id_, estado, etiquetas, concurrencia=4):
+    return {'Cluster': {'Id': id_, 'Status': {'State': estado}, 'Tags': etiquetas, 'StepConcurrencyLevel': concurrencia}}
+
+def resumen(id_, estado, nombre=proyecto3.PREFIJO_CLUSTER + '20250528-165500'):
+    return {'Id': id_, 'Name': nombre, 'Status': {'State': estado}}
+
+@patch('boto3.client')
+def test_modo_efimero_lanza_cluster(mock_boto3_client, mock_emr_client):
+    """Prueba que por defecto se lance un clúster que se auto-termina con un solo paso"""
+    mock_boto3_client.return_value = mock_emr_client
+
+    result = app({}, {})
+
+    assert result['statusCode'] == 200
+    assert json.loads(result['body'])['jobFlowId'] == 'j-NUEVO'
+    kwargs = mock_emr_client.run_job_flow.call_args[1]
+    assert kwargs['Instances']['KeepJobFlowAliveWhenNoSteps'] is False
+    assert [p['ActionOnFailure'] for p in kwargs['Steps']] == ['TERMINATE_CLUSTER']
+    assert kwargs['Steps'][0]['HadoopJarStep']['Args'] == ['spark-submit', proyecto3.SPARK_SCRIPT_S3_PATH]
+    mock_emr_client.list_clusters.assert_not_called()
+
+@patch('boto3.client')
+def test_modo_reutilizar_agrega_pasos_a_cluster_caliente(mock_boto3_client, mock_emr_client, monkeypatch):
+    """Prueba que se prefiera un clúster etiquetado en espera y se le agregue el paso"""
+    monkeypatch.setenv('EMR_MODO', 'reutilizar')
+    monkeypatch.setenv('EMR_CONCURRENCIA_PASOS', '8')
+    mock_emr_client.list_clusters.return_value = {'Clusters': [
+        resumen('j-AJENO', 'WAITING', 'EMR-Spark-Job-20250528-165500'),
+        resumen('j-OCUPADO', 'RUNNING'),
+        resumen('j-LIBRE', 'WAITING'),
+    ]}
+    mock_emr_client.describe_cluster.side_effect = lambda ClusterId: {
+        'j-OCUPADO': cluster('j-OCUPADO', 'RUNNING', [proyecto3.ETIQUETA_CLUSTER]),
+        'j-LIBRE': cluster('j-LIBRE', 'WAITING', [proyecto3.ETIQUETA_CLUSTER]),
+    }[ClusterId]
+    mock_boto3_client.return_value = mock_emr_client
+
+    result = app({'periodicos': ['eltiempo', 'publimetro'], 'fechas': ['2025-05-28']}, {})
+
+    body = json.loads(result['body'])
+    assert result['statusCode'] == 200
+    assert body['jobFlowId'] == 'j-LIBRE' and body['reutilizado'] is True
+    # Solo se describe el preferido entre los que tienen el nombre del proyecto
+    mock_emr_client.describe_cluster.assert_called_once_with(ClusterId='j-LIBRE')
+    mock_emr_client.run_job_flow.assert_not_called()
+    mock_emr_client.modify_cluster.assert_called_once_with(ClusterId='j-LIBRE', StepConcurrencyLevel=8)
+    # app/script.py no acepta filtros: un solo paso sin argumentos aunque el evento traiga varios
+    pasos = mock_emr_client.add_job_flow_steps.call_args[1]['Steps']
+    assert [p['HadoopJarStep']['Args'] for p in pasos] == [['spark-submit', proyecto3.SPARK_SCRIPT_S3_PATH]]
+    assert pasos[0]['ActionOnFailure'] == 'CONTINUE'
+
+@patch('boto3.client')
+def test_modo_reutilizar_sin_cluster_lanza_uno_caliente(mock_boto3_client, mock_emr_client, monkeypatch):
+    """Prueba que sin clúster disponible se lance uno etiquetado que queda encendido"""
+    monkeypatch.setenv('EMR_MODO', 'reutilizar')
+    mock_boto3_client.return_value = mock_emr_client
+
+    result = app({}, {})
+
+    assert json.loads(result['body'])['reutilizado'] is False
+    kwargs = mock_emr_client.run_job_flow.call_args[1]
+    assert kwargs['Instances']['KeepJobFlowAliveWhenNoSteps'] is True
+    assert kwargs['StepConcurrencyLevel'] == 4
+    assert kwargs['Tags'] == [proyecto3.ETIQUETA_CLUSTER]
+    assert kwargs['Name'].startswith(proyecto3.PREFIJO_CLUSTER)
+
+def test_subred_sin_configurar(monkeypatch):
+    """Prueba que falte EC2_SUBNET_ID falle antes de llamar a EMR"""
+    monkeypatch.delenv('EC2_SUBNET_ID')
+
+    with patch('boto3.client'), pytest.raises(ValueError, match="EC2_SUBNET_ID no configurado"):
+        app({}, {})
+
+@pytest.fixture
+def final_local(monkeypatch, tmp_path):
+    """final/ local con 1 KiB de Publimetro y 10 bytes de El Tiempo, en días distintos"""
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    almacen.put_object(Bucket='parcialfinal2025', Key='final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv', Body=b'x' * 1024)
+    almacen.put_object(Bucket='parcialfinal2025', Key='final/periodico=eltiempo/year=2025/month=05/day=27/titulares.csv', Body=b'x' * 10)
+    monkeypatch.setattr(proyecto3, 's3', almacen)
+    monkeypatch.setenv('EMR_DIMENSIONAMIENTO', 'volumen')
+    return almacen
+
+def test_medir_entrada_por_evento(final_local):
+    """Prueba que la medida se limite a los periódicos y fechas del evento"""
+    assert proyecto3.medir_entrada(final_local, {}) == {'objetos': 2, 'bytes': 1034, 'particiones': 2}
+    assert proyecto3.medir_entrada(final_local, {'fechas': ['2025-05-28']}) == {'objetos': 1, 'bytes': 1024, 'particiones': 1}
+    assert proyecto3.medir_entrada(final_local, {'periodicos': ['eltiempo']})['bytes'] == 10
+
+def test_nodos_segun_volumen(monkeypatch):
+    """Prueba que los nodos crezcan con los bytes dentro de los límites configurados"""
+    monkeypatch.setenv('EMR_NODOS_MAX', '12')
+    gib = 1024 ** 3
+
+    assert proyecto3.nodos_para({'bytes': 0}) == 1
+    assert proyecto3.nodos_para({'bytes': 5 * gib}) == 3
+    assert proyecto3.nodos_para({'bytes': 500 * gib}) == 12
+
+@patch('boto3.client')
+def test_dimensionamiento_por_volumen_usa_flotas_spot(mock_boto3_client, mock_emr_client, final_local, monkeypatch):
+    """Prueba que un día pequeño use un nodo y un lote grande reparta en flotas spot con escalado"""
+    mock_boto3_client.return_value = mock_emr_client
+
+    app({}, {})
+    pequeno = mock_emr_client.run_job_flow.call_args[1]
+    core = pequeno['Instances']['InstanceFleets'][1]
+    assert (core['TargetOnDemandCapacity'], core['TargetSpotCapacity']) == (1, 0)
+    assert 'InstanceGroups' not in pequeno['Instances']
+
+    monkeypatch.setenv('EMR_BYTES_POR_NODO', '100')
+    app({}, {})
+    grande = mock_emr_client.run_job_flow.call_args[1]
+    core = grande['Instances']['InstanceFleets'][1]
+    assert (core['TargetOnDemandCapacity'], core['TargetSpotCapacity']) == (1, 10)
+    assert core['LaunchSpecifications']['SpotSpecification']['TimeoutAction'] == 'SWITCH_TO_ON_DEMAND'
+    assert grande['Instances']['Ec2SubnetIds'] == ['subnet-0123456789abcdef0']
+    assert grande['ManagedScalingPolicy']['ComputeLimits']['MaximumCapacityUnits'] == 11
+
+@patch('boto3.client')
+def test_cluster_caliente_ajusta_escalado(mock_boto3_client, mock_emr_client, final_local, monkeypatch):
+    """Prueba que al reutilizar un clúster con flotas se ajuste su escalado a la entrada"""
+    monkeypatch.setenv('EMR_MODO', 'reutilizar')
+    mock_emr_client.list_clusters.return_value = {'Clusters': [resumen('j-LIBRE', 'WAITING')]}
+    descripcion = cluster('j-LIBRE', 'WAITING', [proyecto3.ETIQUETA_CLUSTER])
+    descripcion['Cluster']['InstanceCollectionType'] = 'INSTANCE_FLEET'
+    mock_emr_client.describe_cluster.return_value = descripcion
+    mock_boto3_client.return_value = mock_emr_client
+
+    app({}, {})
+
+    politica = mock_emr_client.put_managed_scaling_policy.call_args[1]['ManagedScalingPolicy']
+    assert politica['ComputeLimits']['MaximumCapacityUnits'] == 1
+
+@pytest.fixture
+def titulares_local(monkeypatch, tmp_path):
+    """final/ local con titulares reales: El Tiempo en CSV y Publimetro en CSV y Parquet"""
+    from almacen import AlmacenLocal
+    from proyecto1 import titulares_a_csv, titulares_a_parquet
+
+    almacen = AlmacenLocal(str(tmp_path))
+    el_tiempo = [
+        {'categoria': 'Deportes', 'titulo': 'Gol', 'enlace': 'https://eltiempo.com/1'},
+        {'categoria': 'Deportes', 'titulo': 'Gol (repetido)', 'enlace': 'https://eltiempo.com/1'},
+        {'categoria': 'Economía', 'titulo': '007 ventas', 'enlace': 'https://eltiempo.com/2'},
+    ]
+    publimetro = [
+        {'categoria': 'Noticias', 'titular': 'Lluvias', 'link': 'https://publimetro.co/1'},
+        {'categoria': 'Noticias', 'titular': 'Tránsito', 'link': 'https://publimetro.co/2'},
+    ]
+    base = 'final/periodico={}/year=2025/month=05/day=28/titulares.{}'
+    almacen.put_object(Bucket='parcialfinal2025', Key=base.format('eltiempo', 'csv'), Body=titulares_a_csv(el_tiempo))
+    almacen.put_object(Bucket='parcialfinal2025', Key=base.format('publimetro', 'csv'), Body=b'categoria,titular,link\nviejo,x,y\n')
+    almacen.put_object(Bucket='parcialfinal2025', Key=base.format('publimetro', 'parquet'),
+                       Body=titulares_a_parquet(publimetro, ('categoria', 'titular', 'link')))
+    monkeypatch.setattr(proyecto3, 's3', almacen)
+    return almacen
+
+def leer_resumen(almacen, periodico):
+    clave = f'resumen/periodico={periodico}/year=2025/month=05/day=28/categorias.csv'
+    return almacen.get_object(Bucket='parcialfinal2025', Key=clave)['Body'].read().decode('utf-8')
+
+def test_agregar_en_proceso(titulares_local):
+    """Prueba el resumen de agregacion.py (todavía sin uso en proyecto3) con CSV y Parquet"""
+    from agregacion import agregar_en_proceso
+    from almacen import listar_claves
+
+    salidas = agregar_en_proceso(titulares_local, 'parcialfinal2025', listar_claves(titulares_local, 'parcialfinal2025', 'final/'))
+
+    assert len(salidas) == 2
+    assert leer_resumen(titulares_local, 'eltiempo') == (
+        'categoria,titulares,enlaces_unicos\nDeportes,2,1\nEconomía,1,1\n'
+    )
+    # Con CSV y Parquet en la misma partición se lee el Parquet
+    assert leer_resumen(titulares_local, 'publimetro') == 'categoria,titulares,enlaces_unicos\nNoticias,2,2\n'
+
+def test_agregacion_en_proceso_deshabilitada(titulares_local, monkeypatch):
+    """Prueba que un umbral distinto de 0 se rechace: todo va a EMR hasta portar app/script.py"""
+    monkeypatch.setenv('AGREGACION_UMBRAL_BYTES', str(64 * 1024 ** 2))
+
+    with patch('boto3.client'), pytest.raises(ValueError, match="AGREGACION_UMBRAL_BYTES no soportado"):
+        app({}, {})
+
+@patch('boto3.client')
+def test_entrada_va_a_emr(mock_boto3_client, mock_emr_client, titulares_local):
+    """Prueba que por defecto se lance el clúster y no se escriba nada en proceso"""
+    mock_boto3_client.return_value = mock_emr_client
+
+    result = app({'periodicos': ['eltiempo']}, {})
+
+    assert json.loads(result['body'])['jobFlowId'] == 'j-NUEVO'
+    assert list(titulares_local.list_objects_v2(Bucket='parcialfinal2025', Prefix='resumen/').get('Contents', [])) == []
+
+@patch('boto3.client')
+def test_entrada_incremental_desde_la_marca_de_agua(mock_boto3_client, mock_emr_client, monkeypatch, tmp_path):
+    """Prueba que solo se procese lo nuevo del manifiesto y la marca avance cuando los pasos terminan bien"""
+    import manifiesto
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto3, 's3', almacen)
+    monkeypatch.setenv('EMR_ENTRADA', 'incremental')
+    mock_boto3_client.return_value = mock_emr_client
+    ahora = 1748450000.0
+    monkeypatch.setattr(proyecto3.time, 'time', lambda: ahora)
+    base = 'final/periodico={}/year=2025/month=05/day={}/titulares.csv'
+    manifiesto.registrar(almacen, 'parcialfinal2025', 'eltiempo', [{'Key': base.format('eltiempo', '27'), 'Size': 10}], ahora - 3600)
+    manifiesto.registrar(almacen, 'parcialfinal2025', 'eltiempo', [{'Key': base.format('eltiempo', '28'), 'Size': 10}], ahora - 600)
+    manifiesto.registrar(almacen, 'parcialfinal2025', 'publimetro', [{'Key': base.format('publimetro', '28'), 'Size': 10}], ahora - 500)
+    # Todavía dentro del margen: queda para la siguiente corrida
+    manifiesto.registrar(almacen, 'parcialfinal2025', 'publimetro', [{'Key': base.format('publimetro', '29'), 'Size': 10}], ahora - 5)
+    manifiesto.confirmar(almacen, 'parcialfinal2025', manifiesto.clave_entrada(ahora - 3600, 'eltiempo'))
+
+    def pasos_en(estado):
+        return {'Steps': [{'Id': 's-a', 'Status': {'State': estado}}, {'Id': 's-b', 'Status': {'State': 'COMPLETED'}}]}
+
+    mock_emr_client.list_steps.return_value = pasos_en('RUNNING')
+    result = app({}, {})
+
+    assert json.loads(result['body'])['particiones'] == 2
+    assert len(mock_emr_client.run_job_flow.call_args[1]['Steps']) == 1
+    # La marca no avanza hasta que los pasos terminen
+    inicial = manifiesto.clave_entrada(ahora - 3600, 'eltiempo')
+    assert manifiesto.leer_marca_agua(almacen, 'parcialfinal2025') == {'hasta': inicial}
+    assert manifiesto.leer_en_curso(almacen, 'parcialfinal2025') == {
+        'hasta': manifiesto.clave_entrada(ahora - 500, 'publimetro'), 'jobFlowId': 'j-NUEVO', 'stepIds': ['s-a', 's-b'],
+    }
+
+    mock_emr_client.run_job_flow.reset_mock()
+    assert json.loads(app({}, {})['body'])['message'] == 'Pasos anteriores en curso'
+    mock_emr_client.run_job_flow.assert_not_called()
+
+    mock_emr_client.list_steps.return_value = pasos_en('COMPLETED')
+    assert json.loads(app({}, {})['body'])['message'] == 'Sin particiones nuevas'
+    mock_emr_client.run_job_flow.assert_not_called()
+    marca = manifiesto.leer_marca_agua(almacen, 'parcialfinal2025')
+    assert marca == {'hasta': manifiesto.clave_entrada(ahora - 500, 'publimetro'), 'jobFlowId': 'j-NUEVO'}
+    assert manifiesto.leer_en_curso(almacen, 'parcialfinal2025') is None
+
+    ahora += 120
+    assert json.loads(app({}, {})['body'])['particiones'] == 1
+    mock_emr_client.run_job_flow.assert_called_once()
+
+    # Un paso fallido no mueve la marca: la misma partición se vuelve a enviar
+    mock_emr_client.list_steps.return_value = pasos_en('FAILED')
+    mock_emr_client.run_job_flow.reset_mock()
+    assert json.loads(app({}, {})['body'])['particiones'] == 1
+    assert manifiesto.leer_marca_agua(almacen, 'parcialfinal2025') == marca
+    mock_emr_client.run_job_flow.assert_called_once()
+
+def test_incremental_mide_el_dia_completo(monkeypatch, tmp_path):
+    """Prueba que la entrada incremental incluya los snapshots del día anteriores a la marca de agua"""
+    import manifiesto
+    from almacen import AlmacenLocal
+
+    almacen = AlmacenLocal(str(tmp_path))
+    ahora = 1748450000.0
+    base = 'final/periodico=eltiempo/year=2025/month=05/day=28/hour={}/2025-05-28-{}-00.csv'
+    for hora, escrito in (('09', ahora - 3600), ('15', ahora - 600)):
+        almacen.put_object(Bucket='parcialfinal2025', Key=base.format(hora, hora), Body=b'x' * 10)
+        manifiesto.registrar(almacen, 'parcialfinal2025', 'eltiempo', [{'Key': base.format(hora, hora), 'Size': 10}], escrito)
+    manifiesto.confirmar(almacen, 'parcialfinal2025', manifiesto.clave_entrada(ahora - 3600, 'eltiempo'))
+
+    lote = manifiesto.pendientes(almacen, 'parcialfinal2025', ahora)
+
+    assert lote['particiones'] == [('eltiempo', '2025-05-28')]
+    assert proyecto3.medir_entrada(almacen, {'particiones': lote['particiones']}) == {
+        'objetos': 2, 'bytes': 20, 'particiones': 1,
+    }
@@ -0,0 +1,80 @@
+import gzip
+from unittest.mock import MagicMock
+
+import pytest
+
+import corpus
+from almacen import AlmacenLocal, abrir, crear_cliente, listar_claves
+
+BUCKET = 'parcialfinal2025'
+
+
+def test_crear_cliente_local(monkeypatch, tmp_path):
+    """Prueba que ALMACEN=local devuelva AlmacenLocal sobre ALMACEN_DIRECTORIO"""
+    monkeypatch.setenv('ALMACEN', 'local')
+    monkeypatch.setenv('ALMACEN_DIRECTORIO', str(tmp_path))
+
+    cliente = crear_cliente()
+
+    assert isinstance(cliente, AlmacenLocal)
+    assert cliente.directorio == str(tmp_path)
+
+
+def test_almacen_no_soportado(monkeypatch):
+    """Prueba que un ALMACEN desconocido falle con un error claro"""
+    monkeypatch.setenv('ALMACEN', 'ftp')
+
+    with pytest.raises(ValueError, match="ALMACEN no soportado"):
+        crear_cliente()
+
+
+def test_listar_claves_paginado():
+    """Prueba que se sigan todas las páginas de list_objects_v2"""
+    s3 = MagicMock()
+    s3.list_objects_v2.side_effect = [
+        {'Contents': [{'Key': 'raw/a.html'}], 'IsTruncated': True, 'NextContinuationToken': 't1'},
+        {'Contents': [{'Key': 'raw/b.html'}], 'IsTruncated': False},
+    ]
+
+    assert list(listar_claves(s3, BUCKET, 'raw/')) == ['raw/a.html', 'raw/b.html']
+    assert s3.list_objects_v2.call_args_list[1][1] == {'Bucket': BUCKET, 'Prefix': 'raw/', 'ContinuationToken': 't1'}
+
+
+def test_abrir_descomprime_gzip(tmp_path):
+    """Prueba que abrir entregue el contenido sin comprimir según Content-Encoding"""
+    almacen = AlmacenLocal(str(tmp_path))
+    almacen.put_object(Bucket=BUCKET, Key='raw/a.html', Body=gzip.compress(b'<html>a</html>'), ContentEncoding='gzip')
+    almacen.put_object(Bucket=BUCKET, Key='raw/b.html', Body=b'<html>b</html>')
+
+    assert abrir(almacen, BUCKET, 'raw/a.html').read() == b'<html>a</html>'
+    assert abrir(almacen, BUCKET, 'raw/b.html').read() == b'<html>b</html>'
+    assert almacen.list_objects_v2(Bucket=BUCKET, Prefix='')['Contents'] == [
+        {'Key': 'raw/a.html', 'Size': len(gzip.compress(b'<html>a</html>'))},
+        {'Key': 'raw/b.html', 'Size': len(b'<html>b</html>')},
+    ]
+
+
+def test_flujo_local_sin_mocks(monkeypatch, tmp_path, capsys):
+    """Prueba el flujo raw/ -> final/ -> marca de corrida completo sobre un directorio"""
+    import proyecto1
+    from flujo_local import main
+
+    monkeypatch.setattr(proyecto1, 's3', None)
+    # main fija ALMACEN y ALMACEN_DIRECTORIO; monkeypatch los restaura al terminar
+    monkeypatch.setenv('ALMACEN', 's3')
+    monkeypatch.setenv('ALMACEN_DIRECTORIO', 'almacen_local')
+    almacen = AlmacenLocal(str(tmp_path))
+    almacen.put_object(Bucket=BUCKET, Key='raw/contenido-eltiempo-2025-05-28-10-30.html',
+                       Body=gzip.compress(corpus.portada_el_tiempo(1).encode('utf-8')), ContentEncoding='gzip')
+    almacen.put_object(Bucket=BUCKET, Key='raw/contenido-publimetro-2025-05-28-10-30.html',
+                       Body=corpus.portada_publimetro(1).encode('utf-8'))
+
+    main(['--directorio', str(tmp_path), '--sin-descarga'])
+
+    salida = capsys.readouterr().out
+    assert 'HTML procesados: 2' in salida
+    assert 'Corrida completa: control/corridas/2025-05-28-10-30/_COMPLETO' in salida
+    assert [o['Key'] for o in almacen.list_objects_v2(Bucket=BUCKET, Prefix='final/')['Contents']] == [
+        'final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv',
+        'final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv',
+    ]
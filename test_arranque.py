@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Presupuesto de importación por handler, en milisegundos (arranque en frío)
+PRESUPUESTO_MS = float(os.environ.get('PRESUPUESTO_IMPORTACION_MS', '150'))
+
+# Dependencias que ningún handler debe cargar al importarse
+PESADAS = ('boto3', 'botocore', 'pandas', 'bs4', 'requests', 'pyarrow')
+
+SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({{'ms': ms, 'cargadas': [m for m in {pesadas!r} if m in sys.modules]}}))
+"""
+
+
+def medir_importacion(modulo):
+    """Importa el módulo en un intérprete nuevo y devuelve el tiempo y las dependencias cargadas."""
+    salida = subprocess.run(
+        [sys.executable, '-c', SCRIPT.format(modulo=modulo, pesadas=PESADAS)],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return json.loads(salida.stdout)
+
+
+@pytest.mark.parametrize("modulo", ["proyecto", "proyecto1", "proyecto2", "proyecto3"])
+def test_handler_no_carga_dependencias_pesadas(modulo):
+    """Prueba que importar el handler no cargue boto3, pandas, bs4, requests ni pyarrow"""
+    assert medir_importacion(modulo)['cargadas'] == []
+
+
+@pytest.mark.parametrize("modulo", ["proyecto", "proyecto1", "proyecto2", "proyecto3"])
+def test_handler_dentro_del_presupuesto(modulo):
+    """Prueba que el import del handler quepa en PRESUPUESTO_IMPORTACION_MS"""
+    ms = medir_importacion(modulo)['ms']
+    assert ms < PRESUPUESTO_MS, f"{modulo} tardó {ms:.0f} ms en importarse (presupuesto {PRESUPUESTO_MS:.0f} ms)"
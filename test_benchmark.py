@@ -0,0 +1,42 @@
+import json
+
+import benchmark
+
+
+def test_comparar_con_base():
+    """Prueba que solo se reporte lo que empeora más que la tolerancia"""
+    base = {
+        'eltiempo/app/x1': {'latencia_ms': 10.0, 'relativa': 1.0, 'memoria_kib': 100.0},
+        'publimetro/app/x1': {'latencia_ms': 10.0, 'relativa': 1.0, 'memoria_kib': 100.0},
+    }
+    # Una máquina tres veces más lenta no es una regresión si la referencia también lo es
+    resultados = {
+        'eltiempo/app/x1': {'latencia_ms': 36.0, 'relativa': 1.2, 'memoria_kib': 90.0, 'paginas_s': 27.8},
+        'publimetro/app/x1': {'latencia_ms': 27.0, 'relativa': 0.9, 'memoria_kib': 150.0, 'paginas_s': 37.0},
+        'publimetro/app/x100': {'latencia_ms': 900.0, 'relativa': 9.0, 'memoria_kib': 9000.0, 'paginas_s': 1.1},
+    }
+
+    assert benchmark.comparar_con_base(resultados, base, tolerancia=0.25) == [
+        'publimetro/app/x1 memoria_kib: 150.0 vs 100.0 (+50%)',
+    ]
+    assert len(benchmark.comparar_con_base(resultados, base, tolerancia=0.1)) == 2
+
+
+def test_suite_guarda_base_y_detecta_regresiones(tmp_path, capsys):
+    """Prueba la suite completa en escala 1: medidas de cada caso, base guardada y código de salida"""
+    base = tmp_path / 'base.json'
+
+    assert benchmark.main(['suite', '--escalas', '1', '--repeticiones', '1', '--base', str(base), '--guardar-base']) == 0
+    guardada = json.loads(base.read_text())
+    assert sorted(guardada) == [
+        'eltiempo/app/x1', 'eltiempo/extractor/x1', 'publimetro/app/x1', 'publimetro/extractor/x1',
+        'referencia/extractor/x1',
+    ]
+    # Solo se guardan medidas que no dependen de la máquina
+    assert all(sorted(m) == ['memoria_kib', 'relativa'] and m['memoria_kib'] > 0 for m in guardada.values())
+    assert guardada['referencia/extractor/x1']['relativa'] == 1.0
+
+    # Una base imposible de cumplir hace fallar la comparación
+    base.write_text(json.dumps({caso: {'relativa': 1e-6, 'memoria_kib': 1e-6} for caso in guardada}))
+    assert benchmark.main(['suite', '--escalas', '1', '--repeticiones', '1', '--base', str(base)]) == 1
+    assert 'REGRESIÓN eltiempo/app/x1 relativa' in capsys.readouterr().out
@@ -0,0 +1,124 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import catalogo
+from catalogo import entrada_particion, propiedades_proyeccion, registrar_particiones, valores_particion
+
+BUCKET = 'parcialfinal2025'
+CLAVE = 'final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv'
+
+
+@pytest.fixture
+def mock_glue(monkeypatch):
+    """Cliente de Glue simulado y caché de particiones vacía en cada prueba"""
+    glue = MagicMock()
+    glue.batch_create_partition.return_value = {'Errors': []}
+    monkeypatch.setattr(catalogo, 'glue', glue)
+    monkeypatch.setattr(catalogo, '_registradas', set())
+    return glue
+
+
+def test_valores_y_entrada_particion():
+    """Prueba la partición con su ubicación, formato y esquema conocidos"""
+    entrada = entrada_particion(BUCKET, CLAVE, ('categoria', 'titular', 'link'))
+
+    assert valores_particion(CLAVE) == ['publimetro', '2025', '05', '28']
+    assert entrada['Values'] == ['publimetro', '2025', '05', '28']
+    descriptor = entrada['StorageDescriptor']
+    assert descriptor['Location'] == 's3://parcialfinal2025/final/periodico=publimetro/year=2025/month=05/day=28/'
+    assert [c['Name'] for c in descriptor['Columns']] == ['categoria', 'titular', 'link']
+    assert descriptor['SerdeInfo']['SerializationLibrary'].endswith('OpenCSVSerde')
+    assert 'Columns' not in catalogo.FORMATOS_HIVE['csv']
+
+    with pytest.raises(ValueError, match="no está en una partición"):
+        valores_particion('raw/contenido-eltiempo-2025-05-28-10-30.html')
+
+
+def test_registrar_particiones_una_vez(mock_glue):
+    """Prueba que cada partición se registre una sola vez y que las existentes no fallen"""
+    parquet = CLAVE.replace('.csv', '.parquet')
+
+    creadas = registrar_particiones(BUCKET, [CLAVE, parquet], ('categoria', 'titular', 'link'))
+    registrar_particiones(BUCKET, [CLAVE], ('categoria', 'titular', 'link'))
+
+    assert creadas == [('final', ('publimetro', '2025', '05', '28')), ('final_parquet', ('publimetro', '2025', '05', '28'))]
+    assert mock_glue.batch_create_partition.call_count == 2
+    tablas = [c[1]['TableName'] for c in mock_glue.batch_create_partition.call_args_list]
+    assert tablas == ['final', 'final_parquet']
+    # El Parquet se escribe con las columnas comunes, no con las del periódico
+    entrada = mock_glue.batch_create_partition.call_args_list[1][1]['PartitionInputList'][0]
+    assert [c['Name'] for c in entrada['StorageDescriptor']['Columns']] == ['categoria', 'titulo', 'enlace']
+
+    catalogo._registradas.clear()
+    mock_glue.batch_create_partition.return_value = {
+        'Errors': [{'PartitionValues': ['publimetro', '2025', '05', '28'],
+                    'ErrorDetail': {'ErrorCode': 'AlreadyExistsException'}}]
+    }
+    assert registrar_particiones(BUCKET, [CLAVE], ('categoria', 'titular', 'link')) == []
+
+    catalogo._registradas.clear()
+    mock_glue.batch_create_partition.return_value = {'Errors': [{'ErrorDetail': {'ErrorCode': 'EntityNotFoundException'}}]}
+    with pytest.raises(RuntimeError, match="No se pudo registrar la partición"):
+        registrar_particiones(BUCKET, [CLAVE], ('categoria', 'titular', 'link'))
+
+
+def test_propiedades_proyeccion():
+    """Prueba que la plantilla de proyección coincida con las rutas que escribe proyecto1"""
+    propiedades = propiedades_proyeccion(BUCKET)
+
+    assert propiedades['projection.enabled'] == 'true'
+    assert propiedades['projection.periodico.values'] == 'eltiempo,publimetro'
+    ruta = (propiedades['storage.location.template']
+            .replace('${periodico}', 'publimetro').replace('${year}', '2025')
+            .replace('${month}', '05').replace('${day}', '28'))
+    assert ruta == f's3://{BUCKET}/' + CLAVE.rsplit('/', 1)[0] + '/'
+    assert "'projection.enabled'='true'" in catalogo.ddl_tabla(BUCKET)
+
+
+def test_proyecto1_registra_en_modo_directo(mock_glue, monkeypatch, tmp_path):
+    """Prueba que proyecto1 registre la partición al escribir cuando REGISTRO_PARTICIONES=directo"""
+    import corpus
+    import proyecto1
+    from almacen import AlmacenLocal
+
+    monkeypatch.setenv('REGISTRO_PARTICIONES', 'directo')
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    key = 'raw/contenido-publimetro-2025-05-28-10-30.html'
+    almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_publimetro(1).encode('utf-8'))
+
+    proyecto1.app({'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key}}}]}, {})
+
+    entrada = mock_glue.batch_create_partition.call_args[1]['PartitionInputList'][0]
+    assert entrada['Values'] == ['publimetro', '2025', '05', '28']
+
+
+def test_particion_por_hora_exige_registro_directo(mock_glue, monkeypatch, tmp_path):
+    """Prueba que PARTICION_SALIDA=hora se rechace si el catálogo lo mantiene el crawler"""
+    import corpus
+    import proyecto1
+    from almacen import AlmacenLocal
+
+    monkeypatch.setenv('PARTICION_SALIDA', 'hora')
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    key = 'raw/contenido-publimetro-2025-05-28-10-30.html'
+    almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_publimetro(1).encode('utf-8'))
+
+    with pytest.raises(ValueError, match='REGISTRO_PARTICIONES=directo'):
+        proyecto1.procesar_snapshot(BUCKET, key)
+
+    monkeypatch.setenv('REGISTRO_PARTICIONES', 'directo')
+    _, claves, _ = proyecto1.procesar_snapshot(BUCKET, key)
+    assert claves == ['final/periodico=publimetro/year=2025/month=05/day=28/hour=10/2025-05-28-10-30.csv']
+    entrada = mock_glue.batch_create_partition.call_args[1]['PartitionInputList'][0]
+    assert entrada['Values'] == ['publimetro', '2025', '05', '28']
+
+
+def test_registro_no_soportado(monkeypatch):
+    """Prueba que un REGISTRO_PARTICIONES desconocido falle con un error claro"""
+    monkeypatch.setenv('REGISTRO_PARTICIONES', 'manual')
+
+    with pytest.raises(ValueError, match="REGISTRO_PARTICIONES no soportado"):
+        catalogo.modo_configurado()
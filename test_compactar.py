@@ -0,0 +1,140 @@
+import io
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+import catalogo
+import corpus
+import compactar
+import proyecto1
+from agregacion import agregar_en_proceso
+from almacen import AlmacenLocal, listar_claves
+from catalogo import entrada_particion
+
+BUCKET = 'parcialfinal2025'
+PARTICION = 'final/periodico=eltiempo/year=2025/month=05/day=28/'
+
+
+@pytest.fixture
+def almacen(monkeypatch, tmp_path):
+    """Dos snapshots de El Tiempo del mismo día procesados con PARTICION_SALIDA=hora, en CSV y Parquet"""
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    monkeypatch.setenv('PARTICION_SALIDA', 'hora')
+    monkeypatch.setenv('REGISTRO_PARTICIONES', 'directo')
+    monkeypatch.setenv('FORMATO_SALIDA', 'ambos')
+    monkeypatch.setattr(catalogo, 'glue', MagicMock(**{'batch_create_partition.return_value': {'Errors': []}}))
+    monkeypatch.setattr(catalogo, '_registradas', set())
+    # El segundo snapshot repite todo lo del primero y trae titulares nuevos
+    for hora, escala in (('09-00', 1), ('15-45', 2)):
+        key = f'raw/contenido-eltiempo-2025-05-28-{hora}.html'
+        almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_el_tiempo(escala).encode('utf-8'))
+        proyecto1.procesar_snapshot(BUCKET, key)
+    return almacen
+
+
+def test_un_archivo_por_snapshot(almacen):
+    """Prueba que un segundo snapshot del mismo día no reemplace al primero"""
+    assert list(listar_claves(almacen, BUCKET, PARTICION)) == [
+        f'{PARTICION}hour=09/2025-05-28-09-00.csv',
+        f'{PARTICION}hour=09/2025-05-28-09-00.parquet',
+        f'{PARTICION}hour=15/2025-05-28-15-45.csv',
+        f'{PARTICION}hour=15/2025-05-28-15-45.parquet',
+    ]
+    # La partición de Glue sigue siendo la del día
+    entrada = entrada_particion(BUCKET, f'{PARTICION}hour=15/2025-05-28-15-45.csv', ('categoria', 'titulo', 'enlace'))
+    assert entrada['StorageDescriptor']['Location'] == f's3://{BUCKET}/{PARTICION}'
+
+
+def test_compactar_particion(almacen):
+    """Prueba que la compactación deje un archivo por formato, sin repetidos, ordenado y sin los de hour="""
+    pq = pytest.importorskip('pyarrow.parquet')
+    resumen_antes = agregar_en_proceso(almacen, BUCKET, listar_claves(almacen, BUCKET, PARTICION))
+    antes = almacen.get_object(Bucket=BUCKET, Key=resumen_antes[0])['Body'].read()
+
+    escritos = compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo'])
+
+    assert escritos == [f'{PARTICION}titulares.csv', f'{PARTICION}titulares.parquet']
+    assert list(listar_claves(almacen, BUCKET, PARTICION)) == escritos
+    esperado = sorted({tuple(n.values()) for n in proyecto1.parse_el_tiempo(corpus.portada_el_tiempo(2))})
+    campos = ('categoria', 'titulo', 'enlace')
+    csv = almacen.get_object(Bucket=BUCKET, Key=escritos[0])['Body'].read()
+    assert compactar.leer_filas(csv, 'csv', campos) == esperado
+    tabla = pq.read_table(io.BytesIO(almacen.get_object(Bucket=BUCKET, Key=escritos[1])['Body'].read()))
+    assert [tuple(f.values()) for f in tabla.to_pylist()] == esperado
+
+    # Los titulares repetidos ya contaban una vez: el resumen no cambia al compactar
+    agregar_en_proceso(almacen, BUCKET, listar_claves(almacen, BUCKET, PARTICION))
+    assert almacen.get_object(Bucket=BUCKET, Key=resumen_antes[0])['Body'].read() == antes
+
+
+def test_compactar_junta_snapshots_atrasados(almacen):
+    """Prueba que un snapshot que llega después de compactar se junte con lo ya compactado"""
+    compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo'])
+    key = 'raw/contenido-eltiempo-2025-05-28-23-10.html'
+    almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_el_tiempo(3).encode('utf-8'))
+    proyecto1.procesar_snapshot(BUCKET, key, 'csv')
+
+    compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo'])
+
+    assert list(listar_claves(almacen, BUCKET, PARTICION)) == [f'{PARTICION}titulares.csv', f'{PARTICION}titulares.parquet']
+    csv = almacen.get_object(Bucket=BUCKET, Key=f'{PARTICION}titulares.csv')['Body'].read()
+    esperado = {tuple(n.values()) for n in proyecto1.parse_el_tiempo(corpus.portada_el_tiempo(3))}
+    assert set(compactar.leer_filas(csv, 'csv', ('categoria', 'titulo', 'enlace'))) == esperado
+
+
+def test_app_compacta_dias_cerrados(almacen, monkeypatch):
+    """Prueba que la invocación programada revise los días anteriores a hoy y no el día en curso"""
+    monkeypatch.setattr(compactar, 's3', almacen)
+
+    assert compactar.dias_cerrados(date(2025, 5, 29), 2) == [date(2025, 5, 28), date(2025, 5, 27)]
+    respuesta = compactar.app({'fechas': ['2025-05-27']}, None)
+    assert respuesta['body'] == '{"compactados": []}'
+    assert len(list(listar_claves(almacen, BUCKET, PARTICION))) == 4
+
+
+def test_compacta_solo_lo_ya_agregado(almacen, monkeypatch):
+    """Prueba que la compactación espere a que la marca de agua pase la partición"""
+    import time
+
+    import manifiesto
+    import proyecto3
+
+    def agregar():
+        # Lo que hace proyecto3 en modo incremental cuando los pasos de EMR terminan bien
+        lote = manifiesto.pendientes(almacen, BUCKET, time.time())
+        manifiesto.confirmar(almacen, BUCKET, lote['hasta'])
+        return lote
+
+    monkeypatch.setattr(manifiesto, 'MARGEN', 0)
+    manifiesto.confirmar(almacen, BUCKET, '')
+
+    # Los dos snapshots siguen sin agregar: la partición no se toca
+    assert compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo']) == []
+    assert len(list(listar_claves(almacen, BUCKET, PARTICION))) == 4
+
+    agregar()
+    assert len(compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo'])) == 2
+
+    # Un snapshot atrasado vuelve a dejar la partición pendiente hasta la corrida siguiente
+    key = 'raw/contenido-eltiempo-2025-05-28-23-10.html'
+    almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_el_tiempo(3).encode('utf-8'))
+    proyecto1.procesar_snapshot(BUCKET, key, 'csv')
+    assert compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo']) == []
+
+    # La entrada de esa corrida es el día completo: lo compactado más el snapshot nuevo
+    lote = agregar()
+    claves = [obj['Key'] for obj in proyecto3.objetos_entrada(almacen, {'particiones': lote['particiones']})]
+    assert claves == [
+        f'{PARTICION}hour=23/2025-05-28-23-10.csv', f'{PARTICION}titulares.csv', f'{PARTICION}titulares.parquet',
+    ]
+    assert compactar.compactar(almacen, BUCKET, [date(2025, 5, 28)], ['eltiempo']) == [f'{PARTICION}titulares.csv']
+
+
+def test_particion_salida_invalida(monkeypatch):
+    """Prueba que un PARTICION_SALIDA desconocido falle con un error claro"""
+    monkeypatch.setenv('PARTICION_SALIDA', 'minuto')
+
+    with pytest.raises(ValueError, match="PARTICION_SALIDA no soportado"):
+        proyecto1.particion_configurada()
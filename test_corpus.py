@@ -0,0 +1,59 @@
+import gzip
+
+import corpus
+import proyecto1
+from almacen import AlmacenLocal, listar_claves
+
+BUCKET = 'parcialfinal2025'
+
+
+def test_misma_semilla_mismos_bytes():
+    """Prueba que la semilla fije el contenido y que otra semilla cambie los artículos"""
+    for portada in corpus.PORTADAS.values():
+        assert portada(2, snapshot=3, semilla='a') == portada(2, snapshot=3, semilla='a')
+        assert portada(2, snapshot=3, semilla='a') != portada(2, snapshot=3, semilla='b')
+    assert corpus.articulo('eltiempo', 57, semilla=1) == corpus.articulo('eltiempo', 57, semilla=1)
+
+
+def test_extractores_encuentran_todos_los_articulos():
+    """Prueba que cada extractor saque exactamente los artículos de la portada pese al ruido"""
+    for escala in (1, 3):
+        articulos = corpus.articulos_en_portada('eltiempo', escala)
+        noticias = proyecto1.parse_el_tiempo(corpus.portada_el_tiempo(escala))
+        assert len(noticias) == corpus.ARTICULOS_POR_ESCALA * escala
+        assert {n['enlace'].split('?')[0] for n in noticias} == {
+            'https://www.eltiempo.com' + a['ruta'] for a in articulos
+        }
+
+        articulos = corpus.articulos_en_portada('publimetro', escala)
+        noticias = proyecto1.extraer_noticias_publimetro(corpus.portada_publimetro(escala))
+        assert {(n['titular'], n['link']) for n in noticias} == {
+            (a['titulo'], 'https://www.publimetro.co' + a['ruta']) for a in articulos
+        }
+        # Las destacadas llevan su propio c-overline
+        categorias = {n['titular']: n['categoria'] for n in noticias}
+        assert all(categorias[a['titulo']] == a['seccion'] for a in articulos[:len(articulos) // 4])
+
+
+def test_portada_rota_entre_snapshots():
+    """Prueba que dos snapshots seguidos compartan la fracción de permanencia"""
+    primero = {a['ruta'] for a in corpus.articulos_en_portada('publimetro', 2, snapshot=0)}
+    segundo = {a['ruta'] for a in corpus.articulos_en_portada('publimetro', 2, snapshot=1)}
+
+    assert len(primero & segundo) == 60
+    assert not primero & {a['ruta'] for a in corpus.articulos_en_portada('publimetro', 2, snapshot=4)}
+
+
+def test_main_escribe_snapshots(tmp_path):
+    """Prueba que el corpus quede en raw/ con los nombres del scraper, comprimido si se pide"""
+    corpus.main(['--directorio', str(tmp_path), '--dias', '2', '--snapshots', '2', '--gzip'])
+
+    almacen = AlmacenLocal(str(tmp_path))
+    claves = list(listar_claves(almacen, BUCKET, 'raw/'))
+    assert claves == sorted(
+        f'raw/contenido-{p}-2025-05-{d}-{h}.html'
+        for p in ('eltiempo', 'publimetro') for d, h in (('28', '06-00'), ('28', '15-07'), ('29', '06-14'), ('29', '15-21'))
+    )
+    respuesta = almacen.get_object(Bucket=BUCKET, Key='raw/contenido-publimetro-2025-05-29-06-14.html')
+    assert respuesta['ContentEncoding'] == 'gzip'
+    assert gzip.decompress(respuesta['Body'].read()).decode('utf-8') == corpus.portada_publimetro(1, snapshot=2)
@@ -0,0 +1,107 @@
+import gzip
+import json
+
+import pytest
+
+import corpus
+import metricas
+import proyecto1
+from almacen import AlmacenLocal
+
+BUCKET = 'parcialfinal2025'
+
+
+def test_registro_emf_por_invocacion():
+    """Prueba el formato EMF: dimensión, unidades, tiempos acumulados y errores"""
+    @metricas.instrumentar
+    def app(event, context):
+        with metricas.medir('parseo_ms'):
+            metricas.contar('titulares', 3)
+        metricas.contar('titulares', 2)
+        metricas.propiedad('clave', event['key'])
+        if event.get('fallar'):
+            raise RuntimeError('falló')
+        return 'ok'
+
+    with metricas.recolectar() as registros:
+        assert app({'key': 'raw/a.html'}, None) == 'ok'
+        with pytest.raises(RuntimeError):
+            app({'key': 'raw/b.html', 'fallar': True}, None)
+
+    assert len(registros) == 2
+    registro = registros[0]
+    assert registro['Funcion'] == 'test_metricas'
+    assert registro['clave'] == 'raw/a.html'
+    assert registro['titulares'] == 5
+    assert registro['duracion_ms'] >= registro['parseo_ms'] >= 0
+    assert 'errores' not in registro
+    definicion = registro['_aws']['CloudWatchMetrics'][0]
+    assert definicion['Namespace'] == metricas.ESPACIO and definicion['Dimensions'] == [['Funcion']]
+    assert definicion['Metrics'] == [
+        {'Name': 'duracion_ms', 'Unit': 'Milliseconds'},
+        {'Name': 'parseo_ms', 'Unit': 'Milliseconds'},
+        {'Name': 'titulares', 'Unit': 'Count'},
+    ]
+    assert registros[1]['errores'] == 1 and registros[1]['clave'] == 'raw/b.html'
+    # Fuera de una invocación no se acumula nada
+    metricas.contar('titulares')
+    assert metricas._actual is None
+
+
+def test_emf_en_stdout_y_desactivado(monkeypatch, capsys):
+    """Prueba que METRICAS=emf imprima una línea JSON y que por defecto no se imprima nada"""
+    app = metricas.instrumentar(lambda event, context: metricas.contar('llamadas_s3'))
+
+    app({}, None)
+    assert capsys.readouterr().out == ''
+
+    monkeypatch.setenv('METRICAS', 'emf')
+    app({}, None)
+    lineas = capsys.readouterr().out.splitlines()
+    assert len(lineas) == 1 and json.loads(lineas[0])['llamadas_s3'] == 1
+
+    monkeypatch.setenv('METRICAS', 'xray')
+    with pytest.raises(ValueError, match="METRICAS no soportado"):
+        app({}, None)
+
+
+def test_proyecto1_reporta_cada_etapa(monkeypatch, tmp_path):
+    """Prueba las métricas de proyecto1.app: bytes descargados, titulares, etapas y llamadas a S3"""
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    key = 'raw/contenido-publimetro-2025-05-28-10-30.html'
+    comprimido = gzip.compress(corpus.portada_publimetro(2).encode('utf-8'))
+    almacen.put_object(Bucket=BUCKET, Key=key, Body=comprimido, ContentEncoding='gzip')
+    evento = {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key}}}]}
+
+    with metricas.recolectar() as registros:
+        proyecto1.app(evento, None)
+
+    [registro] = registros
+    assert registro['Funcion'] == 'proyecto1' and registro['clave'] == key
+    assert registro['descarga_bytes'] == len(corpus.portada_publimetro(2).encode('utf-8'))
+    assert registro['titulares'] == 2 * corpus.ARTICULOS_POR_ESCALA
+    assert registro['subida_bytes'] > 0
+    # get del HTML, put del CSV, manifiesto y señales de corrida
+    assert registro['llamadas_s3'] >= 4
+    for etapa in ('descarga_ms', 'parseo_ms', 'serializacion_ms', 'subida_ms', 'senales_ms'):
+        assert 0 <= registro[etapa] <= registro['duracion_ms']
+
+
+def test_cuenta_llamadas_de_boto3():
+    """Prueba que un cliente de boto3 cuente sus llamadas a la API dentro de la invocación"""
+    import boto3
+    from botocore.stub import Stubber
+
+    glue = metricas.contar_llamadas(
+        boto3.client('glue', region_name='us-east-1', aws_access_key_id='x', aws_secret_access_key='x'), 'glue'
+    )
+    app = metricas.instrumentar(lambda event, context: glue.start_crawler(Name='noticias'))
+
+    with Stubber(glue) as stub, metricas.recolectar() as registros:
+        stub.add_response('start_crawler', {}, {'Name': 'noticias'})
+        stub.add_response('start_crawler', {}, {'Name': 'noticias'})
+        app({}, None)
+        glue.start_crawler(Name='noticias')
+
+    assert registros[0]['llamadas_glue'] == 1
@@ -0,0 +1,71 @@
+import pstats
+
+import pytest
+
+import corpus
+import perfilado
+import proyecto1
+from almacen import AlmacenLocal, listar_claves
+
+BUCKET = 'parcialfinal2025'
+
+
+@pytest.fixture
+def almacen(monkeypatch, tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / 'almacen'))
+    monkeypatch.setattr(perfilado, 's3', almacen)
+    monkeypatch.setenv('PERFILADO', 'activado')
+    return almacen
+
+
+def leer_perfil(almacen, tmp_path, clave):
+    ruta = tmp_path / 'perfil.prof'
+    ruta.write_bytes(almacen.get_object(Bucket=BUCKET, Key=clave)['Body'].read())
+    return pstats.Stats(str(ruta))
+
+
+def test_desactivado_no_envuelve(monkeypatch):
+    """Prueba que sin PERFILADO el handler quede tal cual y que un valor desconocido falle"""
+    def app(event, context):
+        return 'ok'
+
+    assert perfilado.perfilar(app) is app
+
+    monkeypatch.setenv('PERFILADO', 'siempre')
+    with pytest.raises(ValueError, match="PERFILADO no soportado"):
+        perfilado.perfilar(app)
+
+
+def test_perfil_de_proyecto1(almacen, monkeypatch, tmp_path):
+    """Prueba que una invocación de proyecto1.app deje su perfil y el resumen con las asignaciones"""
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    key = 'raw/contenido-eltiempo-2025-05-28-10-30.html'
+    almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_el_tiempo(2).encode('utf-8'))
+    evento = {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key}}}]}
+
+    respuesta = perfilado.perfilar(proyecto1.app)(evento, None)
+
+    assert respuesta['statusCode'] == 200
+    claves = list(listar_claves(almacen, BUCKET, 'control/perfiles/'))
+    assert [clave.rsplit('.', 1)[1] for clave in claves] == ['prof', 'txt']
+    assert claves[0].startswith('control/perfiles/proyecto1/')
+    funciones = {nombre for _, _, nombre in leer_perfil(almacen, tmp_path, claves[0]).stats}
+    assert {'procesar_snapshot', 'crear_sopa'} <= funciones
+    texto = almacen.get_object(Bucket=BUCKET, Key=claves[1])['Body'].read().decode('utf-8')
+    assert key in texto and 'procesar_snapshot' in texto
+    assert 'Pico de memoria' in texto and 'Sitios con más memoria asignada' in texto
+
+
+def test_perfil_con_excepcion(almacen, tmp_path):
+    """Prueba que el perfil se guarde aunque el handler falle y que la excepción siga"""
+    def app(event, context):
+        datos = [bytes(1024) for _ in range(200)]
+        raise RuntimeError(f'falló con {len(datos)} bloques')
+
+    with pytest.raises(RuntimeError, match='falló'):
+        perfilado.perfilar(app)({'fechas': ['2025-05-28']}, None)
+
+    claves = list(listar_claves(almacen, BUCKET, 'control/perfiles/test_perfilado/'))
+    assert len(claves) == 2
+    texto = almacen.get_object(Bucket=BUCKET, Key=claves[1])['Body'].read().decode('utf-8')
+    assert '2025-05-28' in texto
@@ -0,0 +1,70 @@
+import gzip
+
+import pytest
+
+import corpus
+from almacen import AlmacenLocal, listar_claves
+from reprocesar import main, seleccionar_snapshots
+
+BUCKET = 'parcialfinal2025'
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    """Bucket local con snapshots de dos días y dos periódicos, algunos en gzip"""
+    almacen = AlmacenLocal(str(tmp_path))
+    paginas = {'eltiempo': corpus.portada_el_tiempo(1), 'publimetro': corpus.portada_publimetro(1)}
+    for dia, hora in (('2025-05-27', '10-00'), ('2025-05-28', '09-00'), ('2025-05-28', '15-45')):
+        for nombre, html in paginas.items():
+            key = f'raw/contenido-{nombre}-{dia}-{hora}.html'
+            if hora == '15-45':
+                almacen.put_object(Bucket=BUCKET, Key=key, Body=gzip.compress(html.encode('utf-8')),
+                                   ContentType='text/html', ContentEncoding='gzip')
+            else:
+                almacen.put_object(Bucket=BUCKET, Key=key, Body=html.encode('utf-8'))
+    almacen.put_object(Bucket=BUCKET, Key='raw/notas.txt', Body=b'')
+    return almacen
+
+
+def test_seleccionar_ultimo_snapshot_por_dia(almacen):
+    """Prueba que se filtre por fecha y periódico y quede solo el último snapshot de cada día"""
+    from datetime import date
+
+    claves = list(listar_claves(almacen, BUCKET, 'raw/'))
+
+    assert seleccionar_snapshots(claves) == [
+        'raw/contenido-eltiempo-2025-05-27-10-00.html',
+        'raw/contenido-eltiempo-2025-05-28-15-45.html',
+        'raw/contenido-publimetro-2025-05-27-10-00.html',
+        'raw/contenido-publimetro-2025-05-28-15-45.html',
+    ]
+    assert seleccionar_snapshots(claves, desde=date(2025, 5, 28), periodicos={'publimetro'}) == [
+        'raw/contenido-publimetro-2025-05-28-15-45.html',
+    ]
+    # Con un archivo por snapshot (PARTICION_SALIDA=hora) no se descarta ninguno
+    assert seleccionar_snapshots(claves, desde=date(2025, 5, 28), periodicos={'publimetro'}, todos=True) == [
+        'raw/contenido-publimetro-2025-05-28-09-00.html',
+        'raw/contenido-publimetro-2025-05-28-15-45.html',
+    ]
+
+
+def test_reprocesar_en_paralelo(almacen, tmp_path, capsys):
+    """Prueba el lote completo con un pool de procesos y el reporte final"""
+    import proyecto1
+
+    codigo = main(['--local', str(tmp_path), '--procesos', '2', '--formato', 'csv'])
+
+    assert codigo == 0
+    finales = [o['Key'] for o in almacen.list_objects_v2(Bucket=BUCKET, Prefix='final/')['Contents']]
+    assert finales == [
+        'final/periodico=eltiempo/year=2025/month=05/day=27/titulares.csv',
+        'final/periodico=eltiempo/year=2025/month=05/day=28/titulares.csv',
+        'final/periodico=publimetro/year=2025/month=05/day=27/titulares.csv',
+        'final/periodico=publimetro/year=2025/month=05/day=28/titulares.csv',
+    ]
+    csv = almacen.get_object(Bucket=BUCKET, Key=finales[0])['Body'].read()
+    assert csv == proyecto1.titulares_a_csv(proyecto1.parse_el_tiempo(corpus.portada_el_tiempo(1)))
+    salida = capsys.readouterr().out
+    assert '4 snapshots a procesar.' in salida
+    assert 'Snapshots procesados: 4 (0 con error)' in salida
+    assert 'snapshots/s' in salida
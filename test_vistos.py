@@ -0,0 +1,134 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import catalogo
+import corpus
+import proyecto1
+import vistos
+from almacen import AlmacenLocal, listar_claves
+from vistos import IndiceVistos, canonizar
+
+BUCKET = 'parcialfinal2025'
+DIA = 86400
+
+
+@pytest.fixture
+def registro_directo(monkeypatch):
+    """PARTICION_SALIDA=hora con las particiones registradas en un Glue simulado"""
+    monkeypatch.setenv('PARTICION_SALIDA', 'hora')
+    monkeypatch.setenv('REGISTRO_PARTICIONES', 'directo')
+    monkeypatch.setattr(catalogo, 'glue', MagicMock(**{'batch_create_partition.return_value': {'Errors': []}}))
+    monkeypatch.setattr(catalogo, '_registradas', set())
+
+
+def test_canonizar():
+    """Prueba que las variantes de un mismo enlace tengan la misma forma canónica"""
+    assert canonizar('https://www.ElTiempo.com/deportes/gol/?utm_source=x&b=2&a=1#comentarios') == '//eltiempo.com/deportes/gol?a=1&b=2'
+    assert canonizar('http://eltiempo.com/deportes/gol?fbclid=abc') == '//eltiempo.com/deportes/gol'
+    assert canonizar('/deportes/gol/') == '/deportes/gol'
+    assert canonizar('/deportes/gol') != canonizar('/deportes/gol-2')
+
+
+def test_filtrar_con_ventana():
+    """Prueba que se descarte lo ya visto, se renueve lo que sigue en portada y se olvide lo viejo"""
+    indice = IndiceVistos()
+    noticias = [{'link': '/a'}, {'link': '/b'}, {'link': '/a?utm_medium=social'}]
+
+    assert indice.filtrar(noticias, 'link', 0) == [{'link': '/a'}, {'link': '/b'}]
+    assert indice.filtrar([{'link': '/a'}, {'link': '/c'}], 'link', 6 * DIA) == [{'link': '/c'}]
+    # /a siguió en portada y se renovó; /b no se ve hace más de la ventana y vuelve a ser nuevo
+    assert indice.filtrar([{'link': '/a'}, {'link': '/b'}], 'link', 8 * DIA) == [{'link': '/b'}]
+    assert len(indice.vistos) == 3
+    assert indice.filtrar([], 'link', 20 * DIA) == [] and indice.vistos == {}
+
+
+def test_guardar_y_cargar(tmp_path):
+    """Prueba que el índice sobreviva entre invocaciones con 12 bytes por artículo"""
+    almacen = AlmacenLocal(str(tmp_path))
+    assert IndiceVistos.cargar(almacen, BUCKET, 'eltiempo').vistos == {}
+
+    indice = IndiceVistos()
+    indice.filtrar([{'enlace': f'/nota-{i}'} for i in range(100)], 'enlace', 1748450000)
+    indice.guardar(almacen, BUCKET, 'eltiempo')
+
+    datos = almacen.get_object(Bucket=BUCKET, Key='control/vistos/eltiempo.bin')['Body'].read()
+    assert len(datos) == 100 * 12
+    assert IndiceVistos.cargar(almacen, BUCKET, 'eltiempo').vistos == indice.vistos
+
+
+def test_proyecto1_escribe_solo_articulos_nuevos(monkeypatch, tmp_path, registro_directo):
+    """Prueba que cada snapshot escriba solo lo que no salió antes y nada si no hay novedades"""
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    monkeypatch.setenv('VISTOS', 'descartar')
+
+    def procesar(hora, escala):
+        key = f'raw/contenido-eltiempo-2025-05-28-{hora}.html'
+        almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_el_tiempo(escala).encode('utf-8'))
+        evento = {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key}}}]}
+        return proyecto1.app(evento, None)
+
+    todas = proyecto1.parse_el_tiempo(corpus.portada_el_tiempo(2))
+    primeras = proyecto1.parse_el_tiempo(corpus.portada_el_tiempo(1))
+    procesar('09-00', 1)
+    procesar('15-45', 2)
+    respuesta = procesar('18-00', 2)
+
+    assert respuesta['body'] == 'Sin artículos nuevos en raw/contenido-eltiempo-2025-05-28-18-00.html'
+    particion = 'final/periodico=eltiempo/year=2025/month=05/day=28/'
+    assert list(listar_claves(almacen, BUCKET, particion)) == [
+        f'{particion}hour=09/2025-05-28-09-00.csv',
+        f'{particion}hour=15/2025-05-28-15-45.csv',
+    ]
+    segundo = almacen.get_object(Bucket=BUCKET, Key=f'{particion}hour=15/2025-05-28-15-45.csv')['Body'].read()
+    vistos_antes = {canonizar(n['enlace']) for n in primeras}
+    nuevas = []
+    for noticia in todas:
+        if canonizar(noticia['enlace']) not in vistos_antes:
+            nuevas.append(noticia)
+            vistos_antes.add(canonizar(noticia['enlace']))
+    assert 0 < len(nuevas) < len(todas)
+    assert segundo == proyecto1.titulares_a_csv(nuevas)
+    # La corrida vacía también cuenta para la marca de corrida completa
+    entrada = almacen.get_object(Bucket=BUCKET, Key='control/corridas/2025-05-28-18-00/eltiempo.json')['Body'].read()
+    assert b'"salidas": []' in entrada
+
+
+def test_dos_snapshots_del_mismo_dia_conservan_todo(monkeypatch, tmp_path, registro_directo):
+    """Prueba que el día reúna los titulares de ambos snapshots y que PARTICION_SALIDA=dia se rechace"""
+    almacen = AlmacenLocal(str(tmp_path))
+    monkeypatch.setattr(proyecto1, 's3', almacen)
+    monkeypatch.setenv('VISTOS', 'descartar')
+    claves = []
+    for hora, snapshot in (('09-00', 0), ('15-45', 1)):
+        key = f'raw/contenido-publimetro-2025-05-28-{hora}.html'
+        almacen.put_object(Bucket=BUCKET, Key=key, Body=corpus.portada_publimetro(2, snapshot).encode('utf-8'))
+        claves.append(key)
+
+    monkeypatch.setenv('PARTICION_SALIDA', 'dia')
+    with pytest.raises(ValueError, match='PARTICION_SALIDA=hora'):
+        proyecto1.procesar_snapshot(BUCKET, claves[0])
+    assert list(listar_claves(almacen, BUCKET, 'final/')) == []
+    assert list(listar_claves(almacen, BUCKET, 'control/vistos/')) == []
+
+    monkeypatch.setenv('PARTICION_SALIDA', 'hora')
+    for key in claves:
+        proyecto1.procesar_snapshot(BUCKET, key)
+    escritos = set()
+    for clave in listar_claves(almacen, BUCKET, 'final/'):
+        cuerpo = almacen.get_object(Bucket=BUCKET, Key=clave)['Body'].read().decode('utf-8')
+        escritos |= {linea.rsplit(',', 1)[1] for linea in cuerpo.splitlines()[1:]}
+    esperados = {
+        n['link'] for snapshot in (0, 1)
+        for n in proyecto1.extraer_noticias_publimetro(corpus.portada_publimetro(2, snapshot))
+    }
+    assert escritos == esperados
+
+
+def test_vistos_no_soportado(monkeypatch):
+    """Prueba que un VISTOS desconocido falle con un error claro"""
+    monkeypatch.setenv('VISTOS', 'marcar')
+
+    with pytest.raises(ValueError, match="VISTOS no soportado"):
+        vistos.modo_configurado()
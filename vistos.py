@@ -0,0 +1,131 @@
+"""
+Índice persistente de artículos ya vistos, para que solo los titulares nuevos sigan el flujo.
+
+Cada periódico tiene su índice en control/vistos/<periódico>.bin: una huella de
+8 bytes del enlace canónico y la última vez que se vio (segundos epoch, 4
+bytes). Un artículo que sigue en portada renueva su hora; uno que no se ve en
+VISTOS_VENTANA_DIAS días sale del índice, así que el tamaño depende de la
+ventana y no de la historia.
+
+Con VISTOS=descartar, proyecto1 deja en final/ solo los artículos que no están
+en el índice y lo guarda después de escribir la salida: si la escritura falla
+no se pierde ningún titular. El modo exige PARTICION_SALIDA=hora, un archivo
+por snapshot; con PARTICION_SALIDA=dia cada snapshot reemplazaría el archivo
+del día con solo sus novedades, así que proyecto1 lo rechaza. Dos snapshots
+del mismo periódico procesados a la vez pueden pisarse el índice; en ese caso
+un artículo sale como nuevo dos veces, nunca se pierde.
+"""
+import hashlib
+import os
+import struct
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 'desactivado' (por defecto): se escriben todos los titulares de la portada
+# 'descartar': se descartan los artículos que ya salieron en snapshots anteriores
+MODOS_VISTOS = ('desactivado', 'descartar')
+
+PREFIJO_VISTOS = 'control/vistos'
+VENTANA = float(os.environ.get('VISTOS_VENTANA_DIAS', '7')) * 86400
+
+# Parámetros de campañas y referidos: el mismo artículo con otro origen sigue siendo el mismo
+PARAMETROS_RASTREO = ('utm_', 'fbclid', 'gclid', 'mc_', 'ref', 'outputtype')
+
+REGISTRO = struct.Struct('<QI')
+
+
+def modo_configurado():
+    modo = os.environ.get('VISTOS', 'desactivado')
+    if modo not in MODOS_VISTOS:
+        raise ValueError(f"VISTOS no soportado: {modo}. Opciones: {', '.join(MODOS_VISTOS)}")
+    return modo
+
+
+def canonizar(url):
+    """
+    Forma canónica de un enlace: sin esquema, fragmento, 'www.', barra final
+    ni parámetros de rastreo, con el dominio en minúsculas y los parámetros
+    restantes ordenados.
+
+    Args:
+        url (str): Enlace tal como lo entrega el extractor (absoluto o relativo).
+    Returns:
+        str: Enlace canónico.
+    """
+    partes = urlsplit(url.strip())
+    dominio = partes.netloc.lower()
+    if dominio.startswith('www.'):
+        dominio = dominio[4:]
+    consulta = sorted(
+        (clave, valor) for clave, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if not clave.lower().startswith(PARAMETROS_RASTREO)
+    )
+    return urlunsplit(('', dominio, partes.path.rstrip('/') or '/', urlencode(consulta), ''))
+
+
+def huella(url):
+    """Huella de 64 bits del enlace canónico."""
+    digest = hashlib.blake2b(canonizar(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def clave_indice(periodico):
+    return f'{PREFIJO_VISTOS}/{periodico}.bin'
+
+
+class IndiceVistos:
+    """Conjunto de huellas con la última hora en que se vio cada artículo."""
+
+    def __init__(self, vistos=None):
+        self.vistos = vistos if vistos is not None else {}
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        return cls({h: visto for h, visto in REGISTRO.iter_unpack(datos)})
+
+    def a_bytes(self):
+        return b''.join(REGISTRO.pack(h, int(visto)) for h, visto in sorted(self.vistos.items()))
+
+    @classmethod
+    def cargar(cls, s3, bucket, periodico):
+        """Índice guardado del periódico; vacío si todavía no existe."""
+        try:
+            datos = s3.get_object(Bucket=bucket, Key=clave_indice(periodico))['Body'].read()
+            return cls.desde_bytes(datos)
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return cls()
+            raise
+
+    def guardar(self, s3, bucket, periodico):
+        s3.put_object(
+            Bucket=bucket,
+            Key=clave_indice(periodico),
+            Body=self.a_bytes(),
+            ContentType='application/octet-stream'
+        )
+
+    def filtrar(self, noticias, campo_enlace, ahora):
+        """
+        Deja los artículos que no están en el índice y los anota como vistos.
+
+        Los que ya estaban renuevan su hora; los que no se ven desde hace más
+        de VENTANA salen del índice. Un artículo repetido en la misma portada
+        se deja una sola vez.
+
+        Args:
+            noticias (list[dict]): Titulares extraídos.
+            campo_enlace (str): Columna con el enlace (ver periodicos.PERIODICOS).
+            ahora (float): Hora del snapshot en segundos (epoch).
+        Returns:
+            list[dict]: Titulares de artículos nuevos, en el orden de la portada.
+        """
+        limite = ahora - VENTANA
+        nuevas = []
+        for noticia in noticias:
+            h = huella(noticia[campo_enlace])
+            visto = self.vistos.get(h)
+            if visto is None or visto < limite:
+                nuevas.append(noticia)
+            self.vistos[h] = ahora
+        self.vistos = {h: visto for h, visto in self.vistos.items() if visto >= limite}
+        return nuevas